@@ -1,4 +1,26 @@
+from typing import Any
+
 from api_crawler.base_scraper import BaseScraper
-from api_crawler.crawler import Crawler
+from api_crawler.streaming import CrawlEvent, CrawlEventType
+
+__all__ = ["Crawler", "BaseScraper", "CrawlEvent", "CrawlEventType"]
+
+
+def __getattr__(name: str) -> Any:
+    """Imports the crawler on first access, so modules like scrapers don't load LangGraph and the agents.
+
+    Args:
+        name (str): name of the attribute.
+
+    Raises:
+        AttributeError: if the module has no such attribute.
+
+    Returns:
+        Any: attribute.
+    """
+    if name == "Crawler":
+        from api_crawler.crawler import Crawler
+
+        return Crawler
 
-__all__ = ["Crawler", "BaseScraper"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
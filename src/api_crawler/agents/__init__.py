@@ -1,6 +1,30 @@
-from api_crawler.agents.base_agent import BaseAgent
-from api_crawler.agents.critic.agent import CriticAgent
-from api_crawler.agents.search.agent import SearchAgent
-from api_crawler.agents.selector.agent import SelectorAgent
+from importlib import import_module
+from typing import Any
 
-__all__ = ["BaseAgent", "CriticAgent", "SearchAgent", "SelectorAgent"]
+__all__ = ["BaseAgent", "CriticAgent", "PlannerAgent", "SearchAgent", "SelectorAgent"]
+
+_MODULES = {
+    "BaseAgent": "api_crawler.agents.base_agent",
+    "CriticAgent": "api_crawler.agents.critic.agent",
+    "PlannerAgent": "api_crawler.agents.planner.agent",
+    "SearchAgent": "api_crawler.agents.search.agent",
+    "SelectorAgent": "api_crawler.agents.selector.agent",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Imports the agents on first access, so importing the output structures doesn't load LangGraph.
+
+    Args:
+        name (str): name of the attribute.
+
+    Raises:
+        AttributeError: if the module has no such attribute.
+
+    Returns:
+        Any: attribute.
+    """
+    if name in _MODULES:
+        return getattr(import_module(_MODULES[name]), name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
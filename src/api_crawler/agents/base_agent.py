@@ -1,35 +1,101 @@
 import logging
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Generic, Type, TypeVar
+from enum import Enum
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    ClassVar,
+    Generic,
+    Hashable,
+    Type,
+    TypeVar,
+)
 
-from langchain.agents import AgentState
-from langchain.chat_models import init_chat_model
-from langchain_core.messages import AnyMessage
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AnyMessage, SystemMessage
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import run_in_executor
+from langgraph.graph import MessagesState
 from langgraph.graph.state import CompiledStateGraph
 from pydantic import BaseModel
 
+from api_crawler.metrics import Metrics, record_llm_call, record_node
+from api_crawler.models import get_chat_model, get_structured_model, model_id
+from api_crawler.rate_limiter import RateLimiter, get_rate_limiter
+from api_crawler.tokens import estimate_message_tokens
+from api_crawler.usage import TokenUsage, UsageTracker, message_usage
+
 logger = logging.getLogger(__name__)
-T = TypeVar("T", bound=AgentState)
+T = TypeVar("T", bound=MessagesState)
 K = TypeVar("K", bound=BaseModel)
+R = TypeVar("R")
+
+
+AGENT_CONFIG_KEY = "agent"
 
 
 class BaseAgent(ABC, Generic[T]):
-    """Base class for Agents."""
+    """Base class for Agents.
 
-    def __init__(self, model: str = "openai:gpt-4o") -> None:
-        """Initializes the chat model.
+    Chat models and structured-output runnables are shared process-wide (see `api_crawler.models`), and the workflow
+    is compiled once per Agent type and `_workflow_key`; its nodes run on the Agent passed in the run config.
+    """
+
+    _workflows: ClassVar[dict[tuple[type, Hashable], CompiledStateGraph]] = {}
+    _workflows_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(
+        self,
+        model: str | BaseChatModel = "openai:gpt-4o",
+        metrics: Metrics | None = None,
+        node_models: dict[str, str | BaseChatModel] | None = None,
+    ) -> None:
+        """Initializes the chat models and attaches the process-wide rate limiters of the models.
 
         Args:
-            model (str, optional): LLM model to use as foundation for agents. Defaults to "openai:gpt-4o".
+            model (str | BaseChatModel, optional): LLM model to use as foundation for agents, its ID or a ready chat model. Defaults to "openai:gpt-4o".
+            metrics (Metrics | None, optional): collector of per-node metrics, shared by the agents of a crawl. Defaults to None, meaning a collector of this Agent only.
+            node_models (dict[str, str | BaseChatModel] | None, optional): models overriding `model` in some nodes, by node name, e.g. a cheaper one for simple steps. Defaults to None.
         """
-        logger.info("Initializing LLM model.")
-        self._model = init_chat_model(model)
+        self._model_id = model_id(model)
+        self._model = get_chat_model(model)
+        self._rate_limiter = get_rate_limiter(self._model_id)
+        self._node_models = {
+            node: (model_id(node_model), get_chat_model(node_model))
+            for node, node_model in (node_models or {}).items()
+        }
+        self._usage = UsageTracker(type(self).__name__)
+        self._metrics = metrics if metrics is not None else Metrics()
+
+    def usage(self) -> TokenUsage:
+        """Returns token usage of all LLM calls made by the Agent.
+
+        Returns:
+            TokenUsage: cached and uncached input tokens and output tokens.
+        """
+        return self._usage.total()
+
+    def metrics(self) -> Metrics:
+        """Returns the collector of per-node metrics of the Agent.
+
+        Returns:
+            Metrics: per-node timings, token usage and error counts.
+        """
+        return self._metrics
 
     @abstractmethod
     def run(self, *args, **kwargs) -> Any:
         """Runs the agentic workflow."""
         pass
 
+    @abstractmethod
+    async def arun(self, *args, **kwargs) -> Any:
+        """Runs the agentic workflow asynchronously."""
+        pass
+
     @abstractmethod
     def _build_workflow(
         self,
@@ -41,23 +107,311 @@ class BaseAgent(ABC, Generic[T]):
         """
         pass
 
+    @property
+    def _workflow(self) -> CompiledStateGraph[T, None, T, T]:
+        """Workflow shared by all Agents of the type with the same `_workflow_key`, compiled on first use.
+
+        Returns:
+            CompiledStateGraph[T, None, T, T]: execution-ready workflow.
+        """
+        key = (type(self), self._workflow_key())
+
+        with BaseAgent._workflows_lock:
+            if key not in BaseAgent._workflows:
+                BaseAgent._workflows[key] = self._build_workflow()
+
+            return BaseAgent._workflows[key]
+
+    def _workflow_key(self) -> Hashable:
+        """Returns the settings of the Agent that change the structure of its workflow.
+
+        Returns:
+            Hashable: key of the shared workflow.
+        """
+        return None
+
+    def _config(self, config: RunnableConfig) -> RunnableConfig:
+        """Adds the Agent to the config of a workflow run, so that the nodes of the shared workflow run on it.
+
+        Args:
+            config (RunnableConfig): config of the run.
+
+        Returns:
+            RunnableConfig: config with the Agent.
+        """
+        return {
+            **config,
+            "configurable": {**config.get("configurable", {}), AGENT_CONFIG_KEY: self},
+        }
+
+    def _instrument(
+        self,
+        node: str | Enum,
+        func: Callable[[Any, Any], Any],
+        afunc: Callable[[Any, Any], Awaitable[Any]] | None = None,
+    ) -> Runnable:
+        """Wraps a graph node or a routing function, so that it runs on the Agent of the run and its executions and the calls made within it are recorded.
+
+        Args:
+            node (str | Enum): name of the node.
+            func (Callable[[Any, Any], Any]): node implementation, a function of the Agent and the state, e.g. an unbound method.
+            afunc (Callable[[Any, Any], Awaitable[Any]] | None, optional): asynchronous node implementation. Defaults to None, meaning `func` run in a worker thread.
+
+        Returns:
+            Runnable: instrumented node.
+        """
+        name = type(self).__name__
+        node = node.value if isinstance(node, Enum) else node
+
+        def invoke(state: Any, config: RunnableConfig) -> Any:
+            """Runs the node within its metrics scope."""
+            agent: BaseAgent = config["configurable"][AGENT_CONFIG_KEY]
+            with agent._metrics.scope(name, node, agent._run_label(state)):
+                started = time.perf_counter()
+                try:
+                    result = func(agent, state)
+                except Exception:
+                    record_node(time.perf_counter() - started, failed=True)
+                    raise
+                record_node(time.perf_counter() - started)
+
+                return result
+
+        async def ainvoke(state: Any, config: RunnableConfig) -> Any:
+            """Runs the node asynchronously within its metrics scope."""
+            agent: BaseAgent = config["configurable"][AGENT_CONFIG_KEY]
+            with agent._metrics.scope(name, node, agent._run_label(state)):
+                started = time.perf_counter()
+                try:
+                    if afunc is not None:
+                        result = await afunc(agent, state)
+                    else:
+                        result = await run_in_executor(config, func, agent, state)
+                except Exception:
+                    record_node(time.perf_counter() - started, failed=True)
+                    raise
+                record_node(time.perf_counter() - started)
+
+                return result
+
+        return RunnableLambda(invoke, afunc=ainvoke, name=node)
+
+    def _run_label(self, state: Any) -> str | None:
+        """Returns the label of the run the state belongs to, used to aggregate metrics per run.
+
+        Args:
+            state (Any): state of the Agent.
+
+        Returns:
+            str | None: label of the run, None meaning the run of the calling Agent.
+        """
+        return None
+
+    def _model_for(self, node: str | Enum | None) -> BaseChatModel:
+        """Returns the chat model of the node.
+
+        Args:
+            node (str | Enum | None): name of the node, None meaning the default model.
+
+        Returns:
+            BaseChatModel: chat model.
+        """
+        node = node.value if isinstance(node, Enum) else node
+
+        return self._node_models[node][1] if node in self._node_models else self._model
+
+    def _model_id_for(self, node: str | Enum | None) -> str:
+        """Returns the ID of the model of the node, used to key caches.
+
+        Args:
+            node (str | Enum | None): name of the node, None meaning the default model.
+
+        Returns:
+            str: model ID.
+        """
+        node = node.value if isinstance(node, Enum) else node
+
+        return (
+            self._node_models[node][0] if node in self._node_models else self._model_id
+        )
+
+    def _rate_limiter_for(self, node: str | Enum | None) -> RateLimiter:
+        """Returns the process-wide rate limiter of the model of the node.
+
+        Args:
+            node (str | Enum | None): name of the node, None meaning the default model.
+
+        Returns:
+            RateLimiter: shared limiter.
+        """
+        model = self._model_id_for(node)
+
+        return (
+            self._rate_limiter if model == self._model_id else get_rate_limiter(model)
+        )
+
+    @staticmethod
+    def _build_prefix(description_prompt: str, *instructions: str) -> list[AnyMessage]:
+        """Builds the static prefix of every LLM call of an Agent.
+
+        The description always comes first, so all calls of all Agents share a byte-identical prefix the provider
+        can cache; instructions specific to the Agent follow.
+
+        Args:
+            description_prompt (str): description of the product.
+            *instructions (str): instructions of the Agent.
+
+        Returns:
+            list[AnyMessage]: static messages.
+        """
+        return [
+            SystemMessage(description_prompt),
+            SystemMessage("\n\n".join(instructions)),
+        ]
+
+    def _invoke_model(
+        self,
+        runnable: Runnable[list[AnyMessage], R],
+        messages: list[AnyMessage],
+        node: str | Enum | None = None,
+    ) -> R:
+        """Invokes the LLM through the rate limiter of its model.
+
+        Args:
+            runnable (Runnable[list[AnyMessage], R]): model, possibly with bound tools or output schema.
+            messages (list[AnyMessage]): list of messages.
+            node (str | Enum | None, optional): node whose model the runnable is built on. Defaults to None, meaning the default model.
+
+        Returns:
+            R: response.
+        """
+
+        def invoke() -> R:
+            """Calls the LLM, recording its latency."""
+            started = time.perf_counter()
+            try:
+                response = runnable.invoke(messages)
+            except Exception:
+                record_llm_call(time.perf_counter() - started, failed=True)
+                raise
+            self._record_usage(response, time.perf_counter() - started)
+
+            return response
+
+        return self._rate_limiter_for(node).run(
+            invoke, estimate_message_tokens(messages)
+        )
+
+    async def _ainvoke_model(
+        self,
+        runnable: Runnable[list[AnyMessage], R],
+        messages: list[AnyMessage],
+        node: str | Enum | None = None,
+    ) -> R:
+        """Invokes the LLM asynchronously through the rate limiter of its model.
+
+        Args:
+            runnable (Runnable[list[AnyMessage], R]): model, possibly with bound tools or output schema.
+            messages (list[AnyMessage]): list of messages.
+            node (str | Enum | None, optional): node whose model the runnable is built on. Defaults to None, meaning the default model.
+
+        Returns:
+            R: response.
+        """
+
+        async def ainvoke() -> R:
+            """Calls the LLM asynchronously, recording its latency."""
+            started = time.perf_counter()
+            try:
+                response = await runnable.ainvoke(messages)
+            except Exception:
+                record_llm_call(time.perf_counter() - started, failed=True)
+                raise
+            self._record_usage(response, time.perf_counter() - started)
+
+            return response
+
+        return await self._rate_limiter_for(node).arun(
+            ainvoke, estimate_message_tokens(messages)
+        )
+
     def _invoke_structured_model(
-        self, schema: Type[K], messages: list[AnyMessage]
+        self,
+        schema: Type[K],
+        messages: list[AnyMessage],
+        node: str | Enum | None = None,
     ) -> K:
         """Invokes the LLM forcing it to return a specified type.
 
         Args:
             schema (Type[K]): type to return.
             messages (list[AnyMessage]): list of messages.
+            node (str | Enum | None, optional): node whose model to use. Defaults to None, meaning the default model.
 
         Returns:
             K: response.
         """
-        structured_llm = self._model.with_structured_output(schema)
+        structured_llm = get_structured_model(self._model_for(node), schema)
 
-        response = structured_llm.invoke(messages)
+        response = self._invoke_model(structured_llm, messages, node)
 
-        if isinstance(response, schema):
-            return response
+        return self._parse_structured(schema, response)
+
+    async def _ainvoke_structured_model(
+        self,
+        schema: Type[K],
+        messages: list[AnyMessage],
+        node: str | Enum | None = None,
+    ) -> K:
+        """Invokes the LLM asynchronously forcing it to return a specified type.
+
+        Args:
+            schema (Type[K]): type to return.
+            messages (list[AnyMessage]): list of messages.
+            node (str | Enum | None, optional): node whose model to use. Defaults to None, meaning the default model.
+
+        Returns:
+            K: response.
+        """
+        structured_llm = get_structured_model(self._model_for(node), schema)
+
+        response = await self._ainvoke_model(structured_llm, messages, node)
+
+        return self._parse_structured(schema, response)
+
+    @staticmethod
+    def _parse_structured(schema: Type[K], response: dict[str, Any]) -> K:
+        """Extracts the parsed output of a structured call made with `include_raw=True`.
+
+        Args:
+            schema (Type[K]): type to return.
+            response (dict[str, Any]): raw message, parsed output and parsing error.
+
+        Returns:
+            K: parsed output.
+        """
+        if response.get("parsing_error") is not None:
+            raise response["parsing_error"]
+
+        parsed = response.get("parsed")
+
+        if isinstance(parsed, schema):
+            return parsed
+        else:
+            raise TypeError(f"Unexpected return type: {type(parsed)}")
+
+    def _record_usage(self, response: Any, seconds: float) -> None:
+        """Records token usage and latency of a response, whether a raw message or a structured one with `include_raw=True`.
+
+        Args:
+            response (Any): response of the model.
+            seconds (float): latency of the call.
+        """
+        if isinstance(response, dict):
+            response = response.get("raw")
+
+        if isinstance(response, AIMessage):
+            self._usage.record(response)
+            record_llm_call(seconds, message_usage(response))
         else:
-            raise TypeError(f"Unexpected return type: {type(response)}")
+            record_llm_call(seconds)
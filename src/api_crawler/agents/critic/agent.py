@@ -1,35 +1,94 @@
-from langchain_core.messages import HumanMessage, SystemMessage
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import Future
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AnyMessage, HumanMessage
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 
 from api_crawler.agents import BaseAgent
 from api_crawler.agents.critic import CriticAgentNode, CriticAgentState
-from api_crawler.agents.output_structures import Critique, Post, PostCritique
+from api_crawler.agents.output_structures import (
+    Critique,
+    CritiqueList,
+    Post,
+    PostCritique,
+)
+from api_crawler.cache import SQLiteCache
+from api_crawler.identity import post_identity
+from api_crawler.metrics import Metrics
+from api_crawler.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
 
 
 class CriticAgent(BaseAgent[CriticAgentState]):
     """AI agent meant to critique suitability of posts for a given task."""
 
+    CACHE_TTL = datetime.timedelta(days=1)
+    CACHE_MAX_SIZE_BYTES = 4 * 1024 * 1024
+
     def __init__(
         self,
         description_prompt: str,
         introduction_prompt: str,
-        model: str = "openai:gpt-4o",
+        model: str | BaseChatModel = "openai:gpt-4o",
+        cache: SQLiteCache | None = None,
+        batch_token_budget: int | None = None,
+        metrics: Metrics | None = None,
+        node_models: dict[str, str | BaseChatModel] | None = None,
+        screening_model: str | BaseChatModel | None = None,
+        escalation_score: int = 4,
     ) -> None:
         """Initializes the Agent's workflow graph and LLM model.
 
         Args:
             description_prompt (str): description of the product.
             introduction_prompt (str): prompt to use as an introduction of the role of the critic.
-            model (str, optional): LLM model to use as foundation for agents. Defaults to "openai:gpt-4o".
+            model (str | BaseChatModel, optional): LLM model to use as foundation for agents, its ID or a ready chat model. Defaults to "openai:gpt-4o".
+            cache (SQLiteCache | None, optional): cache of critiques, persistent if backed by a file. Defaults to None, meaning an in-process cache of this agent whose entries expire after a day and which is limited to `CACHE_MAX_SIZE_BYTES`.
+            batch_token_budget (int | None, optional): estimated number of post tokens packed into a single LLM call critiquing several posts at once. Defaults to None, meaning one call per post.
+            metrics (Metrics | None, optional): collector of per-node metrics, shared by the agents of a crawl. Defaults to None.
+            node_models (dict[str, str | BaseChatModel] | None, optional): models overriding `model` in the CRITIQUE node, by node name. Defaults to None.
+            screening_model (str | BaseChatModel | None, optional): cheaper model critiquing every post first, in cascade mode; only posts it scores at least `escalation_score` (or fails to critique) are critiqued again by the main model. Defaults to None, meaning no cascade.
+            escalation_score (int, optional): screening score from which a post is escalated to the main model. Defaults to 4, so only clear rejects keep the screening critique.
         """
-        super().__init__(model)
+        self._cascade = screening_model is not None
+        if self._cascade:
+            node_models = {
+                **(node_models or {}),
+                CriticAgentNode.SCREEN: screening_model,
+            }
+        super().__init__(model, metrics, node_models)
         self._description_prompt = description_prompt
         self._introduction_prompt = introduction_prompt
-        self._workflow = self._build_workflow()
+        self._prefix = self._build_prefix(description_prompt, introduction_prompt)
+        self._cache = (
+            cache
+            if cache is not None
+            else SQLiteCache(
+                namespace="critiques",
+                ttl=self.CACHE_TTL,
+                max_size_bytes=self.CACHE_MAX_SIZE_BYTES,
+            )
+        )
+        self._in_flight: dict[str, Future[Critique | None]] = {}
+        self._in_flight_lock = threading.Lock()
+        self._batch_token_budget = batch_token_budget
+        self._escalation_score = escalation_score
+        self._prompts_hash = self._hash(
+            description_prompt,
+            introduction_prompt,
+            json.dumps(Critique.model_json_schema(), sort_keys=True),
+        )
 
     def run(self, posts: list[Post]) -> list[PostCritique]:
-        """Runs the Agent.
+        """Runs the Agent, reusing cached critiques of unchanged posts and waiting for ones already being critiqued by other runs.
 
         Args:
             posts (list[Post]): list of posts to critique.
@@ -37,24 +96,58 @@ class CriticAgent(BaseAgent[CriticAgentState]):
         Returns:
             list[PostCritique]: critiques.
         """
-        responses: list[CriticAgentState] = self._workflow.batch(
-            [
-                {
-                    "post": post.content,
-                }
-                for post in posts
-            ],
-            {"recursion_limit": 200},
-            return_exceptions=True,
-        )
+        keys, critiques, to_critique, waiting = self._claim(posts)
+        batches = self._pack(to_critique)
 
-        critiques = [
-            PostCritique(post=post.header, critique=response["critique"])
-            for post, response in zip(posts, responses)
-            if not isinstance(response, Exception)
-        ]
+        try:
+            responses: list[CriticAgentState] = self._workflow.batch(
+                self._inputs(to_critique, batches),
+                self._config({"recursion_limit": 200}),
+                return_exceptions=True,
+            )
+            self._store(critiques, batches, responses)
+        finally:
+            self._release(critiques, to_critique)
 
-        return critiques
+        for key, future in waiting.items():
+            self._collect(critiques, key, future.result())
+
+        return self._assemble(posts, keys, critiques)
+
+    async def arun(self, posts: list[Post]) -> list[PostCritique]:
+        """Runs the Agent asynchronously, reusing cached critiques of unchanged posts and waiting for ones already being critiqued by other runs.
+
+        Args:
+            posts (list[Post]): list of posts to critique.
+
+        Returns:
+            list[PostCritique]: critiques.
+        """
+        keys, critiques, to_critique, waiting = self._claim(posts)
+        batches = self._pack(to_critique)
+
+        try:
+            responses: list[CriticAgentState] = await self._workflow.abatch(
+                self._inputs(to_critique, batches),
+                self._config({"recursion_limit": 200}),
+                return_exceptions=True,
+            )
+            self._store(critiques, batches, responses)
+        finally:
+            self._release(critiques, to_critique)
+
+        for key, future in waiting.items():
+            self._collect(critiques, key, await asyncio.wrap_future(future))
+
+        return self._assemble(posts, keys, critiques)
+
+    def _workflow_key(self) -> bool:
+        """Returns whether the Agent screens posts first, which adds the SCREEN node to its workflow.
+
+        Returns:
+            bool: whether the Agent runs as a cascade.
+        """
+        return self._cascade
 
     def _build_workflow(
         self,
@@ -66,39 +159,103 @@ class CriticAgent(BaseAgent[CriticAgentState]):
         """
         workflow_graph = StateGraph(CriticAgentState)
 
-        workflow_graph.add_node(CriticAgentNode.DESCRIPTION, self._description)
-        workflow_graph.add_node(CriticAgentNode.INTRODUCTION, self._introduce)
-        workflow_graph.add_node(CriticAgentNode.CRITIQUE, self._criticize)
-
-        workflow_graph.add_edge(START, CriticAgentNode.DESCRIPTION)
-        workflow_graph.add_edge(
-            CriticAgentNode.DESCRIPTION, CriticAgentNode.INTRODUCTION
+        workflow_graph.add_node(
+            CriticAgentNode.CRITIQUE,
+            self._instrument(
+                CriticAgentNode.CRITIQUE,
+                type(self)._criticize,
+                type(self)._acriticize,
+            ),
         )
-        workflow_graph.add_edge(CriticAgentNode.INTRODUCTION, CriticAgentNode.CRITIQUE)
+
+        if self._cascade:
+            workflow_graph.add_node(
+                CriticAgentNode.SCREEN,
+                self._instrument(
+                    CriticAgentNode.SCREEN,
+                    type(self)._screen,
+                    type(self)._ascreen,
+                ),
+            )
+            workflow_graph.add_edge(START, CriticAgentNode.SCREEN)
+            workflow_graph.add_edge(CriticAgentNode.SCREEN, CriticAgentNode.CRITIQUE)
+        else:
+            workflow_graph.add_edge(START, CriticAgentNode.CRITIQUE)
         workflow_graph.add_edge(CriticAgentNode.CRITIQUE, END)
 
-        workflow = workflow_graph.compile()
+        workflow = workflow_graph.compile(checkpointer=False)
 
         return workflow
 
-    def _description(self, _: CriticAgentState) -> CriticAgentState:
-        """Introduces the description as context.
+    def _screen(self, state: CriticAgentState) -> CriticAgentState:
+        """Critiques the candidate posts with the screening model. First stage of the cascade.
+
+        Args:
+            state (CriticAgentState): state of the Agent.
 
         Returns:
-            CriticAgentState: update to the state of the Agent
+            CriticAgentState: update to the state of the Agent.
         """
-        return {"messages": [SystemMessage(self._description_prompt)]}
+        try:
+            screenings = self._critique_posts(state["posts"], CriticAgentNode.SCREEN)
+        except Exception as e:
+            screenings = self._failed_screening(state, e)
+
+        return {"screenings": screenings}
 
-    def _introduce(self, _: CriticAgentState) -> CriticAgentState:
-        """Introduces the LLM to its task.
+    async def _ascreen(self, state: CriticAgentState) -> CriticAgentState:
+        """Critiques the candidate posts with the screening model asynchronously. First stage of the cascade.
+
+        Args:
+            state (CriticAgentState): state of the Agent.
 
         Returns:
             CriticAgentState: update to the state of the Agent.
         """
-        return {"messages": [SystemMessage(self._introduction_prompt)]}
+        try:
+            screenings = await self._acritique_posts(
+                state["posts"], CriticAgentNode.SCREEN
+            )
+        except Exception as e:
+            screenings = self._failed_screening(state, e)
+
+        return {"screenings": screenings}
+
+    @staticmethod
+    def _failed_screening(
+        state: CriticAgentState, error: Exception
+    ) -> list[Critique | None]:
+        """Escalates all posts after the screening failed.
+
+        Args:
+            state (CriticAgentState): state of the Agent.
+            error (Exception): error of the screening.
+
+        Returns:
+            list[Critique | None]: no screening critiques.
+        """
+        logger.warning(f"Screening failed, escalating all posts: {error!r}")
+
+        return [None] * len(state["posts"])
 
     def _criticize(self, state: CriticAgentState) -> CriticAgentState:
-        """Critiques the candidate post.
+        """Critiques the candidate posts that weren't rejected by the screening, if there was one.
+
+        Args:
+            state (CriticAgentState): state of the Agent.
+
+        Returns:
+            CriticAgentState: update to the state of the Agent.
+        """
+        escalated = self._escalated(state)
+        critiques = self._critique_posts(
+            [state["posts"][i] for i in escalated], CriticAgentNode.CRITIQUE
+        )
+
+        return {"critiques": self._merge_stages(state, escalated, critiques)}
+
+    async def _acriticize(self, state: CriticAgentState) -> CriticAgentState:
+        """Critiques asynchronously the candidate posts that weren't rejected by the screening, if there was one.
 
         Args:
             state (CriticAgentState): state of the Agent.
@@ -106,9 +263,417 @@ class CriticAgent(BaseAgent[CriticAgentState]):
         Returns:
             CriticAgentState: update to the state of the Agent.
         """
-        response: Critique = self._invoke_structured_model(
-            Critique,
-            state["messages"] + [HumanMessage(state["post"])],
+        escalated = self._escalated(state)
+        critiques = await self._acritique_posts(
+            [state["posts"][i] for i in escalated], CriticAgentNode.CRITIQUE
+        )
+
+        return {"critiques": self._merge_stages(state, escalated, critiques)}
+
+    def _escalated(self, state: CriticAgentState) -> list[int]:
+        """Finds the posts the main model has to critique: all of them, unless the screening clearly rejected some.
+
+        Args:
+            state (CriticAgentState): state of the Agent.
+
+        Returns:
+            list[int]: indices of the escalated posts.
+        """
+        escalated = [
+            i
+            for i, screening in enumerate(state["screenings"])
+            if screening is None or screening.score >= self._escalation_score
+        ]
+
+        if self._cascade:
+            logger.info(
+                f"Escalating {len(escalated)} of {len(state['posts'])} screened posts."
+            )
+
+        return escalated
+
+    @staticmethod
+    def _merge_stages(
+        state: CriticAgentState, escalated: list[int], critiques: list[Critique | None]
+    ) -> list[Critique | None]:
+        """Combines the screening critiques with the critiques of the escalated posts, which take precedence.
+
+        Args:
+            state (CriticAgentState): state of the Agent.
+            escalated (list[int]): indices of the escalated posts.
+            critiques (list[Critique | None]): critiques of the escalated posts.
+
+        Returns:
+            list[Critique | None]: critique of each post, None if it failed.
+        """
+        merged = list(state["screenings"])
+
+        for i, critique in zip(escalated, critiques):
+            if critique is not None:
+                merged[i] = critique
+
+        return merged
+
+    def _critique_posts(
+        self, posts: list[Post], node: CriticAgentNode
+    ) -> list[Critique | None]:
+        """Critiques the posts with the model of the node, all at once if there are several of them.
+
+        Args:
+            posts (list[Post]): posts to critique.
+            node (CriticAgentNode): node whose model to use.
+
+        Returns:
+            list[Critique | None]: critique of each post, None if it failed.
+        """
+        if len(posts) <= 1:
+            return [self._critique_post(post, node) for post in posts]
+
+        try:
+            response: CritiqueList = self._invoke_structured_model(
+                CritiqueList, self._batch_messages(posts), node
+            )
+            critiques = self._match(posts, response)
+        except Exception as e:
+            critiques = self._failed_batch(posts, e)
+
+        missing = [i for i, critique in enumerate(critiques) if critique is None]
+        fallback = []
+        for i in missing:
+            try:
+                fallback.append(self._critique_post(posts[i], node))
+            except Exception as e:
+                fallback.append(e)
+
+        return self._fill_missing(posts, critiques, missing, fallback)
+
+    async def _acritique_posts(
+        self, posts: list[Post], node: CriticAgentNode
+    ) -> list[Critique | None]:
+        """Critiques the posts asynchronously with the model of the node, all at once if there are several of them.
+
+        Args:
+            posts (list[Post]): posts to critique.
+            node (CriticAgentNode): node whose model to use.
+
+        Returns:
+            list[Critique | None]: critique of each post, None if it failed.
+        """
+        if len(posts) <= 1:
+            return [await self._acritique_post(post, node) for post in posts]
+
+        try:
+            response: CritiqueList = await self._ainvoke_structured_model(
+                CritiqueList, self._batch_messages(posts), node
+            )
+            critiques = self._match(posts, response)
+        except Exception as e:
+            critiques = self._failed_batch(posts, e)
+
+        missing = [i for i, critique in enumerate(critiques) if critique is None]
+        fallback = await asyncio.gather(
+            *(self._acritique_post(posts[i], node) for i in missing),
+            return_exceptions=True,
+        )
+
+        return self._fill_missing(posts, critiques, missing, fallback)
+
+    @staticmethod
+    def _failed_batch(posts: list[Post], error: Exception) -> list[Critique | None]:
+        """Falls back to critiquing the posts one by one after the batched critique failed.
+
+        Args:
+            posts (list[Post]): posts of the batch.
+            error (Exception): error of the batched critique.
+
+        Returns:
+            list[Critique | None]: no critiques.
+        """
+        logger.warning(
+            f"Batched critique of {len(posts)} posts failed, critiquing them one by one: {error!r}"
+        )
+
+        return [None] * len(posts)
+
+    @staticmethod
+    def _fill_missing(
+        posts: list[Post],
+        critiques: list[Critique | None],
+        missing: list[int],
+        fallback: list[Critique | BaseException],
+    ) -> list[Critique | None]:
+        """Fills in the critiques of the posts that the batched critique left out, with the posts' own critiques.
+
+        Args:
+            posts (list[Post]): posts of the batch.
+            critiques (list[Critique | None]): critiques from the batched call, None where missing.
+            missing (list[int]): indices of the posts critiqued one by one.
+            fallback (list[Critique | BaseException]): their critiques or errors.
+
+        Returns:
+            list[Critique | None]: critique of each post, None if it failed.
+        """
+        for i, critique in zip(missing, fallback):
+            if isinstance(critique, BaseException):
+                logger.warning(
+                    f"Critique of {posts[i].header.link} failed: {critique!r}"
+                )
+                critique = None
+            critiques[i] = critique
+
+        return critiques
+
+    def _critique_post(self, post: Post, node: CriticAgentNode) -> Critique:
+        """Critiques a single post.
+
+        Args:
+            post (Post): post to critique.
+            node (CriticAgentNode): node whose model to use.
+
+        Returns:
+            Critique: critique.
+        """
+        return self._invoke_structured_model(
+            Critique, self._prefix + [HumanMessage(post.content)], node
+        )
+
+    async def _acritique_post(self, post: Post, node: CriticAgentNode) -> Critique:
+        """Critiques a single post asynchronously.
+
+        Args:
+            post (Post): post to critique.
+            node (CriticAgentNode): node whose model to use.
+
+        Returns:
+            Critique: critique.
+        """
+        return await self._ainvoke_structured_model(
+            Critique, self._prefix + [HumanMessage(post.content)], node
+        )
+
+    def _batch_messages(self, posts: list[Post]) -> list[AnyMessage]:
+        """Builds the messages of a call critiquing several posts.
+
+        Args:
+            posts (list[Post]): posts to critique.
+
+        Returns:
+            list[AnyMessage]: messages.
+        """
+        return self._prefix + [
+            HumanMessage(
+                f"Critique each of the following {len(posts)} posts separately, identifying them by their links.\n\n"
+                + "\n\n".join(
+                    f"=== Post {i}: {post.header.link} ===\n{post.content}"
+                    for i, post in enumerate(posts, start=1)
+                )
+            )
+        ]
+
+    @staticmethod
+    def _match(posts: list[Post], response: CritiqueList) -> list[Critique | None]:
+        """Matches critiques returned by a batched call with the posts by their links.
+
+        Args:
+            posts (list[Post]): critiqued posts.
+            response (CritiqueList): batched critiques.
+
+        Returns:
+            list[Critique | None]: critique of each post, None if the model omitted it.
+        """
+        by_link = {
+            post_identity(post_critique.post.link): post_critique.critique
+            for post_critique in response.critiques
+        }
+
+        return [by_link.get(post_identity(post.header.link)) for post in posts]
+
+    def _pack(self, to_critique: dict[str, Post]) -> list[list[str]]:
+        """Packs posts into batches whose estimated size fits the token budget.
+
+        A post larger than the budget gets a batch of its own.
+
+        Args:
+            to_critique (dict[str, Post]): posts to critique by cache key.
+
+        Returns:
+            list[list[str]]: cache keys of the posts of each batch.
+        """
+        if self._batch_token_budget is None:
+            return [[key] for key in to_critique]
+
+        batches: list[list[str]] = []
+        batch_tokens = 0
+
+        for key, post in to_critique.items():
+            tokens = estimate_tokens(post.content)
+            if not batches or batch_tokens + tokens > self._batch_token_budget:
+                batches.append([])
+                batch_tokens = 0
+            batches[-1].append(key)
+            batch_tokens += tokens
+
+        return batches
+
+    def _claim(
+        self, posts: list[Post]
+    ) -> tuple[
+        list[str],
+        dict[str, Critique],
+        dict[str, Post],
+        dict[str, Future[Critique | None]],
+    ]:
+        """Looks the posts up in the cache and claims the ones nobody is critiquing yet.
+
+        Args:
+            posts (list[Post]): list of posts to critique.
+
+        Returns:
+            tuple[list[str], dict[str, Critique], dict[str, Post], dict[str, Future[Critique | None]]]: cache keys of the posts, cached critiques, posts to critique and critiques in progress in other runs.
+        """
+        keys = [self._cache_key(post) for post in posts]
+        critiques: dict[str, Critique] = {}
+
+        for key in dict.fromkeys(keys):
+            cached = self._cache.get(key)
+            if cached is not None:
+                critiques[key] = Critique.model_validate_json(cached)
+
+        with self._in_flight_lock:
+            waiting = {
+                key: self._in_flight[key]
+                for key in keys
+                if key not in critiques and key in self._in_flight
+            }
+            to_critique = {
+                key: post
+                for key, post in zip(keys, posts)
+                if key not in critiques and key not in waiting
+            }
+            for key in to_critique:
+                self._in_flight[key] = Future()
+
+        return keys, critiques, to_critique, waiting
+
+    def _inputs(
+        self, to_critique: dict[str, Post], batches: list[list[str]]
+    ) -> list[CriticAgentState]:
+        """Prepares workflow inputs for the batches of posts to critique.
+
+        Args:
+            to_critique (dict[str, Post]): posts to critique by cache key.
+            batches (list[list[str]]): cache keys of the posts of each batch.
+
+        Returns:
+            list[CriticAgentState]: workflow inputs.
+        """
+        return [
+            {
+                "posts": [to_critique[key] for key in batch],
+                "screenings": [None] * len(batch),
+            }
+            for batch in batches
+        ]
+
+    def _store(
+        self,
+        critiques: dict[str, Critique],
+        batches: list[list[str]],
+        responses: list[CriticAgentState | Exception],
+    ) -> None:
+        """Collects and caches successful critiques.
+
+        Args:
+            critiques (dict[str, Critique]): critiques by cache key, updated in place.
+            batches (list[list[str]]): cache keys of the posts of each batch.
+            responses (list[CriticAgentState | Exception]): workflow responses.
+        """
+        for batch, response in zip(batches, responses):
+            if isinstance(response, Exception):
+                continue
+            for key, critique in zip(batch, response["critiques"]):
+                if critique is not None:
+                    critiques[key] = critique
+                    self._cache.set(key, critique.model_dump_json())
+
+    def _release(
+        self, critiques: dict[str, Critique], to_critique: dict[str, Post]
+    ) -> None:
+        """Hands the critiques over to runs waiting for them.
+
+        Args:
+            critiques (dict[str, Critique]): critiques by cache key.
+            to_critique (dict[str, Post]): claimed posts by cache key.
+        """
+        with self._in_flight_lock:
+            for key in to_critique:
+                self._in_flight.pop(key).set_result(critiques.get(key))
+
+    @staticmethod
+    def _collect(
+        critiques: dict[str, Critique], key: str, critique: Critique | None
+    ) -> None:
+        """Adds a critique made by another run, unless it failed.
+
+        Args:
+            critiques (dict[str, Critique]): critiques by cache key, updated in place.
+            key (str): cache key of the post.
+            critique (Critique | None): critique or None if it failed.
+        """
+        if critique is not None:
+            critiques[key] = critique
+
+    @staticmethod
+    def _assemble(
+        posts: list[Post], keys: list[str], critiques: dict[str, Critique]
+    ) -> list[PostCritique]:
+        """Matches critiques with their posts, in the original order.
+
+        Args:
+            posts (list[Post]): critiqued posts.
+            keys (list[str]): cache keys of the posts.
+            critiques (dict[str, Critique]): critiques by cache key.
+
+        Returns:
+            list[PostCritique]: critiques.
+        """
+        return [
+            PostCritique(post=post.header, critique=critiques[key])
+            for post, key in zip(posts, keys)
+            if key in critiques
+        ]
+
+    def _cache_key(self, post: Post) -> str:
+        """Computes the cache key of the post critique.
+
+        Variants of the post link map to the same key. The key changes whenever the post content, the prompts, the output schema or the models change.
+
+        Args:
+            post (Post): post to critique.
+
+        Returns:
+            str: cache key.
+        """
+        return self._hash(
+            post_identity(post.header.link),
+            self._hash(post.content),
+            self._prompts_hash,
+            self._model_id_for(CriticAgentNode.CRITIQUE),
+            *(
+                [
+                    self._model_id_for(CriticAgentNode.SCREEN),
+                    str(self._escalation_score),
+                ]
+                if self._cascade
+                else []
+            ),
         )
 
-        return {"critique": response}
+    @staticmethod
+    def _hash(*parts: str) -> str:
+        """Hashes the parts into a single digest.
+
+        Returns:
+            str: SHA-256 hex digest.
+        """
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
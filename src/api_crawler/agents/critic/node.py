@@ -4,8 +4,7 @@ from langgraph.graph import END, START
 
 
 class CriticAgentNode(str, Enum):
-    DESCRIPTION = "DESCRIPTION"
-    INTRODUCTION = "INTRODUCTION"
+    SCREEN = "SCREEN"
     CRITIQUE = "CRITIQUE"
     START = START
     END = END
@@ -1,10 +1,11 @@
-from langchain.agents import AgentState
+from langgraph.graph import MessagesState
 
-from api_crawler.agents.output_structures import Critique
+from api_crawler.agents.output_structures import Critique, Post
 
 
-class CriticAgentState(AgentState):
+class CriticAgentState(MessagesState):
     """Extended state of the Agent."""
 
-    post: str
-    critique: Critique
+    posts: list[Post]
+    screenings: list[Critique | None]
+    critiques: list[Critique | None]
@@ -8,6 +8,14 @@ class PostHeader(BaseModel):
     link: str = Field(description="URL of the post")
 
 
+class SearchResult(PostHeader):
+    """Post header found with search."""
+
+    created: float | None = Field(
+        default=None, description="creation timestamp of the post"
+    )
+
+
 class Post(BaseModel):
     """Post header and content."""
 
@@ -33,6 +41,11 @@ class Critique(BaseModel):
 
     ad_upsides: str = Field(description="upsides of advertising suitability")
     ad_downsides: str = Field(description="downsides of advertising suitability")
+    score: int = Field(
+        ge=0,
+        le=10,
+        description="suitability for advertising from 0 (unsuitable) to 10 (perfect fit), weighing the upsides against the downsides",
+    )
 
 
 class PostCritique(BaseModel):
@@ -42,6 +55,14 @@ class PostCritique(BaseModel):
     critique: Critique = Field(description="critique of its suitability")
 
 
+class CritiqueList(BaseModel):
+    """List of post critiques."""
+
+    critiques: list[PostCritique] = Field(
+        description="critique of each post, identified by its link"
+    )
+
+
 class PostsToLoad(BaseModel):
     """Posts to load."""
 
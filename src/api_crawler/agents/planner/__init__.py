@@ -0,0 +1,4 @@
+from api_crawler.agents.planner.node import PlannerAgentNode
+from api_crawler.agents.planner.state import PlannerAgentState
+
+__all__ = ["PlannerAgentNode", "PlannerAgentState"]
@@ -0,0 +1,169 @@
+import logging
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AnyMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.state import CompiledStateGraph
+from more_itertools import unique_everseen
+
+from api_crawler.agents import BaseAgent
+from api_crawler.agents.planner import PlannerAgentNode, PlannerAgentState
+from api_crawler.agents.planner.output_structures import QueryPlan
+from api_crawler.identity import normalize_query
+from api_crawler.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PlannerAgent(BaseAgent[PlannerAgentState]):
+    """AI agent meant to plan a diverse set of search queries once for the whole crawl."""
+
+    def __init__(
+        self,
+        description_prompt: str,
+        introduction_prompt: str,
+        tags: list[str],
+        model: str | BaseChatModel = "openai:gpt-4o",
+        metrics: Metrics | None = None,
+        node_models: dict[str, str | BaseChatModel] | None = None,
+    ) -> None:
+        """Initializes the Agent's workflow graph and LLM model.
+
+        Args:
+            description_prompt (str): description of the product.
+            introduction_prompt (str): prompt to use as an introduction of the role of the planner.
+            tags (list[str]): list of important tags.
+            model (str | BaseChatModel, optional): LLM model to use as foundation for agents, its ID or a ready chat model. Defaults to "openai:gpt-4o".
+            metrics (Metrics | None, optional): collector of per-node metrics, shared by the agents of a crawl. Defaults to None.
+            node_models (dict[str, str | BaseChatModel] | None, optional): models overriding `model` in the PLAN node, by node name. Defaults to None.
+        """
+        super().__init__(model, metrics, node_models)
+        self._description_prompt = description_prompt
+        self._introduction_prompt = introduction_prompt
+        self._tags = tags
+        self._prefix = self._build_prefix(description_prompt, introduction_prompt)
+
+    def run(self, count: int) -> list[str]:
+        """Runs the Agent.
+
+        Args:
+            count (int): number of queries to plan.
+
+        Returns:
+            list[str]: at most `count` queries, deduplicated by their normalized form.
+        """
+        response: PlannerAgentState = self._workflow.invoke(
+            {"count": count, "queries": []}, self._config({"recursion_limit": 200})
+        )
+
+        return response["queries"]
+
+    async def arun(self, count: int) -> list[str]:
+        """Runs the Agent asynchronously.
+
+        Args:
+            count (int): number of queries to plan.
+
+        Returns:
+            list[str]: at most `count` queries, deduplicated by their normalized form.
+        """
+        response: PlannerAgentState = await self._workflow.ainvoke(
+            {"count": count, "queries": []}, self._config({"recursion_limit": 200})
+        )
+
+        return response["queries"]
+
+    def _build_workflow(
+        self,
+    ) -> CompiledStateGraph[
+        PlannerAgentState, None, PlannerAgentState, PlannerAgentState
+    ]:
+        """Builds and compiles the workflow.
+
+        Returns:
+            CompiledStateGraph[PlannerAgentState, None, PlannerAgentState, PlannerAgentState]: execution-ready workflow.
+        """
+        workflow_graph = StateGraph(PlannerAgentState)
+
+        workflow_graph.add_node(
+            PlannerAgentNode.PLAN,
+            self._instrument(
+                PlannerAgentNode.PLAN,
+                type(self)._plan,
+                type(self)._aplan,
+            ),
+        )
+
+        workflow_graph.add_edge(START, PlannerAgentNode.PLAN)
+        workflow_graph.add_edge(PlannerAgentNode.PLAN, END)
+
+        workflow = workflow_graph.compile(checkpointer=False)
+
+        return workflow
+
+    def _plan(self, state: PlannerAgentState) -> PlannerAgentState:
+        """Plans the queries.
+
+        Args:
+            state (PlannerAgentState): state of the Agent.
+
+        Returns:
+            PlannerAgentState: update to the state of the Agent.
+        """
+        response: QueryPlan = self._invoke_structured_model(
+            QueryPlan, self._messages(state), PlannerAgentNode.PLAN
+        )
+
+        return {"queries": self._deduplicate(response.queries, state["count"])}
+
+    async def _aplan(self, state: PlannerAgentState) -> PlannerAgentState:
+        """Plans the queries asynchronously.
+
+        Args:
+            state (PlannerAgentState): state of the Agent.
+
+        Returns:
+            PlannerAgentState: update to the state of the Agent.
+        """
+        response: QueryPlan = await self._ainvoke_structured_model(
+            QueryPlan, self._messages(state), PlannerAgentNode.PLAN
+        )
+
+        return {"queries": self._deduplicate(response.queries, state["count"])}
+
+    def _messages(self, state: PlannerAgentState) -> list[AnyMessage]:
+        """Builds the messages of the planning call, with the list of tags.
+
+        Args:
+            state (PlannerAgentState): state of the Agent.
+
+        Returns:
+            list[AnyMessage]: messages.
+        """
+        return self._prefix + [
+            HumanMessage(
+                f"Plan {state['count']} search queries. Tags that might come in handy: {self._tags}"
+            )
+        ]
+
+    @staticmethod
+    def _deduplicate(queries: list[str], count: int) -> list[str]:
+        """Drops blank queries and queries equal to earlier ones up to case, whitespace and word order.
+
+        Args:
+            queries (list[str]): planned queries.
+            count (int): maximum number of queries.
+
+        Returns:
+            list[str]: unique queries.
+        """
+        unique = list(
+            unique_everseen(
+                (query.strip() for query in queries if query.strip()),
+                key=normalize_query,
+            )
+        )
+        if len(unique) < len(queries):
+            logger.info(f"Dropped {len(queries) - len(unique)} duplicate queries.")
+
+        return unique[:count]
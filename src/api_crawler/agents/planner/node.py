@@ -0,0 +1,9 @@
+from enum import Enum
+
+from langgraph.graph import END, START
+
+
+class PlannerAgentNode(str, Enum):
+    PLAN = "PLAN"
+    START = START
+    END = END
@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+
+
+class QueryPlan(BaseModel):
+    """Search queries planned for the whole crawl."""
+
+    queries: list[str] = Field(
+        description="diverse search queries, each covering a different need, problem or phrasing"
+    )
@@ -0,0 +1,8 @@
+from langgraph.graph import MessagesState
+
+
+class PlannerAgentState(MessagesState):
+    """Extended state of the Agent."""
+
+    count: int
+    queries: list[str]
@@ -1,4 +1,4 @@
 from api_crawler.agents.search.node import SearchAgentNode
-from api_crawler.agents.search.state import SearchAgentState
+from api_crawler.agents.search.state import CHECKPOINTED_TYPES, SearchAgentState
 
-__all__ = [SearchAgentNode, SearchAgentState]
+__all__ = [CHECKPOINTED_TYPES, SearchAgentNode, SearchAgentState]
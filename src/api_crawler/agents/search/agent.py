@@ -1,21 +1,59 @@
+import json
 import logging
+import time
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Hashable
 
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.tools import BaseTool, StructuredTool
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
-from langgraph.prebuilt import ToolNode
+from langgraph.types import StateSnapshot
 from more_itertools import unique_everseen
 
 from api_crawler.agents.base_agent import BaseAgent
 from api_crawler.agents.critic.agent import CriticAgent
-from api_crawler.agents.output_structures import Post, PostChoice
+from api_crawler.agents.output_structures import (
+    Post,
+    PostChoice,
+    PostChoiceList,
+    PostCritique,
+    PostHeader,
+)
 from api_crawler.agents.search import SearchAgentNode, SearchAgentState
 from api_crawler.agents.search.output_structures import LoopDecision, PostsToLoad
 from api_crawler.agents.selector.agent import SelectorAgent
 from api_crawler.base_scraper import BaseScraper
+from api_crawler.cache import SeenPostIndex
+from api_crawler.convergence import ConvergenceDetector, IterationYield, is_promising
+from api_crawler.identity import SimhashIndex
+from api_crawler.metrics import Metrics, record_scraper_call
+from api_crawler.normalization import PostNormalizer
+from api_crawler.relevance import RelevanceFilter
+from api_crawler.streaming import CrawlEvent, CrawlEventType, merge_streams
+from api_crawler.tokens import estimate_message_tokens
+
+if TYPE_CHECKING:
+    from langgraph.prebuilt import ToolNode
 
 logger = logging.getLogger(__name__)
 
+SEARCH_STEP = "Search for posts."
+SELECT_STEP = "Pick posts to load."
+DECIDE_LOOP_STEP = "Decide whether to keep searching or summarize."
+SUMMARY_FIELD_CHARS = 160
+DECIDE_LOOP_NODE = "DECIDE_LOOP"
+
 
 class SearchAgent(BaseAgent[SearchAgentState]):
     """AI Agent designed for marketing purposes of React Native Executorch."""
@@ -30,9 +68,20 @@ class SearchAgent(BaseAgent[SearchAgentState]):
         search_prompt: str,
         select_prompt: str,
         decide_loop_prompt: str,
-        model: str = "openai:gpt-4o",
+        model: str | BaseChatModel = "openai:gpt-4o",
         min_iterations: int = 2,
         max_iterations: int = 5,
+        seen_index: SeenPostIndex | None = None,
+        relevance_filter: RelevanceFilter | None = None,
+        history_token_budget: int | None = 8000,
+        duplicate_index: SimhashIndex | None = None,
+        normalizer: PostNormalizer | None = None,
+        metrics: Metrics | None = None,
+        checkpointer: BaseCheckpointSaver | None = None,
+        crawl_id: str = "",
+        convergence: ConvergenceDetector | None = None,
+        llm_loop_decision: bool = True,
+        node_models: dict[str, str | BaseChatModel] | None = None,
     ) -> None:
         """Initializes the Agent's workflow and LLM model.
 
@@ -45,15 +94,25 @@ class SearchAgent(BaseAgent[SearchAgentState]):
             search_prompt (str): prompt used to search for posts.
             select_prompt (str): prompt used to select posts.
             decide_loop_prompt (str): prompt used to decide on loop.
-            model (str, optional): LLM model to use as foundation for agents. Defaults to "openai:gpt-4o".
+            model (str | BaseChatModel, optional): LLM model to use as foundation for agents, its ID or a ready chat model. Defaults to "openai:gpt-4o".
             min_iterations (int, optional): minimum number of iterations. Defaults to 2.
             max_iterations (int, optional): maximum number of iterations. Defaults to 5.
+            seen_index (SeenPostIndex | None, optional): index of posts evaluated in previous crawls, used to skip them. Defaults to None.
+            relevance_filter (RelevanceFilter | None, optional): local scoring stage ranking and pruning search results before the LLM sees them. Defaults to None.
+            history_token_budget (int | None, optional): estimated number of tokens of message history kept between iterations; older iterations are folded into a running summary. Defaults to 8000, None keeps the whole history.
+            duplicate_index (SimhashIndex | None, optional): fingerprints of loaded posts shared by all agents, used to skip near-duplicate posts. Defaults to None.
+            normalizer (PostNormalizer | None, optional): cleanup stage fitting loaded posts into a token budget before they are critiqued. Defaults to None.
+            metrics (Metrics | None, optional): collector of per-node metrics, shared by the agents of a crawl. Defaults to None.
+            checkpointer (BaseCheckpointSaver | None, optional): persistent store of run states, used to resume unfinished runs from their last completed node. Defaults to None.
+            crawl_id (str, optional): ID of the crawl, prefixing the checkpoint thread of every run. Defaults to "".
+            convergence (ConvergenceDetector | None, optional): local stopping policy ending runs whose iterations stopped finding anything new, checked once `min_iterations` is reached. Defaults to None.
+            llm_loop_decision (bool, optional): whether the LLM decides whether to keep searching when the stopping policy doesn't end the run; otherwise the run continues until it converges or reaches `max_iterations`. Defaults to True.
+            node_models (dict[str, str | BaseChatModel] | None, optional): models overriding `model` in the SEARCH, SELECT_POST or DECIDE_LOOP nodes, by node name. Defaults to None.
         """
         assert min_iterations <= max_iterations, (
             "min_iterations must be smaller than max_iterations"
         )
-        super().__init__(model)
-        self._search_tool = scraper.get_searcher()
+        super().__init__(model, metrics, node_models)
         self._scraper = scraper
         self._min_iterations = min_iterations
         self._max_iterations = max_iterations
@@ -64,7 +123,65 @@ class SearchAgent(BaseAgent[SearchAgentState]):
         self._search_prompt = search_prompt
         self._select_prompt = select_prompt
         self._decide_loop_prompt = decide_loop_prompt
-        self._workflow = self._build_workflow()
+        self._seen_index = seen_index
+        self._relevance_filter = relevance_filter
+        self._history_token_budget = history_token_budget
+        self._duplicate_index = duplicate_index
+        self._normalizer = normalizer
+        self._checkpointer = checkpointer
+        self._crawl_id = crawl_id
+        self._convergence = convergence
+        self._llm_loop_decision = llm_loop_decision
+        self._prefix = self._build_prefix(
+            description_prompt,
+            f"When asked to search for posts: {self._tagged_search_prompt()}",
+            f"When asked to pick posts to load: {select_prompt}",
+            *(
+                [
+                    "When asked to decide whether to keep searching or summarize: "
+                    + decide_loop_prompt
+                ]
+                if llm_loop_decision
+                else []
+            ),
+        )
+
+    @cached_property
+    def _search_tool(self) -> BaseTool:
+        """Instrumented search tool of the scraper, created on first use.
+
+        Returns:
+            BaseTool: search tool.
+        """
+        return self._instrument_searcher(self._scraper.get_searcher())
+
+    @cached_property
+    def _tool_model(self) -> Runnable:
+        """Model of the SEARCH node with the search tool bound, created on first use.
+
+        Returns:
+            Runnable: model with the tool.
+        """
+        return self._model_for(SearchAgentNode.SEARCH).bind_tools([self._search_tool])
+
+    @cached_property
+    def _tool_node(self) -> "ToolNode":
+        """Node executing the search tool calls, created on first use.
+
+        Returns:
+            ToolNode: tool node.
+        """
+        from langgraph.prebuilt import ToolNode
+
+        return ToolNode(tools=[self._search_tool])
+
+    def _workflow_key(self) -> Hashable:
+        """Returns the checkpointer the workflow is compiled with.
+
+        Returns:
+            Hashable: checkpointer or None.
+        """
+        return self._checkpointer
 
     def _build_workflow(
         self,
@@ -76,27 +193,30 @@ class SearchAgent(BaseAgent[SearchAgentState]):
         """
         workflow_graph = StateGraph(SearchAgentState)
 
-        workflow_graph.add_node(SearchAgentNode.DESCRIPTION, self._description)
-        workflow_graph.add_node(SearchAgentNode.SEARCH, self._search)
-        workflow_graph.add_node(
-            SearchAgentNode.TOOLS_SEARCHER, ToolNode(tools=[self._search_tool])
-        )
-        workflow_graph.add_node(SearchAgentNode.SELECT_POST, self._select_post)
-        workflow_graph.add_node(SearchAgentNode.LOAD, self._load)
-        workflow_graph.add_node(SearchAgentNode.CRITIQUE, self._critique)
-        workflow_graph.add_node(SearchAgentNode.SUMMARY, self._summarize)
+        agent = type(self)
+        nodes: dict[SearchAgentNode, tuple[Callable, Callable | None]] = {
+            SearchAgentNode.SEARCH: (agent._search, agent._asearch),
+            SearchAgentNode.TOOLS_SEARCHER: (agent._call_tools, agent._acall_tools),
+            SearchAgentNode.FILTER: (agent._filter_results, None),
+            SearchAgentNode.SELECT_POST: (agent._select_post, agent._aselect_post),
+            SearchAgentNode.LOAD: (agent._load, agent._aload),
+            SearchAgentNode.CRITIQUE: (agent._critique, agent._acritique),
+            SearchAgentNode.COMPACT: (agent._compact, None),
+            SearchAgentNode.SUMMARY: (agent._summarize, agent._asummarize),
+        }
+        for node, (func, afunc) in nodes.items():
+            workflow_graph.add_node(node, self._instrument(node, func, afunc))
 
-        workflow_graph.add_edge(START, SearchAgentNode.DESCRIPTION)
-        workflow_graph.add_edge(SearchAgentNode.DESCRIPTION, SearchAgentNode.SEARCH)
+        workflow_graph.add_edge(START, SearchAgentNode.SEARCH)
         workflow_graph.add_edge(SearchAgentNode.SEARCH, SearchAgentNode.TOOLS_SEARCHER)
-        workflow_graph.add_edge(
-            SearchAgentNode.TOOLS_SEARCHER, SearchAgentNode.SELECT_POST
-        )
+        workflow_graph.add_edge(SearchAgentNode.TOOLS_SEARCHER, SearchAgentNode.FILTER)
+        workflow_graph.add_edge(SearchAgentNode.FILTER, SearchAgentNode.SELECT_POST)
         workflow_graph.add_edge(SearchAgentNode.SELECT_POST, SearchAgentNode.LOAD)
         workflow_graph.add_edge(SearchAgentNode.LOAD, SearchAgentNode.CRITIQUE)
+        workflow_graph.add_edge(SearchAgentNode.CRITIQUE, SearchAgentNode.COMPACT)
         workflow_graph.add_conditional_edges(
-            SearchAgentNode.CRITIQUE,
-            self._decide_loop,
+            SearchAgentNode.COMPACT,
+            self._instrument(DECIDE_LOOP_NODE, agent._decide_loop, agent._adecide_loop),
             {
                 SearchAgentNode.SUMMARY: SearchAgentNode.SUMMARY,
                 SearchAgentNode.SEARCH: SearchAgentNode.SEARCH,
@@ -104,15 +224,16 @@ class SearchAgent(BaseAgent[SearchAgentState]):
         )
         workflow_graph.add_edge(SearchAgentNode.SUMMARY, END)
 
-        workflow = workflow_graph.compile()
+        workflow = workflow_graph.compile(checkpointer=self._checkpointer)
 
         return workflow
 
-    def run(self, tries: int = 1) -> list[PostChoice]:
+    def run(self, tries: int = 1, queries: list[str] | None = None) -> list[PostChoice]:
         """Runs the Agent.
 
         Args:
             tries (int, optional): how many times to run the agent. Defaults to 1.
+            queries (list[str] | None, optional): planned queries, split into disjoint slices searched by the runs before they let the LLM come up with queries. Defaults to None.
 
         Returns:
             list[PostChoice]: suitable posts and justifications for their suitability.
@@ -120,7 +241,375 @@ class SearchAgent(BaseAgent[SearchAgentState]):
 
         logger.info(f"Scraping {str(self._scraper)}. Running the Agent.")
 
+        configs = self._configs(tries)
         inputs = [
+            self._resume(
+                input, self._workflow.get_state(config) if self._checkpointer else None
+            )
+            for input, config in zip(self._inputs(tries, queries), configs)
+        ]
+
+        responses: list[SearchAgentState] = self._workflow.batch(
+            inputs, configs, return_exceptions=True
+        )
+
+        return self._aggregate(responses, tries)
+
+    async def arun(
+        self, tries: int = 1, queries: list[str] | None = None
+    ) -> list[PostChoice]:
+        """Runs the Agent asynchronously.
+
+        Args:
+            tries (int, optional): how many times to run the agent. Defaults to 1.
+            queries (list[str] | None, optional): planned queries, split into disjoint slices searched by the runs before they let the LLM come up with queries. Defaults to None.
+
+        Returns:
+            list[PostChoice]: suitable posts and justifications for their suitability.
+        """
+
+        logger.info(f"Scraping {str(self._scraper)}. Running the Agent.")
+
+        configs = self._configs(tries)
+        inputs = [
+            self._resume(
+                input,
+                await self._workflow.aget_state(config) if self._checkpointer else None,
+            )
+            for input, config in zip(self._inputs(tries, queries), configs)
+        ]
+
+        responses: list[SearchAgentState] = await self._workflow.abatch(
+            inputs, configs, return_exceptions=True
+        )
+
+        return self._aggregate(responses, tries)
+
+    async def astream(
+        self, tries: int = 1, queries: list[str] | None = None
+    ) -> AsyncIterator[CrawlEvent | PostChoice]:
+        """Runs the Agent asynchronously, yielding progress events and picked posts as soon as they're available.
+
+        Args:
+            tries (int, optional): how many times to run the agent. Defaults to 1.
+            queries (list[str] | None, optional): planned queries, split into disjoint slices searched by the runs before they let the LLM come up with queries. Defaults to None.
+
+        Yields:
+            CrawlEvent | PostChoice: progress events and picked posts of all runs, in order of arrival.
+        """
+
+        logger.info(f"Scraping {str(self._scraper)}. Streaming the Agent.")
+
+        async for item in merge_streams(
+            [
+                self._astream_run(input, config)
+                for input, config in zip(
+                    self._inputs(tries, queries), self._configs(tries)
+                )
+            ]
+        ):
+            yield item
+
+    async def _astream_run(
+        self, input: SearchAgentState, config: RunnableConfig
+    ) -> AsyncIterator[CrawlEvent | PostChoice]:
+        """Streams a single run of the Agent, resuming it from its checkpoint if there is one.
+
+        Args:
+            input (SearchAgentState): initial state of the run.
+            config (RunnableConfig): config of the run.
+
+        Yields:
+            CrawlEvent | PostChoice: progress events and picked posts.
+        """
+        started: dict[str, dict[str, Any]] = {}
+        snapshot = (
+            await self._workflow.aget_state(config) if self._checkpointer else None
+        )
+
+        if snapshot is not None and snapshot.values and not snapshot.next:
+            for post in snapshot.values["selection"].posts:
+                yield post
+            yield CrawlEvent(
+                type=CrawlEventType.RUN_FINISHED,
+                scraper=str(self._scraper),
+                run_id=input["id"],
+            )
+            return
+
+        try:
+            async for task in self._workflow.astream(
+                self._resume(input, snapshot), config, stream_mode="tasks"
+            ):
+                for item in self._task_to_events(input["id"], task, started):
+                    yield item
+        except Exception as e:
+            logger.warning(
+                f"run ID: {input['id']}. Scraping {str(self._scraper)}. Run failed: {e!r}"
+            )
+            yield CrawlEvent(
+                type=CrawlEventType.RUN_FAILED,
+                scraper=str(self._scraper),
+                run_id=input["id"],
+                error=repr(e),
+            )
+            return
+
+        yield CrawlEvent(
+            type=CrawlEventType.RUN_FINISHED,
+            scraper=str(self._scraper),
+            run_id=input["id"],
+        )
+
+    def _task_to_events(
+        self, run_id: int, task: dict[str, Any], started: dict[str, dict[str, Any]]
+    ) -> list[CrawlEvent | PostChoice]:
+        """Translates a task chunk of the workflow stream into progress events and picked posts.
+
+        Args:
+            run_id (int): ID of the run.
+            task (dict[str, Any]): task start or task result chunk.
+            started (dict[str, dict[str, Any]]): inputs of started tasks by task ID, updated in place.
+
+        Returns:
+            list[CrawlEvent | PostChoice]: events and posts.
+        """
+        scraper = str(self._scraper)
+        node = task["name"]
+
+        if "input" in task:
+            started[task["id"]] = task["input"]
+            return [
+                CrawlEvent(
+                    type=CrawlEventType.NODE_STARTED,
+                    scraper=scraper,
+                    run_id=run_id,
+                    node=node,
+                )
+            ]
+
+        state = started.pop(task["id"], {})
+        result = task.get("result") or {}
+        items: list[CrawlEvent | PostChoice] = [
+            CrawlEvent(
+                type=CrawlEventType.NODE_FINISHED,
+                scraper=scraper,
+                run_id=run_id,
+                node=node,
+            )
+        ]
+
+        if node == SearchAgentNode.LOAD and "loaded_posts" in result:
+            items.append(
+                CrawlEvent(
+                    type=CrawlEventType.POSTS_LOADED,
+                    scraper=scraper,
+                    run_id=run_id,
+                    node=node,
+                    count=len(result["loaded_posts"])
+                    - len(state.get("loaded_posts", [])),
+                )
+            )
+        elif node == SearchAgentNode.CRITIQUE and "post_critiques" in result:
+            items.append(
+                CrawlEvent(
+                    type=CrawlEventType.CRITIQUES_DONE,
+                    scraper=scraper,
+                    run_id=run_id,
+                    node=node,
+                    count=len(result["post_critiques"])
+                    - len(state.get("post_critiques", [])),
+                )
+            )
+        elif node == SearchAgentNode.SUMMARY and result.get("selection"):
+            items.extend(result["selection"].posts)
+
+        return items
+
+    def _run_label(self, state: SearchAgentState) -> str:
+        """Returns the label of the run, used to aggregate metrics per run.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            str: scraper and ID of the run.
+        """
+        return f"{self._scraper}#{state['id']}"
+
+    def _instrument_searcher(self, tool: BaseTool) -> BaseTool:
+        """Wraps the search tool of the scraper, so that the latency and errors of searches are recorded.
+
+        Args:
+            tool (BaseTool): search tool.
+
+        Returns:
+            BaseTool: instrumented search tool.
+        """
+
+        def search(**kwargs: Any) -> Any:
+            """Searches, recording the latency."""
+            started = time.perf_counter()
+            try:
+                result = tool.invoke(kwargs)
+            except Exception:
+                record_scraper_call(time.perf_counter() - started, failed=1)
+                raise
+            record_scraper_call(time.perf_counter() - started)
+
+            return result
+
+        async def asearch(**kwargs: Any) -> Any:
+            """Searches asynchronously, recording the latency."""
+            started = time.perf_counter()
+            try:
+                result = await tool.ainvoke(kwargs)
+            except Exception:
+                record_scraper_call(time.perf_counter() - started, failed=1)
+                raise
+            record_scraper_call(time.perf_counter() - started)
+
+            return result
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            func=search,
+            coroutine=asearch,
+        )
+
+    def finished(self, tries: int = 1) -> bool:
+        """Checks whether all runs have a checkpoint of their final state.
+
+        Args:
+            tries (int, optional): how many times the agent was run. Defaults to 1.
+
+        Returns:
+            bool: True if every run has finished, False if one hasn't or checkpointing is disabled.
+        """
+        if self._checkpointer is None:
+            return False
+
+        return all(
+            self._finished(self._workflow.get_state(config))
+            for config in self._configs(tries)
+        )
+
+    async def afinished(self, tries: int = 1) -> bool:
+        """Checks asynchronously whether all runs have a checkpoint of their final state.
+
+        Args:
+            tries (int, optional): how many times the agent was run. Defaults to 1.
+
+        Returns:
+            bool: True if every run has finished, False if one hasn't or checkpointing is disabled.
+        """
+        if self._checkpointer is None:
+            return False
+
+        for config in self._configs(tries):
+            if not self._finished(await self._workflow.aget_state(config)):
+                return False
+
+        return True
+
+    def delete_checkpoints(self, tries: int = 1) -> None:
+        """Deletes the checkpoints of all runs.
+
+        Args:
+            tries (int, optional): how many times the agent was run. Defaults to 1.
+        """
+        if self._checkpointer is None:
+            return
+
+        for config in self._configs(tries):
+            self._checkpointer.delete_thread(config["configurable"]["thread_id"])
+
+    async def adelete_checkpoints(self, tries: int = 1) -> None:
+        """Deletes the checkpoints of all runs asynchronously.
+
+        Args:
+            tries (int, optional): how many times the agent was run. Defaults to 1.
+        """
+        if self._checkpointer is None:
+            return
+
+        for config in self._configs(tries):
+            await self._checkpointer.adelete_thread(config["configurable"]["thread_id"])
+
+    def _configs(self, tries: int) -> list[RunnableConfig]:
+        """Prepares configs of the runs, with a checkpoint thread per crawl, scraper and run.
+
+        Args:
+            tries (int): how many times to run the agent.
+
+        Returns:
+            list[RunnableConfig]: configs.
+        """
+        return [
+            self._config(
+                {
+                    "recursion_limit": 200,
+                    "configurable": {
+                        "thread_id": f"{self._crawl_id}:{self._scraper}:{id}"
+                    },
+                }
+            )
+            for id in range(tries)
+        ]
+
+    def _resume(
+        self, input: SearchAgentState, snapshot: StateSnapshot | None
+    ) -> SearchAgentState | None:
+        """Decides whether a run starts from scratch or resumes from its last checkpoint.
+
+        Args:
+            input (SearchAgentState): initial state of the run.
+            snapshot (StateSnapshot | None): checkpointed state of the run, if checkpointing is enabled.
+
+        Returns:
+            SearchAgentState | None: initial state, or None to resume from the checkpoint.
+        """
+        if snapshot is None or not snapshot.values:
+            return input
+
+        logger.info(
+            f"run ID: {input['id']}. Scraping {str(self._scraper)}. Resuming the run"
+            + (
+                f" before {', '.join(snapshot.next)}."
+                if snapshot.next
+                else ", which has finished."
+            )
+        )
+
+        return None
+
+    @staticmethod
+    def _finished(snapshot: StateSnapshot) -> bool:
+        """Checks whether the checkpointed run has finished.
+
+        Args:
+            snapshot (StateSnapshot): checkpointed state of the run.
+
+        Returns:
+            bool: True if the run has reached its end.
+        """
+        return bool(snapshot.values) and not snapshot.next
+
+    def _inputs(
+        self, tries: int, queries: list[str] | None = None
+    ) -> list[SearchAgentState]:
+        """Prepares initial states of the runs, dealing the planned queries out to them round-robin.
+
+        Args:
+            tries (int): how many times to run the agent.
+            queries (list[str] | None, optional): planned queries. Defaults to None.
+
+        Returns:
+            list[SearchAgentState]: initial states.
+        """
+        return [
             {
                 "id": id,
                 "iteration": 0,
@@ -128,13 +617,34 @@ class SearchAgent(BaseAgent[SearchAgentState]):
                 "posts_to_load": PostsToLoad(posts=[]),
                 "post_critiques": [],
                 "selection": None,
+                "summary": "",
+                "queries": (queries or [])[id::tries],
+                "found_links": [],
+                "yields": [],
             }
             for id in range(tries)
         ]
 
-        responses: list[SearchAgentState] = self._workflow.batch(
-            inputs, {"recursion_limit": 200}, return_exceptions=True
-        )
+    def _aggregate(
+        self,
+        responses: list[SearchAgentState | Exception],
+        tries: int,
+    ) -> list[PostChoice]:
+        """Merges selections of successful runs, dropping duplicate posts.
+
+        Args:
+            responses (list[SearchAgentState | Exception]): final states of the runs.
+            tries (int): how many times the agent was run.
+
+        Returns:
+            list[PostChoice]: suitable posts and justifications for their suitability.
+        """
+        for response in responses:
+            if isinstance(response, Exception):
+                logger.warning(
+                    f"Scraping {str(self._scraper)}. A run failed: {response!r}"
+                )
+
         responses = [
             response for response in responses if not isinstance(response, Exception)
         ]
@@ -150,19 +660,187 @@ class SearchAgent(BaseAgent[SearchAgentState]):
                     for response in responses
                     for post in response["selection"].posts
                 ),
-                key=lambda choice: choice.post.link,
+                key=lambda choice: self._scraper.get_post_id(choice.post.link),
             ),
         )
 
         return aggregated_result
 
-    def _description(self, _: SearchAgentState) -> SearchAgentState:
-        """Introduces the description as context.
+    def _filter_results(self, state: SearchAgentState) -> SearchAgentState:
+        """Drops search results that have already been evaluated, and ranks the rest by local relevance scoring, pruning irrelevant ones, before the LLM sees them.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
+        if self._seen_index is None and self._relevance_filter is None:
+            return {}
+
+        def transform(results: list[dict[str, Any]]) -> list[dict[str, Any]]:
+            """Filters and ranks a list of search results."""
+            if self._seen_index is not None:
+                results = self._new_results(results)
+            if self._relevance_filter is not None and results:
+                results = self._relevance_filter.filter(results)
+            return results
+
+        messages = []
+
+        for message in reversed(state["messages"]):
+            if not isinstance(message, ToolMessage):
+                break
+
+            content = self._transform_results(str(message.content), transform)
+            if content != message.content:
+                messages.append(message.model_copy(update={"content": content}))
+
+        return {"messages": messages}
+
+    def _compact(self, state: SearchAgentState) -> SearchAgentState:
+        """Keeps the message history under the token budget by folding the oldest iterations into the running summary.
+
+        The latest iteration is always kept whole.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
+        if self._history_token_budget is None:
+            return {}
+
+        iterations = self._split_iterations(state["messages"])
+        tokens = [estimate_message_tokens(iteration) for iteration in iterations]
+        critiques = {
+            post_critique.post.link: post_critique
+            for post_critique in state["post_critiques"]
+        }
+
+        summary = state["summary"]
+        removed: list[AnyMessage] = []
+
+        while len(iterations) > 1 and (
+            estimate_message_tokens([SystemMessage(summary)]) + sum(tokens)
+            > self._history_token_budget
+        ):
+            iteration = iterations.pop(0)
+            tokens.pop(0)
+            summary = "\n".join(
+                line
+                for line in [summary, self._summarize_iteration(iteration, critiques)]
+                if line
+            )
+            removed.extend(iteration)
+
+        if not removed:
+            return {}
+
+        logger.info(
+            f"run ID: {state['id']}. Scraping {str(self._scraper)}. Compacted {len(removed)} messages into the summary."
+        )
+
+        return {
+            "messages": [RemoveMessage(id=message.id) for message in removed],
+            "summary": summary,
+        }
+
+    def _history(self, state: SearchAgentState) -> list[AnyMessage]:
+        """Assembles the messages of an LLM call: the static prefix, the running summary and the recent iterations.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            list[AnyMessage]: messages.
+        """
+        summary = (
+            [SystemMessage(f"Summary of earlier iterations:\n{state['summary']}")]
+            if state["summary"]
+            else []
+        )
+
+        return self._prefix + summary + state["messages"]
+
+    @staticmethod
+    def _split_iterations(messages: list[AnyMessage]) -> list[list[AnyMessage]]:
+        """Splits the message history into search loop iterations.
+
+        Args:
+            messages (list[AnyMessage]): message history.
+
+        Returns:
+            list[list[AnyMessage]]: messages of each iteration.
+        """
+        iterations: list[list[AnyMessage]] = []
+
+        for message in messages:
+            if (
+                isinstance(message, HumanMessage) and message.content == SEARCH_STEP
+            ) or not iterations:
+                iterations.append([])
+            iterations[-1].append(message)
+
+        return iterations
+
+    @staticmethod
+    def _summarize_iteration(
+        iteration: list[AnyMessage], critiques: dict[str, PostCritique]
+    ) -> str:
+        """Summarizes a search loop iteration: the queries it ran and the verdicts on the posts it loaded.
+
+        Args:
+            iteration (list[AnyMessage]): messages of the iteration.
+            critiques (dict[str, PostCritique]): critiques by post link.
 
         Returns:
-            SearchAgentState: update to the state of the Agent
+            str: summary.
         """
-        return {"messages": [SystemMessage(self._description_prompt)]}
+        queries = [
+            json.dumps(tool_call["args"])
+            for message in iteration
+            if isinstance(message, AIMessage)
+            for tool_call in message.tool_calls
+        ]
+        loaded = [
+            header
+            for message in iteration
+            if isinstance(message, AIMessage) and not message.tool_calls
+            for header in SearchAgent._parse_posts_to_load(str(message.content))
+        ]
+
+        lines = [f"Searched with: {', '.join(queries)}."] if queries else []
+
+        for header in loaded:
+            post_critique = critiques.get(header.link)
+            if post_critique is None:
+                continue
+            critique = post_critique.critique
+            lines.append(
+                f"- {header.title} ({header.link}). "
+                f"Upsides: {critique.ad_upsides[:SUMMARY_FIELD_CHARS]} "
+                f"Downsides: {critique.ad_downsides[:SUMMARY_FIELD_CHARS]} "
+                f"Score: {critique.score}/10"
+            )
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def _parse_posts_to_load(content: str) -> list[PostHeader]:
+        """Reads the posts picked to load from a message, if it holds them.
+
+        Args:
+            content (str): message content.
+
+        Returns:
+            list[PostHeader]: picked posts, empty if the message holds something else.
+        """
+        try:
+            return PostsToLoad.model_validate_json(content).posts
+        except ValueError:
+            return []
 
     def _search(self, state: SearchAgentState) -> SearchAgentState:
         """Calls the search tool. Start of the search loop.
@@ -173,21 +851,121 @@ class SearchAgent(BaseAgent[SearchAgentState]):
         Returns:
             SearchAgentState: update to the state of the Agent.
         """
+        planned = self._start_search(state)
+        if planned is not None:
+            return planned
+
+        response = self._invoke_model(
+            self._tool_model,
+            self._step_messages(state, SEARCH_STEP),
+            SearchAgentNode.SEARCH,
+        )
+
+        return self._searched(state, response)
+
+    async def _asearch(self, state: SearchAgentState) -> SearchAgentState:
+        """Calls the search tool asynchronously. Start of the search loop.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
+        planned = self._start_search(state)
+        if planned is not None:
+            return planned
+
+        response = await self._ainvoke_model(
+            self._tool_model,
+            self._step_messages(state, SEARCH_STEP),
+            SearchAgentNode.SEARCH,
+        )
+
+        return self._searched(state, response)
+
+    def _start_search(self, state: SearchAgentState) -> SearchAgentState | None:
+        """Starts the search step, using the next planned query if the run has one left.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            SearchAgentState | None: update to the state of the Agent with the planned search, or None if the LLM has to come up with a query.
+        """
         logger.info(
             f"run ID: {state['id']}. Scraping {str(self._scraper)}. Searching for posts."
         )
-        prompt = (
-            self._search_prompt
-            + """ Tags that might come in handy: """
-            + str(self._tags)
-        )
 
-        response = self._model.bind_tools([self._search_tool]).invoke(
-            state["messages"] + [HumanMessage(prompt)],
+        return self._planned_search(state)
+
+    @staticmethod
+    def _searched(state: SearchAgentState, response: AnyMessage) -> SearchAgentState:
+        """Records the LLM's search tool call.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+            response (AnyMessage): response of the LLM.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
+        return {
+            "messages": [HumanMessage(SEARCH_STEP), response],
+            "iteration": state["iteration"] + 1,
+        }
+
+    def _call_tools(self, state: SearchAgentState) -> SearchAgentState:
+        """Executes the search tool calls.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
+        return self._tool_node.invoke(state)
+
+    async def _acall_tools(self, state: SearchAgentState) -> SearchAgentState:
+        """Executes the search tool calls asynchronously.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
+        return await self._tool_node.ainvoke(state)
+
+    def _planned_search(self, state: SearchAgentState) -> SearchAgentState | None:
+        """Calls the search tool with the next planned query of the run, without asking the LLM.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            SearchAgentState | None: update to the state of the Agent, or None if the run has used up its queries.
+        """
+        if state["iteration"] >= len(state["queries"]):
+            return None
+
+        query = state["queries"][state["iteration"]]
+        logger.info(
+            f"run ID: {state['id']}. Scraping {str(self._scraper)}. Searching with planned query: {query}."
+        )
+        call = AIMessage(
+            "",
+            tool_calls=[
+                {
+                    "name": self._search_tool.name,
+                    "args": {next(iter(self._search_tool.args)): query},
+                    "id": f"planned-{state['id']}-{state['iteration']}",
+                }
+            ],
         )
 
         return {
-            "messages": [HumanMessage(prompt), response],
+            "messages": [HumanMessage(SEARCH_STEP), call],
             "iteration": state["iteration"] + 1,
         }
 
@@ -203,24 +981,68 @@ class SearchAgent(BaseAgent[SearchAgentState]):
         logger.info(
             f"run ID: {state['id']}. Scraping {str(self._scraper)}. Selecting pages to visit."
         )
+        response: PostsToLoad = self._invoke_structured_model(
+            PostsToLoad,
+            self._step_messages(state, SELECT_STEP),
+            SearchAgentNode.SELECT_POST,
+        )
 
-        prompt = self._select_prompt
+        return self._selected(response)
 
-        response: PostsToLoad = self._invoke_structured_model(
+    async def _aselect_post(self, state: SearchAgentState) -> SearchAgentState:
+        """Selects websites to load from search results asynchronously.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
+        logger.info(
+            f"run ID: {state['id']}. Scraping {str(self._scraper)}. Selecting pages to visit."
+        )
+        response: PostsToLoad = await self._ainvoke_structured_model(
             PostsToLoad,
-            state["messages"] + [HumanMessage(prompt)],
+            self._step_messages(state, SELECT_STEP),
+            SearchAgentNode.SELECT_POST,
         )
 
+        return self._selected(response)
+
+    @staticmethod
+    def _selected(response: PostsToLoad) -> SearchAgentState:
+        """Records the posts picked to load.
+
+        Args:
+            response (PostsToLoad): posts picked by the LLM.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
         return {
             "messages": [
-                HumanMessage(prompt),
+                HumanMessage(SELECT_STEP),
                 AIMessage(response.model_dump_json()),
             ],
             "posts_to_load": response,
         }
 
     def _load(self, state: SearchAgentState) -> SearchAgentState:
-        """Loads posts' contents.
+        """Loads posts' contents at once.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
+        posts = self._start_load(state)
+        contents = self._scraper.load_many([post.link for post in posts])
+
+        return self._loaded(state, posts, contents)
+
+    async def _aload(self, state: SearchAgentState) -> SearchAgentState:
+        """Loads posts' contents concurrently.
 
         Args:
             state (SearchAgentState): state of the Agent.
@@ -228,17 +1050,44 @@ class SearchAgent(BaseAgent[SearchAgentState]):
         Returns:
             SearchAgentState: update to the state of the Agent.
         """
+        posts = self._start_load(state)
+        contents = await self._scraper.aload_many([post.link for post in posts])
+
+        return self._loaded(state, posts, contents)
+
+    def _start_load(self, state: SearchAgentState) -> list[PostHeader]:
+        """Starts the load step.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            list[PostHeader]: posts to load.
+        """
         logger.info(
             f"run ID: {state['id']}. Scraping {str(self._scraper)}. Loading posts."
         )
 
-        loaded_posts = [
-            Post(header=post, content=self._scraper.load(post.link))
-            for post in state["posts_to_load"].posts
-        ]
+        return self._to_load(state)
+
+    def _loaded(
+        self,
+        state: SearchAgentState,
+        posts: list[PostHeader],
+        contents: list[str | Exception],
+    ) -> SearchAgentState:
+        """Adds the posts that loaded and are worth critiquing to the state.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+            posts (list[PostHeader]): loaded posts.
+            contents (list[str | Exception]): their contents or load errors.
 
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
         return {
-            "loaded_posts": state["loaded_posts"] + loaded_posts,
+            "loaded_posts": state["loaded_posts"] + self._to_posts(posts, contents),
             "posts_to_load": [],
         }
 
@@ -256,10 +1105,43 @@ class SearchAgent(BaseAgent[SearchAgentState]):
         )
         critiques = self._critic.run(state["loaded_posts"])
 
+        return self._critiqued(state, critiques)
+
+    async def _acritique(self, state: SearchAgentState) -> SearchAgentState:
+        """Calls the Critic for each loaded post asynchronously.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
+        logger.info(
+            f"run ID: {state['id']}. Scraping {str(self._scraper)}. Critiquing post candidates."
+        )
+        critiques = await self._critic.arun(state["loaded_posts"])
+
+        return self._critiqued(state, critiques)
+
+    def _critiqued(
+        self, state: SearchAgentState, critiques: list[PostCritique]
+    ) -> SearchAgentState:
+        """Records the critiques and measures the yield of the iteration.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+            critiques (list[PostCritique]): critiques of the loaded posts.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
+        self._record_critiques(critiques)
+
         return {
             "messages": [AIMessage(str(critiques))],
             "loaded_posts": [],
             "post_critiques": state["post_critiques"] + critiques,
+            **self._measure_yield(state, critiques),
         }
 
     def _summarize(self, state: SearchAgentState) -> SearchAgentState:
@@ -274,9 +1156,39 @@ class SearchAgent(BaseAgent[SearchAgentState]):
         logger.info(
             f"run ID: {state['id']}. Scraping {str(self._scraper)}. Picking the best posts."
         )
-
         response = self._selector.run(state["post_critiques"])
 
+        return self._summarized(state, response)
+
+    async def _asummarize(self, state: SearchAgentState) -> SearchAgentState:
+        """Calls the Selector asynchronously to pick suitable posts and justify this decision.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
+        logger.info(
+            f"run ID: {state['id']}. Scraping {str(self._scraper)}. Picking the best posts."
+        )
+        response = await self._selector.arun(state["post_critiques"])
+
+        return self._summarized(state, response)
+
+    def _summarized(
+        self, state: SearchAgentState, response: PostChoiceList
+    ) -> SearchAgentState:
+        """Records the selection, ending the run.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+            response (PostChoiceList): posts picked by the Selector.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
+        self._record_selection(response.posts)
         logger.info(
             f"run ID: {state['id']}. Scraping {str(self._scraper)}. Run ending."
         )
@@ -289,18 +1201,326 @@ class SearchAgent(BaseAgent[SearchAgentState]):
         Returns:
             Literal[SearchAgentNode]: decision.
         """
+        decision = self._local_loop_decision(state)
+        if decision is not None:
+            return decision
+
+        response: LoopDecision = self._invoke_structured_model(
+            LoopDecision,
+            self._step_messages(state, DECIDE_LOOP_STEP),
+            DECIDE_LOOP_NODE,
+        )
+
+        return response.loop_decision
+
+    async def _adecide_loop(self, state: SearchAgentState) -> SearchAgentNode:
+        """Decides asynchronously whether to start a new search loop or return results.
+
+        Returns:
+            Literal[SearchAgentNode]: decision.
+        """
+        decision = self._local_loop_decision(state)
+        if decision is not None:
+            return decision
+
+        response: LoopDecision = await self._ainvoke_structured_model(
+            LoopDecision,
+            self._step_messages(state, DECIDE_LOOP_STEP),
+            DECIDE_LOOP_NODE,
+        )
+
+        return response.loop_decision
+
+    def _step_messages(self, state: SearchAgentState, step: str) -> list[AnyMessage]:
+        """Builds the messages of an LLM call: the history of the run followed by the step request.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+            step (str): step request.
+
+        Returns:
+            list[AnyMessage]: messages.
+        """
+        return self._history(state) + [HumanMessage(step)]
+
+    def _local_loop_decision(self, state: SearchAgentState) -> SearchAgentNode | None:
+        """Returns the loop decision enforced by the iteration limits or the stopping policy, if any.
 
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            SearchAgentNode | None: decision or None if it's up to the LLM.
+        """
         if state["iteration"] == self._max_iterations:
             return SearchAgentNode.SUMMARY
 
         if state["iteration"] < self._min_iterations:
             return SearchAgentNode.SEARCH
 
-        prompt = self._decide_loop_prompt
+        if self._convergence is not None and self._convergence.converged(
+            state["yields"]
+        ):
+            logger.info(
+                f"run ID: {state['id']}. Scraping {str(self._scraper)}. Search has converged after {state['iteration']} iterations."
+            )
+            return SearchAgentNode.SUMMARY
 
-        response: LoopDecision = self._invoke_structured_model(
-            LoopDecision,
-            state["messages"] + [HumanMessage(prompt)],
+        if not self._llm_loop_decision:
+            return SearchAgentNode.SEARCH
+
+        return None
+
+    def _measure_yield(
+        self, state: SearchAgentState, critiques: list[PostCritique]
+    ) -> SearchAgentState:
+        """Measures what the current iteration found that earlier iterations of the run hadn't.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+            critiques (list[PostCritique]): critiques of the posts loaded in the iteration.
+
+        Returns:
+            SearchAgentState: update to the state of the Agent.
+        """
+        links: list[str] = []
+
+        def collect(results: list[dict[str, Any]]) -> list[dict[str, Any]]:
+            """Collects the links of search results."""
+            links.extend(result["link"] for result in results)
+            return results
+
+        for message in self._split_iterations(state["messages"])[-1]:
+            if isinstance(message, ToolMessage):
+                self._transform_results(str(message.content), collect)
+
+        found = set(state["found_links"])
+        new_links = [
+            post_id
+            for post_id in unique_everseen(map(self._scraper.get_post_id, links))
+            if post_id not in found
+        ]
+        iteration_yield = IterationYield(
+            new_links=len(new_links),
+            new_posts=len(state["loaded_posts"]),
+            promising_critiques=sum(
+                is_promising(post_critique.critique) for post_critique in critiques
+            ),
         )
 
-        return response.loop_decision
+        logger.info(
+            f"run ID: {state['id']}. Scraping {str(self._scraper)}. Iteration yield: {iteration_yield}"
+        )
+
+        return {
+            "found_links": state["found_links"] + new_links,
+            "yields": state["yields"] + [iteration_yield],
+        }
+
+    def _tagged_search_prompt(self) -> str:
+        """Builds the search prompt with the list of tags.
+
+        Returns:
+            str: search prompt.
+        """
+        return (
+            self._search_prompt
+            + """ Tags that might come in handy: """
+            + str(self._tags)
+        )
+
+    def _new_results(self, results: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Keeps search results that haven't been evaluated.
+
+        Args:
+            results (list[dict[str, Any]]): search results.
+
+        Returns:
+            list[dict[str, Any]]: new search results.
+        """
+        seen = self._seen_index.seen(
+            [self._scraper.get_post_id(result["link"]) for result in results]
+        )
+        return [
+            result
+            for result in results
+            if self._scraper.get_post_id(result["link"]) not in seen
+        ]
+
+    def _to_load(self, state: SearchAgentState) -> list[PostHeader]:
+        """Drops posts picked to load that are duplicates of each other or of posts already critiqued in the run, or that have been evaluated in previous crawls.
+
+        Args:
+            state (SearchAgentState): state of the Agent.
+
+        Returns:
+            list[PostHeader]: posts to load.
+        """
+        critiqued = {
+            self._scraper.get_post_id(post_critique.post.link)
+            for post_critique in state["post_critiques"]
+        }
+        posts = [
+            post
+            for post in unique_everseen(
+                state["posts_to_load"].posts,
+                key=lambda post: self._scraper.get_post_id(post.link),
+            )
+            if self._scraper.get_post_id(post.link) not in critiqued
+        ]
+
+        if self._seen_index is None:
+            return posts
+
+        seen = self._seen_index.seen(
+            [self._scraper.get_post_id(post.link) for post in posts]
+        )
+
+        return [
+            post for post in posts if self._scraper.get_post_id(post.link) not in seen
+        ]
+
+    def _normalize(self, posts: list[Post]) -> list[Post]:
+        """Cleans loaded posts and fits them into the token budget.
+
+        Args:
+            posts (list[Post]): loaded posts.
+
+        Returns:
+            list[Post]: normalized posts.
+        """
+        if self._normalizer is None:
+            return posts
+
+        return [
+            post.model_copy(
+                update={"content": self._normalizer.normalize(post.content)}
+            )
+            for post in posts
+        ]
+
+    def _to_posts(
+        self, posts: list[PostHeader], contents: list[str | Exception]
+    ) -> list[Post]:
+        """Turns loaded contents into posts worth critiquing, dropping failed loads and near-duplicates and normalizing the rest.
+
+        Posts that failed to load are never critiqued, so they aren't recorded as evaluated and can be picked again.
+
+        Args:
+            posts (list[PostHeader]): loaded posts.
+            contents (list[str | Exception]): their contents or load errors.
+
+        Returns:
+            list[Post]: posts worth critiquing.
+        """
+        loaded = []
+
+        for post, content in zip(posts, contents):
+            if isinstance(content, Exception):
+                logger.warning(
+                    f"Scraping {str(self._scraper)}. Failed to load {post.link}: {content!r}"
+                )
+            else:
+                loaded.append(Post(header=post, content=content))
+
+        return self._normalize(self._drop_near_duplicates(loaded))
+
+    def _drop_near_duplicates(self, posts: list[Post]) -> list[Post]:
+        """Drops loaded posts whose content is a near-duplicate of a different post loaded earlier by any run, e.g. crossposts.
+
+        Args:
+            posts (list[Post]): loaded posts.
+
+        Returns:
+            list[Post]: posts worth critiquing.
+        """
+        if self._duplicate_index is None:
+            return posts
+
+        unique = []
+
+        for post in posts:
+            post_id = self._scraper.get_post_id(post.header.link)
+            fingerprint = self._scraper.fingerprint(post.content)
+            duplicate_of = (
+                self._duplicate_index.find_or_add(post_id, fingerprint)
+                if fingerprint is not None
+                else post_id
+            )
+
+            if duplicate_of == post_id:
+                unique.append(post)
+            else:
+                logger.info(
+                    f"Scraping {str(self._scraper)}. Skipping {post.header.link}, a near-duplicate of {duplicate_of}."
+                )
+
+        return unique
+
+    def _record_critiques(self, critiques: list[PostCritique]) -> None:
+        """Marks critiqued posts as evaluated.
+
+        Args:
+            critiques (list[PostCritique]): critiques of the posts.
+        """
+        if self._seen_index is None:
+            return
+
+        for critique in critiques:
+            self._seen_index.record(
+                self._scraper.get_post_id(critique.post.link),
+                SeenPostIndex.CRITIQUED,
+                critique.critique.model_dump_json(),
+            )
+
+    def _record_selection(self, choices: list[PostChoice]) -> None:
+        """Marks picked posts as selected.
+
+        Args:
+            choices (list[PostChoice]): picked posts.
+        """
+        if self._seen_index is None:
+            return
+
+        for choice in choices:
+            self._seen_index.record(
+                self._scraper.get_post_id(choice.post.link), SeenPostIndex.SELECTED
+            )
+
+    @staticmethod
+    def _transform_results(
+        content: str,
+        transform: Callable[[list[dict[str, Any]]], list[dict[str, Any]]],
+    ) -> str:
+        """Applies a transformation to JSON search results of the tool, which are either a list or lists grouped by source.
+
+        Args:
+            content (str): tool output.
+            transform (Callable[[list[dict[str, Any]]], list[dict[str, Any]]]): transformation of a list of results.
+
+        Returns:
+            str: transformed tool output, unchanged if it's not JSON search results.
+        """
+        try:
+            results = json.loads(content)
+        except json.JSONDecodeError:
+            return content
+
+        def is_results(group: Any) -> bool:
+            """Checks whether the group is a list of search results."""
+            return isinstance(group, list) and all(
+                isinstance(result, dict) and "link" in result for result in group
+            )
+
+        if is_results(results):
+            results = transform(results)
+        elif isinstance(results, dict) and all(map(is_results, results.values())):
+            results = {
+                source: transformed
+                for source, group in results.items()
+                if (transformed := transform(group))
+            }
+        else:
+            return content
+
+        return json.dumps(results) if results else "No new results."
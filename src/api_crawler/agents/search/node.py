@@ -4,12 +4,13 @@ from langgraph.graph import END, START
 
 
 class SearchAgentNode(str, Enum):
-    DESCRIPTION = "DESCRIPTION"
     SEARCH = "SEARCH"
     TOOLS_SEARCHER = "TOOLS_SEARCHER"
+    FILTER = "FILTER"
     SELECT_POST = "SELECT_POST"
     LOAD = "LOAD"
     CRITIQUE = "CRITIQUE"
+    COMPACT = "COMPACT"
     SUMMARY = "SUMMARY"
     START = START
     END = END
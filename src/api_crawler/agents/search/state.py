@@ -1,10 +1,18 @@
-from langchain.agents import AgentState
+from langgraph.graph import MessagesState
 
-from api_crawler.agents.output_structures import Post, PostChoiceList, PostCritique
+from api_crawler.agents.output_structures import (
+    Critique,
+    Post,
+    PostChoice,
+    PostChoiceList,
+    PostCritique,
+    PostHeader,
+)
 from api_crawler.agents.search.output_structures import PostsToLoad
+from api_crawler.convergence import IterationYield
 
 
-class SearchAgentState(AgentState):
+class SearchAgentState(MessagesState):
     """Extended Agent state."""
 
     id: int
@@ -13,3 +21,19 @@ class SearchAgentState(AgentState):
     loaded_posts: list[Post]
     post_critiques: list[PostCritique]
     selection: PostChoiceList
+    summary: str
+    queries: list[str]
+    found_links: list[str]
+    yields: list[IterationYield]
+
+
+CHECKPOINTED_TYPES = [
+    PostsToLoad,
+    PostHeader,
+    Post,
+    Critique,
+    PostCritique,
+    PostChoice,
+    PostChoiceList,
+    IterationYield,
+]
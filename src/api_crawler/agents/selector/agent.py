@@ -1,10 +1,13 @@
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AnyMessage, HumanMessage
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 
 from api_crawler.agents import BaseAgent
 from api_crawler.agents.output_structures import PostChoiceList, PostCritique
 from api_crawler.agents.selector import SelectorAgentNode, SelectorAgentState
+from api_crawler.identity import post_identity
+from api_crawler.metrics import Metrics
 
 
 class SelectorAgent(BaseAgent[SelectorAgentState]):
@@ -14,22 +17,30 @@ class SelectorAgent(BaseAgent[SelectorAgentState]):
         self,
         description_prompt: str,
         introduction_prompt: str,
-        model: str = "openai:gpt-4o",
+        model: str | BaseChatModel = "openai:gpt-4o",
+        chunk_size: int | None = None,
+        metrics: Metrics | None = None,
+        node_models: dict[str, str | BaseChatModel] | None = None,
     ) -> None:
         """Initializes the Agent's workflow graph and LLM model.
 
         Args:
             description_prompt (str): description of the product.
             introduction_prompt (str): prompt to use as an introduction of the role of the selector.
-            model (str, optional): LLM model to use as foundation for agents. Defaults to "openai:gpt-4o".
+            model (str | BaseChatModel, optional): LLM model to use as foundation for agents, its ID or a ready chat model. Defaults to "openai:gpt-4o".
+            chunk_size (int | None, optional): maximum number of critiques in a single selection call; larger sets are selected from in parallel groups whose winners are then reselected. Defaults to None, meaning a single call.
+            metrics (Metrics | None, optional): collector of per-node metrics, shared by the agents of a crawl. Defaults to None.
+            node_models (dict[str, str | BaseChatModel] | None, optional): models overriding `model` in the SELECTION node, by node name. Defaults to None.
         """
-        super().__init__(model)
+        assert chunk_size is None or chunk_size >= 2, "chunk_size must be at least 2"
+        super().__init__(model, metrics, node_models)
         self._description_prompt = description_prompt
         self._introduction_prompt = introduction_prompt
-        self._workflow = self._build_workflow()
+        self._chunk_size = chunk_size
+        self._prefix = self._build_prefix(description_prompt, introduction_prompt)
 
     def run(self, post_critiques: list[PostCritique]) -> PostChoiceList:
-        """Runs the Agent.
+        """Runs the Agent, selecting in rounds of parallel groups if there are more critiques than fit a chunk.
 
         Args:
             post_critiques (list[PostCritique]): list of posts along with critiques of their suitability.
@@ -37,14 +48,104 @@ class SelectorAgent(BaseAgent[SelectorAgentState]):
         Returns:
             PostChoiceList: list of picked posts.
         """
-        response = self._workflow.invoke(
-            {
-                "post_critiques": post_critiques,
-            },
-            {"recursion_limit": 200},
-        )["selection"]
+        while True:
+            chunks = self._chunks(post_critiques)
+            responses: list[SelectorAgentState] = self._workflow.batch(
+                [{"post_critiques": chunk} for chunk in chunks],
+                self._config({"recursion_limit": 200}),
+            )
+            selection, post_critiques = self._settle(post_critiques, chunks, responses)
+            if selection is not None:
+                return selection
+
+    async def arun(self, post_critiques: list[PostCritique]) -> PostChoiceList:
+        """Runs the Agent asynchronously, selecting in rounds of parallel groups if there are more critiques than fit a chunk.
 
-        return response
+        Args:
+            post_critiques (list[PostCritique]): list of posts along with critiques of their suitability.
+
+        Returns:
+            PostChoiceList: list of picked posts.
+        """
+        while True:
+            chunks = self._chunks(post_critiques)
+            responses: list[SelectorAgentState] = await self._workflow.abatch(
+                [{"post_critiques": chunk} for chunk in chunks],
+                self._config({"recursion_limit": 200}),
+            )
+            selection, post_critiques = self._settle(post_critiques, chunks, responses)
+            if selection is not None:
+                return selection
+
+    def _chunks(self, post_critiques: list[PostCritique]) -> list[list[PostCritique]]:
+        """Splits the critiques into groups of at most `chunk_size`, of similar sizes.
+
+        Args:
+            post_critiques (list[PostCritique]): list of posts along with critiques of their suitability.
+
+        Returns:
+            list[list[PostCritique]]: groups of critiques.
+        """
+        if self._chunk_size is None or len(post_critiques) <= self._chunk_size:
+            return [post_critiques]
+
+        count = -(-len(post_critiques) // self._chunk_size)
+
+        return [post_critiques[i::count] for i in range(count)]
+
+    def _settle(
+        self,
+        post_critiques: list[PostCritique],
+        chunks: list[list[PostCritique]],
+        responses: list[SelectorAgentState],
+    ) -> tuple[PostChoiceList | None, list[PostCritique]]:
+        """Ends the selection after a round, or picks the critiques to reselect from in the next one.
+
+        Args:
+            post_critiques (list[PostCritique]): critiques of the round.
+            chunks (list[list[PostCritique]]): groups of critiques of the round.
+            responses (list[SelectorAgentState]): selection of each group.
+
+        Returns:
+            tuple[PostChoiceList | None, list[PostCritique]]: final selection or None if there's another round, and the critiques of the next round.
+        """
+        if len(chunks) == 1:
+            return responses[0]["selection"], []
+
+        selection, winners = self._reduce(chunks, responses)
+        if not 0 < len(winners) < len(post_critiques):
+            return selection, []
+
+        return None, winners
+
+    @staticmethod
+    def _reduce(
+        chunks: list[list[PostCritique]], responses: list[SelectorAgentState]
+    ) -> tuple[PostChoiceList, list[PostCritique]]:
+        """Merges the selections of a round and finds the critiques of the selected posts.
+
+        Args:
+            chunks (list[list[PostCritique]]): groups of critiques of the round.
+            responses (list[SelectorAgentState]): selection of each group.
+
+        Returns:
+            tuple[PostChoiceList, list[PostCritique]]: all selected posts and their critiques, to reselect from.
+        """
+        choices = []
+        winners = []
+
+        for chunk, response in zip(chunks, responses):
+            by_link = {
+                post_identity(post_critique.post.link): post_critique
+                for post_critique in chunk
+            }
+            for choice in response["selection"].posts:
+                post_critique = by_link.pop(post_identity(choice.post.link), None)
+                if post_critique is not None:
+                    choices.append(choice)
+                    winners.append(post_critique)
+
+        return PostChoiceList(posts=choices), winners
 
     def _build_workflow(
         self,
@@ -58,41 +159,39 @@ class SelectorAgent(BaseAgent[SelectorAgentState]):
         """
         workflow_graph = StateGraph(SelectorAgentState)
 
-        workflow_graph.add_node(SelectorAgentNode.DESCRIPTION, self._description)
-        workflow_graph.add_node(SelectorAgentNode.INTRODUCTION, self._introduce)
-        workflow_graph.add_node(SelectorAgentNode.SELECTION, self._select)
-
-        workflow_graph.add_edge(START, SelectorAgentNode.DESCRIPTION)
-        workflow_graph.add_edge(
-            SelectorAgentNode.DESCRIPTION, SelectorAgentNode.INTRODUCTION
-        )
-        workflow_graph.add_edge(
-            SelectorAgentNode.INTRODUCTION, SelectorAgentNode.SELECTION
+        workflow_graph.add_node(
+            SelectorAgentNode.SELECTION,
+            self._instrument(
+                SelectorAgentNode.SELECTION,
+                type(self)._select,
+                type(self)._aselect,
+            ),
         )
+
+        workflow_graph.add_edge(START, SelectorAgentNode.SELECTION)
         workflow_graph.add_edge(SelectorAgentNode.SELECTION, END)
 
-        workflow = workflow_graph.compile()
+        workflow = workflow_graph.compile(checkpointer=False)
 
         return workflow
 
-    def _description(self, _: SelectorAgentState) -> SelectorAgentState:
-        """Introduces the description as context.
-
-        Returns:
-            SelectorAgentState: update to the state of the Agent.
-        """
-        return {"messages": [SystemMessage(self._description_prompt)]}
+    def _select(self, state: SelectorAgentState) -> SelectorAgentState:
+        """Selects the best posts.
 
-    def _introduce(self, _: SelectorAgentState) -> SelectorAgentState:
-        """Introduces the LLM to its task.
+        Args:
+            state (SelectorAgentState): state of the Agent.
 
         Returns:
             SelectorAgentState: update to the state of the Agent.
         """
-        return {"messages": [SystemMessage(self._introduction_prompt)]}
+        response: PostChoiceList = self._invoke_structured_model(
+            PostChoiceList, self._messages(state), SelectorAgentNode.SELECTION
+        )
 
-    def _select(self, state: SelectorAgentState) -> SelectorAgentState:
-        """Selects the best posts.
+        return {"selection": response}
+
+    async def _aselect(self, state: SelectorAgentState) -> SelectorAgentState:
+        """Selects the best posts asynchronously.
 
         Args:
             state (SelectorAgentState): state of the Agent.
@@ -100,9 +199,19 @@ class SelectorAgent(BaseAgent[SelectorAgentState]):
         Returns:
             SelectorAgentState: update to the state of the Agent.
         """
-        response: PostChoiceList = self._invoke_structured_model(
-            PostChoiceList,
-            state["messages"] + [HumanMessage(str(state["post_critiques"]))],
+        response: PostChoiceList = await self._ainvoke_structured_model(
+            PostChoiceList, self._messages(state), SelectorAgentNode.SELECTION
         )
 
         return {"selection": response}
+
+    def _messages(self, state: SelectorAgentState) -> list[AnyMessage]:
+        """Builds the messages of the selection call.
+
+        Args:
+            state (SelectorAgentState): state of the Agent.
+
+        Returns:
+            list[AnyMessage]: messages.
+        """
+        return self._prefix + [HumanMessage(str(state["post_critiques"]))]
@@ -1,9 +1,9 @@
-from langchain.agents import AgentState
+from langgraph.graph import MessagesState
 
 from api_crawler.agents.output_structures import PostChoiceList, PostCritique
 
 
-class SelectorAgentState(AgentState):
+class SelectorAgentState(MessagesState):
     """Extended state of the Agent."""
 
     post_critiques: list[PostCritique]
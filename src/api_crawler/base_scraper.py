@@ -1,24 +1,42 @@
+import asyncio
 import datetime
+import threading
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Self
 
-from langchain.tools import BaseTool
+from api_crawler.cache import SQLiteCache
+from api_crawler.identity import post_identity, simhash
+from api_crawler.metrics import record_scraper_call
+
+if TYPE_CHECKING:
+    from langchain_core.tools import BaseTool
+
+_legacy_loads = threading.local()
 
 
 class BaseScraper(ABC):
     """Abstract class for web scrapers adjusted to different APIs."""
 
+    MAX_LOAD_WORKERS = 8
+
     def __init__(
-        self, timescope: datetime.timedelta = datetime.timedelta(days=1)
+        self,
+        timescope: datetime.timedelta = datetime.timedelta(days=1),
+        cache: SQLiteCache | None = None,
     ) -> None:
-        """Initializes timescope.
+        """Initializes timescope and the post cache.
 
         Args:
             timescope (datetime.timedelta, optional): how old are the posts we wish to see. Defaults to datetime.timedelta(days=1).
+            cache (SQLiteCache | None, optional): cache of loaded posts, keyed by post ID. Defaults to None.
         """
         self._timescope = timescope
+        self._cache = cache
 
     @abstractmethod
-    def get_searcher(self) -> BaseTool:
+    def get_searcher(self) -> "BaseTool":
         """Creates a tool for searching posts on the website.
 
         Returns:
@@ -26,17 +44,205 @@ class BaseScraper(ABC):
         """
         pass
 
-    @abstractmethod
     def load(self, url: str) -> str:
-        """Loads posts found with search.
+        """Loads posts found with search, serving them from the cache if possible.
 
         Args:
             url (str): url of the post to load.
 
+        Raises:
+            Exception: if the post can't be loaded.
+
         Returns:
             str: loaded post.
         """
-        pass
+        content = self.load_many([url])[0]
+        if isinstance(content, Exception):
+            raise content
+        return content
+
+    async def aload(self, url: str) -> str:
+        """Loads posts found with search asynchronously.
+
+        By default, runs `load` in a worker thread, so the event loop isn't blocked.
+
+        Args:
+            url (str): url of the post to load.
+
+        Returns:
+            str: loaded post.
+        """
+        return await asyncio.to_thread(self.load, url)
+
+    def load_many(self, urls: list[str]) -> list[str | Exception]:
+        """Loads several posts at once, serving them from the cache if possible.
+
+        Posts that fail to load are returned as their errors, which aren't cached.
+
+        Args:
+            urls (list[str]): urls of the posts to load.
+
+        Returns:
+            list[str | Exception]: loaded posts or errors, in the order of the urls.
+        """
+        post_ids = [self.get_post_id(url) for url in urls]
+        contents: dict[str, str | Exception] = {}
+
+        if self._cache is not None:
+            for post_id in dict.fromkeys(post_ids):
+                cached = self._cache.get(self._cache_key(post_id))
+                if cached is not None:
+                    contents[post_id] = cached
+
+        to_load = {
+            post_id: url
+            for post_id, url in zip(post_ids, urls)
+            if post_id not in contents
+        }
+
+        if to_load:
+            started = time.perf_counter()
+            loaded = self._load_many(list(to_load.values()))
+            record_scraper_call(
+                time.perf_counter() - started,
+                calls=len(loaded),
+                failed=sum(isinstance(content, Exception) for content in loaded),
+            )
+
+            for post_id, content in zip(to_load, loaded):
+                contents[post_id] = content
+                if self._cache is not None and not isinstance(content, Exception):
+                    self._cache.set(self._cache_key(post_id), content)
+
+        return [contents[post_id] for post_id in post_ids]
+
+    async def aload_many(self, urls: list[str]) -> list[str | Exception]:
+        """Loads several posts at once asynchronously.
+
+        By default, runs `load_many` in a worker thread, so the event loop isn't blocked.
+
+        Args:
+            urls (list[str]): urls of the posts to load.
+
+        Returns:
+            list[str | Exception]: loaded posts or errors, in the order of the urls.
+        """
+        return await asyncio.to_thread(self.load_many, urls)
+
+    def get_post_id(self, url: str) -> str:
+        """Returns the canonical ID of the post, used as the cache key and to deduplicate posts.
+
+        Args:
+            url (str): url of the post.
+
+        Returns:
+            str: post ID.
+        """
+        return post_identity(url)
+
+    def fingerprint(self, content: str) -> int | None:
+        """Returns the SimHash fingerprint of a loaded post, used to detect near-duplicate posts.
+
+        Scrapers should fingerprint only the part of the content that is the same for crossposts.
+
+        Args:
+            content (str): loaded post.
+
+        Returns:
+            int | None: fingerprint or None if the post is too short to fingerprint.
+        """
+        return simhash(content)
+
+    def _load(self, url: str) -> str:
+        """Loads the post from the website, bypassing the cache.
+
+        Scrapers implement this method. Scrapers overriding `load` instead, as required before the cache was added,
+        keep working: their `load` is called here, so `load_many` still caches its results. Such a `load` must not call
+        `BaseScraper.load`, which would call it back.
+
+        Args:
+            url (str): url of the post to load.
+
+        Raises:
+            NotImplementedError: if the scraper overrides neither `_load` nor `load`, or its `load` calls `BaseScraper.load`.
+            Exception: if the post can't be loaded.
+
+        Returns:
+            str: loaded post.
+        """
+        if type(self).load is BaseScraper.load:
+            raise NotImplementedError(
+                f"{type(self).__name__} must implement _load (or load)."
+            )
+
+        active = _legacy_loads.__dict__.setdefault("active", set())
+        key = (id(self), url)
+        if key in active:
+            raise NotImplementedError(
+                f"{type(self).__name__}.load calls BaseScraper.load, which calls it back; implement _load instead."
+            )
+
+        active.add(key)
+        try:
+            return self.load(url)
+        finally:
+            active.discard(key)
+
+    def _cache_key(self, post_id: str) -> str:
+        """Returns the key of the post in the cache, so that scrapers rendering posts differently don't share entries.
+
+        Args:
+            post_id (str): canonical ID of the post.
+
+        Returns:
+            str: cache key.
+        """
+        variant = self._cache_variant()
+
+        return f"{post_id}:{variant}" if variant else post_id
+
+    def _cache_variant(self) -> str:
+        """Describes the settings of the scraper that affect the content of loaded posts, e.g. the number of comments.
+
+        By default, posts don't depend on any settings.
+
+        Returns:
+            str: settings or an empty string.
+        """
+        return ""
+
+    def _load_many(self, urls: list[str]) -> list[str | Exception]:
+        """Loads several posts from the website, bypassing the cache.
+
+        By default, calls `_load` concurrently in worker threads; scrapers can override it to use batched endpoints.
+
+        Args:
+            urls (list[str]): urls of the posts to load.
+
+        Returns:
+            list[str | Exception]: loaded posts or errors, in the order of the urls.
+        """
+        if len(urls) == 1:
+            return [self._try_load(urls[0])]
+
+        with ThreadPoolExecutor(
+            max_workers=min(len(urls), self.MAX_LOAD_WORKERS)
+        ) as pool:
+            return list(pool.map(self._try_load, urls))
+
+    def _try_load(self, url: str) -> str | Exception:
+        """Loads a post from the website, returning the error instead of raising it.
+
+        Args:
+            url (str): url of the post to load.
+
+        Returns:
+            str | Exception: loaded post or error.
+        """
+        try:
+            return self._load(url)
+        except Exception as e:
+            return e
 
     @abstractmethod
     def __str__(self) -> str:
@@ -47,6 +253,20 @@ class BaseScraper(ABC):
         """
         pass
 
+    @classmethod
+    def combine(cls, scrapers: list[Self]) -> list["BaseScraper"]:
+        """Merges scrapers of this type into fewer scrapers covering the same sources, e.g. to search them with one request.
+
+        By default, scrapers aren't merged.
+
+        Args:
+            scrapers (list[Self]): scrapers to merge.
+
+        Returns:
+            list[BaseScraper]: merged scrapers.
+        """
+        return scrapers
+
     def _get_timestamp(self) -> int:
         """Returns the timestamp for checking whether the loaded posts are not too old for our timescope.
 
@@ -0,0 +1,32 @@
+from typing import Any
+
+from api_crawler.cache.seen_index import SeenPost, SeenPostIndex
+from api_crawler.cache.sqlite_cache import CacheStats, SQLiteCache
+
+__all__ = [
+    "CacheStats",
+    "SQLiteCache",
+    "SQLiteCheckpointer",
+    "SeenPost",
+    "SeenPostIndex",
+]
+
+
+def __getattr__(name: str) -> Any:
+    """Imports the checkpointer on first access, so LangGraph's SQLite saver is only loaded when checkpointing.
+
+    Args:
+        name (str): name of the attribute.
+
+    Raises:
+        AttributeError: if the module has no such attribute.
+
+    Returns:
+        Any: attribute.
+    """
+    if name == "SQLiteCheckpointer":
+        from api_crawler.cache.checkpointer import SQLiteCheckpointer
+
+        return SQLiteCheckpointer
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
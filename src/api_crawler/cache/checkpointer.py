@@ -0,0 +1,121 @@
+import asyncio
+import sqlite3
+from typing import Any, AsyncIterator, Iterable, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+
+class SQLiteCheckpointer(SqliteSaver):
+    """LangGraph checkpointer persisted in a SQLite file, usable by both synchronous and asynchronous workflows.
+
+    The asynchronous methods run the synchronous ones in worker threads, so a single checkpointer can back `run`,
+    `arun` and `astream` alike.
+    """
+
+    def __init__(
+        self, path: str = "checkpoints.sqlite3", types: Iterable[type] = ()
+    ) -> None:
+        """Opens (or creates) the checkpoint database.
+
+        Args:
+            path (str, optional): path to the SQLite file. Defaults to "checkpoints.sqlite3".
+            types (Iterable[type], optional): classes stored in the checkpointed states, allowed to be deserialized. Defaults to ().
+        """
+        connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            connection.execute("PRAGMA journal_mode=WAL")
+
+        super().__init__(
+            connection, serde=JsonPlusSerializer(allowed_msgpack_modules=list(types))
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Gets a checkpoint tuple from the database asynchronously.
+
+        Args:
+            config (RunnableConfig): config of the thread and, optionally, the checkpoint.
+
+        Returns:
+            CheckpointTuple | None: checkpoint or None if there is none.
+        """
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Lists checkpoints from the database asynchronously.
+
+        Args:
+            config (RunnableConfig | None): config of the thread.
+            filter (dict[str, Any] | None, optional): metadata the checkpoints must match. Defaults to None.
+            before (RunnableConfig | None, optional): config of the checkpoint to list checkpoints before. Defaults to None.
+            limit (int | None, optional): maximum number of checkpoints. Defaults to None.
+
+        Yields:
+            CheckpointTuple: checkpoints, newest first.
+        """
+        checkpoints = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Saves a checkpoint to the database asynchronously.
+
+        Args:
+            config (RunnableConfig): config of the thread.
+            checkpoint (Checkpoint): checkpoint to save.
+            metadata (CheckpointMetadata): metadata of the checkpoint.
+            new_versions (ChannelVersions): new channel versions.
+
+        Returns:
+            RunnableConfig: config of the saved checkpoint.
+        """
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Saves intermediate writes of a task to the database asynchronously.
+
+        Args:
+            config (RunnableConfig): config of the checkpoint.
+            writes (Sequence[tuple[str, Any]]): writes to save.
+            task_id (str): ID of the task.
+            task_path (str, optional): path of the task. Defaults to "".
+        """
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Deletes all checkpoints of a thread asynchronously.
+
+        Args:
+            thread_id (str): ID of the thread.
+        """
+        await asyncio.to_thread(self.delete_thread, thread_id)
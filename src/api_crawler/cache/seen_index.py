@@ -0,0 +1,102 @@
+import sqlite3
+import threading
+import time
+
+from pydantic import BaseModel, Field
+
+
+class SeenPost(BaseModel):
+    """Post that has already been evaluated."""
+
+    post_id: str = Field(description="canonical ID of the post")
+    verdict: str = Field(description="outcome of the evaluation")
+    critique: str | None = Field(description="JSON of the critique, if any")
+    evaluated_at: float = Field(description="timestamp of the evaluation")
+
+
+class SeenPostIndex:
+    """Persistent index of evaluated posts, used for incremental crawling."""
+
+    CRITIQUED = "critiqued"
+    SELECTED = "selected"
+
+    def __init__(self, path: str = ":memory:") -> None:
+        """Opens (or creates) the index database.
+
+        Args:
+            path (str, optional): path to the SQLite file. Defaults to ":memory:", which keeps the index in-process only.
+        """
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS seen_posts (
+                post_id TEXT PRIMARY KEY,
+                verdict TEXT NOT NULL,
+                critique TEXT,
+                evaluated_at REAL NOT NULL
+            )"""
+        )
+
+    def seen(self, post_ids: list[str]) -> set[str]:
+        """Returns which of the posts have already been evaluated.
+
+        Args:
+            post_ids (list[str]): canonical IDs of the posts.
+
+        Returns:
+            set[str]: IDs of evaluated posts.
+        """
+        if not post_ids:
+            return set()
+
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT post_id FROM seen_posts WHERE post_id IN ({', '.join('?' * len(post_ids))})",
+                post_ids,
+            ).fetchall()
+
+        return {post_id for (post_id,) in rows}
+
+    def get(self, post_id: str) -> SeenPost | None:
+        """Returns the evaluation of the post.
+
+        Args:
+            post_id (str): canonical ID of the post.
+
+        Returns:
+            SeenPost | None: evaluation or None if the post hasn't been evaluated.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT post_id, verdict, critique, evaluated_at FROM seen_posts WHERE post_id = ?",
+                (post_id,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return SeenPost(
+            post_id=row[0], verdict=row[1], critique=row[2], evaluated_at=row[3]
+        )
+
+    def record(self, post_id: str, verdict: str, critique: str | None = None) -> None:
+        """Records the evaluation of the post, keeping the earlier critique if none is given.
+
+        Args:
+            post_id (str): canonical ID of the post.
+            verdict (str): outcome of the evaluation, e.g. `SeenPostIndex.CRITIQUED`.
+            critique (str | None, optional): JSON of the critique. Defaults to None.
+        """
+        with self._lock:
+            self._connection.execute(
+                """INSERT INTO seen_posts VALUES (?, ?, ?, ?)
+                ON CONFLICT (post_id) DO UPDATE SET
+                    verdict = excluded.verdict,
+                    critique = COALESCE(excluded.critique, seen_posts.critique),
+                    evaluated_at = excluded.evaluated_at""",
+                (post_id, verdict, critique, time.time()),
+            )
@@ -0,0 +1,209 @@
+import datetime
+import logging
+import sqlite3
+import threading
+import time
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStats(BaseModel):
+    """Counters describing cache effectiveness."""
+
+    hits: int = Field(description="number of lookups served from the cache")
+    misses: int = Field(description="number of lookups not found in the cache")
+    entries: int = Field(description="number of stored entries")
+    size_bytes: int = Field(description="total size of stored values in bytes")
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache.
+
+        Returns:
+            float: hit rate, 0 if there were no lookups.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SQLiteCache:
+    """Thread-safe key-value cache persisted in a SQLite file, with TTL and size-based LRU eviction."""
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        namespace: str = "default",
+        ttl: datetime.timedelta | None = None,
+        max_size_bytes: int | None = None,
+    ) -> None:
+        """Opens (or creates) the cache database.
+
+        Args:
+            path (str, optional): path to the SQLite file. Defaults to ":memory:", which keeps the cache in-process only.
+            namespace (str, optional): name separating independent caches stored in the same file. Defaults to "default".
+            ttl (datetime.timedelta | None, optional): how long entries stay valid. Defaults to None, meaning forever.
+            max_size_bytes (int | None, optional): total size of values above which least recently used entries are evicted. Defaults to None, meaning no limit.
+        """
+        self._namespace = namespace
+        self._ttl = ttl
+        self._max_size_bytes = max_size_bytes
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS entries_lru ON entries (namespace, accessed_at)"
+        )
+
+    def get(self, key: str) -> str | None:
+        """Returns the cached value, if present and not expired.
+
+        Args:
+            key (str): key of the entry.
+
+        Returns:
+            str | None: cached value or None on a miss.
+        """
+        now = time.time()
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, created_at FROM entries WHERE namespace = ? AND key = ?",
+                (self._namespace, key),
+            ).fetchone()
+
+            if row is not None and self._is_expired(row[1], now):
+                self._connection.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                    (self._namespace, key),
+                )
+                row = None
+
+            if row is None:
+                self._misses += 1
+                return None
+
+            self._connection.execute(
+                "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self._namespace, key),
+            )
+            self._hits += 1
+
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """Stores the value, evicting least recently used entries if the size limit is exceeded.
+
+        Args:
+            key (str): key of the entry.
+            value (str): value to store.
+        """
+        now = time.time()
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (self._namespace, key, value, now, now, len(value.encode())),
+            )
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        """Removes the entry, if present.
+
+        Args:
+            key (str): key of the entry.
+        """
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                (self._namespace, key),
+            )
+
+    def clear(self) -> None:
+        """Removes all entries of the namespace."""
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM entries WHERE namespace = ?", (self._namespace,)
+            )
+
+    def stats(self) -> CacheStats:
+        """Returns hit/miss counters and the current size of the cache.
+
+        Returns:
+            CacheStats: cache statistics.
+        """
+        with self._lock:
+            entries, size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?",
+                (self._namespace,),
+            ).fetchone()
+
+            return CacheStats(
+                hits=self._hits, misses=self._misses, entries=entries, size_bytes=size
+            )
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        """Checks whether an entry outlived the TTL.
+
+        Args:
+            created_at (float): timestamp of the entry creation.
+            now (float): current timestamp.
+
+        Returns:
+            bool: whether the entry is expired.
+        """
+        return self._ttl is not None and now - created_at > self._ttl.total_seconds()
+
+    def _evict(self) -> None:
+        """Drops expired entries and then least recently used ones until the size limit is met. Must be called with the lock held."""
+        if self._ttl is not None:
+            self._connection.execute(
+                "DELETE FROM entries WHERE namespace = ? AND created_at < ?",
+                (self._namespace, time.time() - self._ttl.total_seconds()),
+            )
+
+        if self._max_size_bytes is None:
+            return
+
+        (size,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?",
+            (self._namespace,),
+        ).fetchone()
+
+        if size <= self._max_size_bytes:
+            return
+
+        rows = self._connection.execute(
+            "SELECT key, size FROM entries WHERE namespace = ? ORDER BY accessed_at",
+            (self._namespace,),
+        ).fetchall()
+
+        evicted = []
+        for key, entry_size in rows:
+            if size <= self._max_size_bytes:
+                break
+            evicted.append((self._namespace, key))
+            size -= entry_size
+
+        self._connection.executemany(
+            "DELETE FROM entries WHERE namespace = ? AND key = ?", evicted
+        )
+        logger.info(f"Evicted {len(evicted)} entries from {self._namespace} cache.")
@@ -0,0 +1,89 @@
+from pydantic import BaseModel, Field
+
+from api_crawler.agents.output_structures import Critique
+
+PROMISING_SCORE = 6
+
+
+class IterationYield(BaseModel):
+    """What a search loop iteration found that earlier iterations of the run hadn't."""
+
+    new_links: int = Field(description="number of new unique search results")
+    new_posts: int = Field(description="number of new posts loaded and critiqued")
+    promising_critiques: int = Field(
+        description="number of new critiques whose upsides outweigh the downsides"
+    )
+
+
+def is_promising(critique: Critique) -> bool:
+    """Checks whether the upsides of the post outweigh its downsides.
+
+    Args:
+        critique (Critique): critique of the post.
+
+    Returns:
+        bool: whether the post is promising.
+    """
+    return critique.score >= PROMISING_SCORE
+
+
+class ConvergenceDetector:
+    """Local stopping policy of the search loop, based on the marginal yield of its iterations.
+
+    The yield of an iteration is a weighted sum of the new links it found, the new posts it loaded and the promising
+    critiques it got. A run has converged once its last iterations all yielded less than the threshold.
+    """
+
+    def __init__(
+        self,
+        min_yield: float = 1.0,
+        patience: int = 1,
+        link_weight: float = 0.1,
+        post_weight: float = 0.25,
+        critique_weight: float = 1.0,
+    ) -> None:
+        """Initializes the policy.
+
+        Args:
+            min_yield (float, optional): yield below which an iteration is considered fruitless. Defaults to 1.0, meaning e.g. one promising critique or ten new links.
+            patience (int, optional): number of consecutive fruitless iterations after which the run stops. Defaults to 1.
+            link_weight (float, optional): weight of a new search result. Defaults to 0.1.
+            post_weight (float, optional): weight of a new loaded post. Defaults to 0.25.
+            critique_weight (float, optional): weight of a promising critique. Defaults to 1.0.
+        """
+        assert patience >= 1, "patience must be at least 1"
+        self._min_yield = min_yield
+        self._patience = patience
+        self._link_weight = link_weight
+        self._post_weight = post_weight
+        self._critique_weight = critique_weight
+
+    def score(self, iteration_yield: IterationYield) -> float:
+        """Weighs the yield of an iteration.
+
+        Args:
+            iteration_yield (IterationYield): yield of the iteration.
+
+        Returns:
+            float: weighted yield.
+        """
+        return (
+            self._link_weight * iteration_yield.new_links
+            + self._post_weight * iteration_yield.new_posts
+            + self._critique_weight * iteration_yield.promising_critiques
+        )
+
+    def converged(self, yields: list[IterationYield]) -> bool:
+        """Checks whether the run has stopped finding anything new.
+
+        Args:
+            yields (list[IterationYield]): yields of the iterations of the run so far.
+
+        Returns:
+            bool: whether the last `patience` iterations all yielded less than the threshold.
+        """
+        recent = yields[-self._patience :]
+
+        return len(recent) == self._patience and all(
+            self.score(iteration_yield) < self._min_yield for iteration_yield in recent
+        )
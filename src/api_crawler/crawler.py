@@ -1,10 +1,33 @@
+import asyncio
 import logging
+import uuid
 from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
+from typing import AsyncIterator, Iterator
 
-from api_crawler.agents import CriticAgent, SearchAgent, SelectorAgent
+from langchain_core.language_models import BaseChatModel
+from more_itertools import unique_everseen
+
+from api_crawler.agents import (
+    BaseAgent,
+    CriticAgent,
+    PlannerAgent,
+    SearchAgent,
+    SelectorAgent,
+)
 from api_crawler.agents.output_structures import PostChoice
+from api_crawler.agents.search import CHECKPOINTED_TYPES
 from api_crawler.base_scraper import BaseScraper
+from api_crawler.cache import SeenPostIndex, SQLiteCache
+from api_crawler.convergence import ConvergenceDetector
+from api_crawler.identity import SimhashIndex, post_identity
+from api_crawler.metrics import Metrics
+from api_crawler.models import model_id
+from api_crawler.normalization import PostNormalizer
+from api_crawler.rate_limiter import configure_rate_limiter
+from api_crawler.relevance import RelevanceFilter
+from api_crawler.streaming import CrawlEvent, iterate_in_thread, merge_streams
+from api_crawler.usage import TokenUsage
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +37,7 @@ class Crawler:
 
     def __init__(
         self,
-        model: str,
+        model: str | BaseChatModel,
         iterations: int,
         agent_min_iterations: int,
         agent_max_iterations: int,
@@ -26,11 +49,32 @@ class Crawler:
         selector_introduction_prompt: str,
         tags: list[str],
         scrapers: list[BaseScraper],
+        critique_cache: SQLiteCache | None = None,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+        fan_in: bool = False,
+        seen_index: SeenPostIndex | None = None,
+        prefilter: bool = False,
+        prefilter_threshold: float | None = 0.0,
+        history_token_budget: int | None = 8000,
+        critique_batch_token_budget: int | None = None,
+        selection_chunk_size: int | None = None,
+        near_duplicate_distance: int | None = 3,
+        normalize_posts: bool = False,
+        post_token_budget: int | None = 1500,
+        checkpoint_path: str | None = None,
+        crawl_id: str | None = None,
+        min_iteration_yield: float | None = None,
+        llm_loop_decision: bool = True,
+        planner_introduction_prompt: str | None = None,
+        models: dict[str, str | BaseChatModel] | None = None,
+        critic_screening_model: str | BaseChatModel | None = None,
+        critic_escalation_score: int = 4,
     ) -> None:
         """Initializes the list of agents.
 
         Args:
-            model (str): ID of the foundation model.
+            model (str | BaseChatModel): ID of the foundation model or a ready chat model.
             iterations (int): number of runs for each agent.
             agent_min_iterations (int): min. number of iterations in an agent loop.
             agent_max_iterations (int): max. number of iterations in an agent loop.
@@ -42,18 +86,109 @@ class Crawler:
             selector_introduction_prompt (str): prompt introducing the role of the selector.
             tags (list[str]): list of useful tags.
             scrapers (list[BaseScraper]): list of scrapers to use.
+            critique_cache (SQLiteCache | None, optional): cache of post critiques shared by all runs. Defaults to None, meaning an in-process cache.
+            requests_per_minute (int | None, optional): request budget of each model, shared by all agents; ignored for models that already have a limiter with budgets. Defaults to None, meaning unlimited.
+            tokens_per_minute (int | None, optional): token budget of each model, shared by all agents; ignored for models that already have a limiter with budgets. Defaults to None, meaning unlimited.
+            fan_in (bool, optional): whether to merge scrapers of the same type (see `BaseScraper.combine`), e.g. to search all subreddits with one request by a single agent, instead of running an agent per scraper. Defaults to False.
+            seen_index (SeenPostIndex | None, optional): persistent index of evaluated posts; if given, posts evaluated in earlier crawls are skipped. Defaults to None.
+            prefilter (bool, optional): whether to rank search results by local TF-IDF similarity to the description and tags before the LLM selects posts. Defaults to False.
+            prefilter_threshold (float | None, optional): similarity at or below which search results are pruned by the prefilter; None only ranks them. Defaults to 0.0.
+            history_token_budget (int | None, optional): estimated number of tokens of message history each search run keeps between iterations, with older iterations folded into a running summary. Defaults to 8000, None keeps the whole history.
+            critique_batch_token_budget (int | None, optional): estimated number of post tokens the critic packs into one LLM call. Defaults to None, meaning one call per post.
+            selection_chunk_size (int | None, optional): maximum number of critiques the selector considers in one LLM call; larger sets are selected from in parallel groups, tournament-style. Defaults to None, meaning a single call.
+            near_duplicate_distance (int | None, optional): maximum number of differing bits of SimHash fingerprints of posts considered near-duplicates, e.g. crossposts, which are critiqued only once; None disables the check. Defaults to 3.
+            normalize_posts (bool, optional): whether to strip markup, boilerplate and excess whitespace from loaded posts before they are critiqued. Defaults to False.
+            post_token_budget (int | None, optional): estimated number of tokens normalized posts are truncated to, keeping the title, the opening and the top comments; None disables truncation. Defaults to 1500.
+            checkpoint_path (str | None, optional): path to the SQLite file the state of every run is checkpointed to after each node, so that an interrupted crawl can be resumed. Defaults to None, meaning no checkpointing.
+            crawl_id (str | None, optional): ID of the crawl; creating a crawler with the ID of an interrupted crawl resumes its unfinished runs and reuses the results of finished ones; checkpoints are deleted once every run of the crawl has finished. Defaults to None, meaning a new random ID.
+            min_iteration_yield (float | None, optional): weighted yield of new links, new posts and promising critiques below which a search loop iteration is fruitless; runs stop at the first fruitless iteration past `agent_min_iterations` (see `ConvergenceDetector`). Defaults to None, meaning no local stopping policy.
+            llm_loop_decision (bool, optional): whether the LLM decides whether to keep searching when the stopping policy doesn't end a run; otherwise runs continue until they converge or reach `agent_max_iterations`. Defaults to True.
+            planner_introduction_prompt (str | None, optional): prompt introducing the role of the planner; if given, a deduplicated set of queries is planned once per crawl, every scraper gets the same set and each run searches its own disjoint slice of it instead of asking the LLM for queries. Defaults to None, meaning no planning.
+            models (dict[str, str | BaseChatModel] | None, optional): models overriding `model` for an agent, keyed by its class name (e.g. "SelectorAgent"), or for a node of an agent, keyed by "<agent>.<node>" (e.g. "SearchAgent.SELECT_POST"). Defaults to None.
+            critic_screening_model (str | BaseChatModel | None, optional): cheaper model the critic screens posts with first; only posts it doesn't clearly reject are critiqued again by the critic's model. Defaults to None, meaning no cascade.
+            critic_escalation_score (int, optional): screening score from which a post is escalated to the critic's model. Defaults to 4.
         """
+        self._rate_limiter = configure_rate_limiter(
+            model_id(model), requests_per_minute, tokens_per_minute
+        )
+        models = models if models is not None else {}
+        tier_models = {
+            model_id(tier_model)
+            for tier_model in [*models.values(), critic_screening_model]
+            if tier_model is not None
+        } - {model_id(model)}
+        for tier_model in tier_models:
+            configure_rate_limiter(tier_model, requests_per_minute, tokens_per_minute)
+        self._metrics = Metrics()
+        self._crawl_id = crawl_id if crawl_id is not None else uuid.uuid4().hex
+        self._checkpointer = None
+        if checkpoint_path is not None:
+            from api_crawler.cache.checkpointer import SQLiteCheckpointer
+
+            self._checkpointer = SQLiteCheckpointer(checkpoint_path, CHECKPOINTED_TYPES)
+            logger.info(f"Checkpointing crawl {self._crawl_id} to {checkpoint_path}.")
+
+        critic_model, critic_node_models = self._models_of(CriticAgent, model, models)
         critic = CriticAgent(
             introduction_prompt=critic_introduction_prompt,
             description_prompt=description_prompt,
-            model=model,
+            model=critic_model,
+            cache=critique_cache,
+            batch_token_budget=critique_batch_token_budget,
+            metrics=self._metrics,
+            node_models=critic_node_models,
+            screening_model=critic_screening_model,
+            escalation_score=critic_escalation_score,
+        )
+        selector_model, selector_node_models = self._models_of(
+            SelectorAgent, model, models
         )
         selector = SelectorAgent(
             introduction_prompt=selector_introduction_prompt,
             description_prompt=description_prompt,
-            model=model,
+            model=selector_model,
+            chunk_size=selection_chunk_size,
+            metrics=self._metrics,
+            node_models=selector_node_models,
+        )
+        planner_model, planner_node_models = self._models_of(
+            PlannerAgent, model, models
+        )
+
+        planner = (
+            PlannerAgent(
+                description_prompt=description_prompt,
+                introduction_prompt=planner_introduction_prompt,
+                tags=tags,
+                model=planner_model,
+                metrics=self._metrics,
+                node_models=planner_node_models,
+            )
+            if planner_introduction_prompt is not None
+            else None
+        )
+
+        if fan_in:
+            scrapers = self._combine(scrapers)
+
+        duplicate_index = (
+            SimhashIndex(near_duplicate_distance)
+            if near_duplicate_distance is not None
+            else None
+        )
+        normalizer = PostNormalizer(post_token_budget) if normalize_posts else None
+        convergence = (
+            ConvergenceDetector(min_iteration_yield)
+            if min_iteration_yield is not None
+            else None
+        )
+        relevance_filter = (
+            RelevanceFilter(description_prompt, tags, threshold=prefilter_threshold)
+            if prefilter
+            else None
         )
 
+        search_model, search_node_models = self._models_of(SearchAgent, model, models)
         self._agents = [
             SearchAgent(
                 scraper=scraper,
@@ -63,15 +198,62 @@ class Crawler:
                 search_prompt=search_search_prompt,
                 select_prompt=search_select_prompt,
                 decide_loop_prompt=search_decide_loop_prompt,
-                model=model,
+                model=search_model,
                 min_iterations=agent_min_iterations,
                 max_iterations=agent_max_iterations,
                 description_prompt=description_prompt,
+                seen_index=seen_index,
+                relevance_filter=relevance_filter,
+                history_token_budget=history_token_budget,
+                duplicate_index=duplicate_index,
+                normalizer=normalizer,
+                metrics=self._metrics,
+                checkpointer=self._checkpointer,
+                crawl_id=self._crawl_id,
+                convergence=convergence,
+                llm_loop_decision=llm_loop_decision,
+                node_models=search_node_models,
             )
             for scraper in scrapers
         ]
 
+        self._critic = critic
+        self._selector = selector
+        self._planner = planner
         self._iterations = iterations
+        self._agent_max_iterations = agent_max_iterations
+
+    def usage(self) -> TokenUsage:
+        """Returns token usage of all LLM calls made by the crawler's agents.
+
+        Returns:
+            TokenUsage: cached and uncached input tokens and output tokens.
+        """
+        return sum(
+            (
+                agent.usage()
+                for agent in [self._critic, self._selector, *self._agents]
+                + ([self._planner] if self._planner is not None else [])
+            ),
+            TokenUsage(),
+        )
+
+    @property
+    def crawl_id(self) -> str:
+        """ID of the crawl, to pass when resuming it.
+
+        Returns:
+            str: crawl ID.
+        """
+        return self._crawl_id
+
+    def metrics(self) -> Metrics:
+        """Returns per-node metrics of all agents, aggregatable per run, per agent and for the whole crawl, and exportable as JSON or in the Prometheus text format.
+
+        Returns:
+            Metrics: timings, token usage and error counts.
+        """
+        return self._metrics
 
     def run(self) -> list[PostChoice]:
         """Runs the crawler and returns found posts.
@@ -91,15 +273,247 @@ class Crawler:
             Returns:
                 list[PostChoice]: reply from the agent.
             """
-            return agent.run(self._iterations)
+            return agent.run(self._iterations, queries)
+
+        queries = self._plan()
 
         with ThreadPoolExecutor(max_workers=len(self._agents)) as pool:
             results_from_agents = list(pool.map(run_agent, self._agents))
 
-        result_list = list(chain.from_iterable(results_from_agents))
+        self._prune_checkpoints()
+
+        return self._merge(results_from_agents)
+
+    async def arun(self, max_concurrency: int = 16) -> list[PostChoice]:
+        """Runs the crawler on the current event loop and returns found posts.
+
+        Args:
+            max_concurrency (int, optional): maximum number of agents running at once. Defaults to 16.
+
+        Returns:
+            list[PostChoice]: found posts.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_agent(
+            agent: SearchAgent,
+        ) -> list[PostChoice]:
+            """Worker coroutine.
+
+            Args:
+                agent (SearchAgent): single agent to run.
+
+            Returns:
+                list[PostChoice]: reply from the agent.
+            """
+            async with semaphore:
+                return await agent.arun(self._iterations, queries)
+
+        queries = await self._aplan()
+        results_from_agents = await asyncio.gather(
+            *(run_agent(agent) for agent in self._agents)
+        )
+
+        await self._aprune_checkpoints()
+
+        return self._merge(results_from_agents)
+
+    def stream(self, max_concurrency: int = 16) -> Iterator[CrawlEvent | PostChoice]:
+        """Runs the crawler, yielding progress events and found posts as soon as any run picks them.
+
+        Posts are deduplicated by their canonical identity (see `api_crawler.identity`) across all agents.
+
+        Args:
+            max_concurrency (int, optional): maximum number of agents running at once. Defaults to 16.
+
+        Yields:
+            CrawlEvent | PostChoice: progress events and found posts.
+        """
+        yield from iterate_in_thread(lambda: self.astream(max_concurrency))
+
+    async def astream(
+        self, max_concurrency: int = 16
+    ) -> AsyncIterator[CrawlEvent | PostChoice]:
+        """Runs the crawler on the current event loop, yielding progress events and found posts as soon as any run picks them.
+
+        Posts are deduplicated by their canonical identity (see `api_crawler.identity`) across all agents.
+
+        Args:
+            max_concurrency (int, optional): maximum number of agents running at once. Defaults to 16.
+
+        Yields:
+            CrawlEvent | PostChoice: progress events and found posts.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def stream_agent(
+            agent: SearchAgent,
+        ) -> AsyncIterator[CrawlEvent | PostChoice]:
+            """Worker stream.
+
+            Args:
+                agent (SearchAgent): single agent to run.
+
+            Yields:
+                CrawlEvent | PostChoice: events and posts from the agent.
+            """
+            async with semaphore:
+                async for item in agent.astream(self._iterations, queries):
+                    yield item
+
+        queries = await self._aplan()
+
+        seen_ids: set[str] = set()
+        found = 0
+
+        async for item in merge_streams(
+            [stream_agent(agent) for agent in self._agents]
+        ):
+            if isinstance(item, PostChoice):
+                post_id = post_identity(item.post.link)
+                if post_id in seen_ids:
+                    continue
+                seen_ids.add(post_id)
+                found += 1
+            yield item
+
+        await self._aprune_checkpoints()
+
+        logger.info(f"All agents have completed their runs, found {found} posts.")
+        logger.info(f"LLM usage: {self.usage()}")
+        for agent, metrics in self._metrics.by_agent().items():
+            logger.info(f"{agent} metrics: {metrics}")
+
+    def _prune_checkpoints(self) -> None:
+        """Deletes the checkpoints of the crawl once all of its runs have finished, so they don't pile up across crawls.
+
+        Checkpoints of a crawl with an unfinished run are kept, so that it can be resumed.
+        """
+        if self._checkpointer is None or not all(
+            agent.finished(self._iterations) for agent in self._agents
+        ):
+            return
+
+        for agent in self._agents:
+            agent.delete_checkpoints(self._iterations)
+        logger.info(f"Deleted checkpoints of finished crawl {self._crawl_id}.")
+
+    async def _aprune_checkpoints(self) -> None:
+        """Deletes the checkpoints of the crawl asynchronously once all of its runs have finished, so they don't pile up across crawls.
+
+        Checkpoints of a crawl with an unfinished run are kept, so that it can be resumed.
+        """
+        if self._checkpointer is None:
+            return
+
+        for agent in self._agents:
+            if not await agent.afinished(self._iterations):
+                return
+
+        for agent in self._agents:
+            await agent.adelete_checkpoints(self._iterations)
+        logger.info(f"Deleted checkpoints of finished crawl {self._crawl_id}.")
+
+    def _plan(self) -> list[str] | None:
+        """Plans the queries of the crawl, enough for every iteration of every run.
+
+        Returns:
+            list[str] | None: planned queries or None if planning is disabled.
+        """
+        if self._planner is None:
+            return None
+
+        queries = self._planner.run(self._iterations * self._agent_max_iterations)
+        logger.info(f"Planned {len(queries)} queries: {queries}")
+
+        return queries
+
+    async def _aplan(self) -> list[str] | None:
+        """Plans the queries of the crawl asynchronously, enough for every iteration of every run.
+
+        Returns:
+            list[str] | None: planned queries or None if planning is disabled.
+        """
+        if self._planner is None:
+            return None
+
+        queries = await self._planner.arun(
+            self._iterations * self._agent_max_iterations
+        )
+        logger.info(f"Planned {len(queries)} queries: {queries}")
+
+        return queries
+
+    @staticmethod
+    def _models_of(
+        agent: type[BaseAgent],
+        model: str | BaseChatModel,
+        models: dict[str, str | BaseChatModel],
+    ) -> tuple[str | BaseChatModel, dict[str, str | BaseChatModel]]:
+        """Picks the model of an agent and the models overriding it in its nodes.
+
+        Args:
+            agent (type[BaseAgent]): class of the agent.
+            model (str | BaseChatModel): default model of the crawl.
+            models (dict[str, str | BaseChatModel]): models by agent and by `<agent>.<node>`.
+
+        Returns:
+            tuple[str | BaseChatModel, dict[str, str | BaseChatModel]]: model of the agent and models by node.
+        """
+        prefix = f"{agent.__name__}."
+
+        return models.get(agent.__name__, model), {
+            key.removeprefix(prefix): node_model
+            for key, node_model in models.items()
+            if key.startswith(prefix)
+        }
+
+    @staticmethod
+    def _combine(scrapers: list[BaseScraper]) -> list[BaseScraper]:
+        """Merges scrapers of the same type.
+
+        Args:
+            scrapers (list[BaseScraper]): list of scrapers to use.
+
+        Returns:
+            list[BaseScraper]: merged scrapers.
+        """
+        scrapers_by_type: dict[type[BaseScraper], list[BaseScraper]] = {}
+        for scraper in scrapers:
+            scrapers_by_type.setdefault(type(scraper), []).append(scraper)
+
+        combined = [
+            merged
+            for scraper_type, group in scrapers_by_type.items()
+            for merged in scraper_type.combine(group)
+        ]
+
+        logger.info(f"Merged {len(scrapers)} scrapers into {len(combined)}.")
+
+        return combined
+
+    def _merge(self, results_from_agents: list[list[PostChoice]]) -> list[PostChoice]:
+        """Flattens the results of all agents, dropping posts found by several of them.
+
+        Args:
+            results_from_agents (list[list[PostChoice]]): replies from the agents.
+
+        Returns:
+            list[PostChoice]: found posts.
+        """
+        result_list = list(
+            unique_everseen(
+                chain.from_iterable(results_from_agents),
+                key=lambda choice: post_identity(choice.post.link),
+            )
+        )
 
         logger.info(
             f"All agents have completed their runs, found {len(result_list)} posts."
         )
+        logger.info(f"LLM rate limiter: {self._rate_limiter.stats()}")
+        logger.info(f"LLM usage: {self.usage()}")
+        for agent, metrics in self._metrics.by_agent().items():
+            logger.info(f"{agent} metrics: {metrics}")
 
         return result_list
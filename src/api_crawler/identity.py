@@ -0,0 +1,250 @@
+import hashlib
+import re
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+
+from api_crawler.relevance import tokenize
+
+REDDIT_HOSTS = frozenset({"reddit.com", "redd.it"})
+REDDIT_SUBDOMAINS = ("www.", "old.", "new.", "np.", "m.", "i.")
+REDDIT_POST_PATTERN = re.compile(r"/comments/([a-z0-9]+)", re.IGNORECASE)
+SHORT_LINK_PATTERN = re.compile(r"^/([a-z0-9]+)/?$", re.IGNORECASE)
+TRACKING_PARAMETERS = frozenset(
+    {"context", "ref", "ref_source", "share_id", "utm_name"}
+)
+QUERY_OPERATOR_PATTERN = re.compile(r'["():]|(?:^|\s)-|\b(?:AND|OR|NOT)\b')
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+MIN_FINGERPRINT_TERMS = 8
+
+
+def normalize_url(url: str) -> str:
+    """Normalizes a post URL, so that variants of the same link compare equal.
+
+    Lowercases the host, forces HTTPS, drops `www.` (and Reddit's `old.`, `new.`, `np.` etc.) subdomains, the fragment
+    and trailing slashes. Query strings are dropped from Reddit links; elsewhere only tracking parameters are dropped
+    and the rest are sorted.
+
+    Args:
+        url (str): URL to normalize.
+
+    Returns:
+        str: normalized URL.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+
+    if host.startswith("www."):
+        host = host[len("www.") :]
+    elif _on_domain(host, "reddit.com"):
+        host = next(
+            (
+                host[len(prefix) :]
+                for prefix in REDDIT_SUBDOMAINS
+                if host.startswith(prefix)
+            ),
+            host,
+        )
+
+    query = (
+        ""
+        if any(_on_domain(host, domain) for domain in REDDIT_HOSTS)
+        else urlencode(
+            sorted(
+                (key, value)
+                for key, value in parse_qsl(parts.query)
+                if key not in TRACKING_PARAMETERS and not key.startswith("utm_")
+            )
+        )
+    )
+
+    return urlunsplit(("https", host, parts.path.rstrip("/"), query, ""))
+
+
+def _on_domain(host: str, domain: str) -> bool:
+    """Checks whether the host is the domain or one of its subdomains.
+
+    Args:
+        host (str): lowercase host.
+        domain (str): domain, e.g. "reddit.com".
+
+    Returns:
+        bool: True if the host belongs to the domain.
+    """
+    return host == domain or host.endswith(f".{domain}")
+
+
+def normalize_query(query: str) -> str:
+    """Normalizes a search query, so that queries differing only in case, spacing or word order compare equal.
+
+    Queries using search syntax — quoted phrases, boolean operators, field prefixes or exclusions — only get their
+    whitespace collapsed, as reordering or lowercasing them could change their meaning.
+
+    Args:
+        query (str): search query.
+
+    Returns:
+        str: normalized query.
+    """
+    words = query.split()
+
+    if QUERY_OPERATOR_PATTERN.search(query):
+        return " ".join(words)
+
+    return " ".join(sorted({word.lower() for word in words}))
+
+
+def reddit_fullname(url: str) -> str | None:
+    """Extracts the Reddit fullname of a post, e.g. t3_abc123, from any variant of its link.
+
+    Args:
+        url (str): link to the post.
+
+    Returns:
+        str | None: fullname or None if the link doesn't point to a Reddit post.
+    """
+    parts = urlsplit(normalize_url(url))
+
+    if parts.netloc not in REDDIT_HOSTS:
+        return None
+
+    pattern = SHORT_LINK_PATTERN if parts.netloc == "redd.it" else REDDIT_POST_PATTERN
+    match = pattern.search(parts.path)
+
+    return f"t3_{match.group(1).lower()}" if match else None
+
+
+def post_identity(url: str) -> str:
+    """Returns the canonical identity of a post: its Reddit fullname or its normalized URL.
+
+    Args:
+        url (str): link to the post.
+
+    Returns:
+        str: canonical identity.
+    """
+    return reddit_fullname(url) or normalize_url(url)
+
+
+def simhash(text: str) -> int | None:
+    """Computes a 64-bit SimHash fingerprint of the text over word shingles.
+
+    Texts differing only slightly get fingerprints differing in few bits.
+
+    Args:
+        text (str): text to fingerprint.
+
+    Returns:
+        int | None: fingerprint or None if the text is too short to fingerprint reliably.
+    """
+    terms = tokenize(text)
+
+    if len(terms) < MIN_FINGERPRINT_TERMS:
+        return None
+
+    shingles = [
+        " ".join(terms[i : i + SHINGLE_SIZE])
+        for i in range(len(terms) - SHINGLE_SIZE + 1)
+    ]
+    hashes = np.array(
+        [
+            int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest())
+            for shingle in shingles
+        ],
+        dtype=np.uint64,
+    )
+    bits = (hashes[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)
+    votes = 2 * bits.sum(axis=0, dtype=np.int64) - len(shingles)
+
+    return sum(1 << int(i) for i in np.flatnonzero(votes > 0))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Counts the bits in which two fingerprints differ.
+
+    Args:
+        a (int): first fingerprint.
+        b (int): second fingerprint.
+
+    Returns:
+        int: number of differing bits.
+    """
+    return (a ^ b).bit_count()
+
+
+class SimhashIndex:
+    """Thread-safe index of post fingerprints, used to detect near-duplicate posts such as crossposts and reposts.
+
+    Fingerprints are split into `max_distance + 1` bit bands and bucketed by each band. Fingerprints within
+    `max_distance` bits share at least one band exactly, so only the posts in matching buckets are compared.
+    """
+
+    def __init__(self, max_distance: int = 3) -> None:
+        """Initializes an empty index.
+
+        Args:
+            max_distance (int, optional): maximum number of differing bits of near-duplicate fingerprints. Defaults to 3.
+        """
+        self._max_distance = max_distance
+        self._fingerprints: dict[str, int] = {}
+        self._bands = self._split_bands(max_distance)
+        self._buckets: list[dict[int, list[str]]] = [{} for _ in self._bands]
+        self._lock = threading.Lock()
+
+    def find_or_add(self, post_id: str, fingerprint: int) -> str:
+        """Finds a different post that is a near-duplicate of the given one, or indexes the given one.
+
+        Args:
+            post_id (str): canonical identity of the post.
+            fingerprint (int): SimHash fingerprint of the post content.
+
+        Returns:
+            str: identity of the closest near-duplicate indexed earlier, or `post_id` if there is none.
+        """
+        keys = [(fingerprint >> shift) & mask for shift, mask in self._bands]
+
+        with self._lock:
+            if post_id in self._fingerprints:
+                return post_id
+
+            candidates = {
+                other_id: hamming_distance(fingerprint, self._fingerprints[other_id])
+                for buckets, key in zip(self._buckets, keys)
+                for other_id in buckets.get(key, [])
+            }
+            if candidates:
+                other_id = min(candidates, key=candidates.__getitem__)
+                if candidates[other_id] <= self._max_distance:
+                    return other_id
+
+            self._fingerprints[post_id] = fingerprint
+            for buckets, key in zip(self._buckets, keys):
+                buckets.setdefault(key, []).append(post_id)
+
+            return post_id
+
+    @staticmethod
+    def _split_bands(max_distance: int) -> list[tuple[int, int]]:
+        """Splits the fingerprint bits into `max_distance + 1` bands of nearly equal width.
+
+        Args:
+            max_distance (int): maximum number of differing bits of near-duplicate fingerprints.
+
+        Returns:
+            list[tuple[int, int]]: shift and mask of each band; a single empty band if there are too few bits to split.
+        """
+        count = max_distance + 1
+        if count > SIMHASH_BITS:
+            return [(0, 0)]
+
+        bands = []
+        shift = 0
+
+        for i in range(count):
+            width = SIMHASH_BITS // count + (i < SIMHASH_BITS % count)
+            bands.append((shift, (1 << width) - 1))
+            shift += width
+
+        return bands
@@ -0,0 +1,324 @@
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+from pydantic import BaseModel, Field
+
+from api_crawler.usage import TokenUsage
+
+
+class NodeMetrics(BaseModel):
+    """Timings, token usage and error counts of a graph node."""
+
+    executions: int = Field(default=0, description="number of executions of the node")
+    errors: int = Field(default=0, description="number of executions that raised")
+    wall_seconds: float = Field(default=0.0, description="total wall time")
+    llm_seconds: float = Field(
+        default=0.0, description="time spent waiting for LLM responses"
+    )
+    llm_errors: int = Field(default=0, description="number of failed LLM calls")
+    usage: TokenUsage = Field(
+        default_factory=TokenUsage, description="token usage of LLM calls"
+    )
+    scraper_calls: int = Field(
+        default=0, description="number of searches and posts loaded from the website"
+    )
+    scraper_errors: int = Field(
+        default=0, description="number of failed searches and loads"
+    )
+    scraper_seconds: float = Field(
+        default=0.0, description="time spent waiting for the website"
+    )
+
+    def __add__(self, other: "NodeMetrics") -> "NodeMetrics":
+        """Sums two sets of metrics.
+
+        Args:
+            other (NodeMetrics): metrics to add.
+
+        Returns:
+            NodeMetrics: total metrics.
+        """
+        return NodeMetrics(
+            executions=self.executions + other.executions,
+            errors=self.errors + other.errors,
+            wall_seconds=self.wall_seconds + other.wall_seconds,
+            llm_seconds=self.llm_seconds + other.llm_seconds,
+            llm_errors=self.llm_errors + other.llm_errors,
+            usage=self.usage + other.usage,
+            scraper_calls=self.scraper_calls + other.scraper_calls,
+            scraper_errors=self.scraper_errors + other.scraper_errors,
+            scraper_seconds=self.scraper_seconds + other.scraper_seconds,
+        )
+
+
+class MetricsRecord(BaseModel):
+    """Metrics of a single node of a single agent run."""
+
+    agent: str = Field(description="name of the agent")
+    run: str = Field(description="run of the search agent the node ran in")
+    node: str = Field(description="graph node")
+    metrics: NodeMetrics
+
+
+PROMETHEUS_METRICS: list[tuple[str, str, Callable[[NodeMetrics], float]]] = [
+    ("node_executions_total", "Executions of graph nodes.", lambda m: m.executions),
+    ("node_errors_total", "Executions of graph nodes that raised.", lambda m: m.errors),
+    ("node_seconds_total", "Wall time of graph nodes.", lambda m: m.wall_seconds),
+    ("llm_calls_total", "LLM calls.", lambda m: m.usage.calls),
+    ("llm_errors_total", "Failed LLM calls.", lambda m: m.llm_errors),
+    (
+        "llm_seconds_total",
+        "Time spent waiting for LLM responses.",
+        lambda m: m.llm_seconds,
+    ),
+    ("llm_input_tokens_total", "LLM input tokens.", lambda m: m.usage.input_tokens),
+    (
+        "llm_cached_input_tokens_total",
+        "LLM input tokens served from the prompt cache.",
+        lambda m: m.usage.cached_input_tokens,
+    ),
+    ("llm_output_tokens_total", "LLM output tokens.", lambda m: m.usage.output_tokens),
+    (
+        "scraper_calls_total",
+        "Searches and posts loaded from the website.",
+        lambda m: m.scraper_calls,
+    ),
+    ("scraper_errors_total", "Failed searches and loads.", lambda m: m.scraper_errors),
+    (
+        "scraper_seconds_total",
+        "Time spent waiting for the website.",
+        lambda m: m.scraper_seconds,
+    ),
+]
+
+_scope: ContextVar[tuple["Metrics", str, str, str] | None] = ContextVar(
+    "metrics_scope", default=None
+)
+
+
+class Metrics:
+    """Thread-safe collector of per-node metrics of agent graphs.
+
+    Metrics are keyed by agent, run and node. The node currently executing is tracked in a context variable, so LLM
+    and scraper calls made anywhere below it — including in nested agents and worker threads started with a copied
+    context — are attributed to it. The wall time of a node includes nested agents' nodes called from it.
+    """
+
+    def __init__(self) -> None:
+        """Initializes empty metrics."""
+        self._records: dict[tuple[str, str, str], NodeMetrics] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def scope(self, agent: str, node: str, run: str | None = None) -> Iterator[None]:
+        """Attributes metrics recorded within the block to the node.
+
+        Args:
+            agent (str): name of the agent.
+            node (str): graph node.
+            run (str | None, optional): run of the search agent. Defaults to None, meaning the run of the enclosing scope.
+
+        Yields:
+            None: nothing.
+        """
+        if run is None:
+            enclosing = _scope.get()
+            run = enclosing[2] if enclosing is not None else ""
+
+        token = _scope.set((self, agent, run, node))
+        try:
+            yield
+        finally:
+            _scope.reset(token)
+
+    def add(self, agent: str, run: str, node: str, metrics: NodeMetrics) -> None:
+        """Adds metrics of a node.
+
+        Args:
+            agent (str): name of the agent.
+            run (str): run of the search agent.
+            node (str): graph node.
+            metrics (NodeMetrics): metrics to add.
+        """
+        key = (agent, run, node)
+
+        with self._lock:
+            self._records[key] = self._records.get(key, NodeMetrics()) + metrics
+
+    def records(self) -> list[MetricsRecord]:
+        """Returns metrics of every node of every run.
+
+        Returns:
+            list[MetricsRecord]: metrics by agent, run and node.
+        """
+        with self._lock:
+            items = list(self._records.items())
+
+        return [
+            MetricsRecord(agent=agent, run=run, node=node, metrics=metrics)
+            for (agent, run, node), metrics in sorted(items)
+        ]
+
+    def by_run(self) -> dict[str, NodeMetrics]:
+        """Aggregates metrics per run of the search agents.
+
+        Returns:
+            dict[str, NodeMetrics]: metrics by run.
+        """
+        return self._aggregate(lambda record: record.run)
+
+    def by_agent(self) -> dict[str, NodeMetrics]:
+        """Aggregates metrics per agent.
+
+        Returns:
+            dict[str, NodeMetrics]: metrics by agent.
+        """
+        return self._aggregate(lambda record: record.agent)
+
+    def by_node(self) -> dict[str, NodeMetrics]:
+        """Aggregates metrics per node of each agent, across runs.
+
+        Returns:
+            dict[str, NodeMetrics]: metrics by `agent.node`.
+        """
+        return self._aggregate(lambda record: f"{record.agent}.{record.node}")
+
+    def total(self) -> NodeMetrics:
+        """Aggregates metrics of the whole crawl.
+
+        Returns:
+            NodeMetrics: total metrics.
+        """
+        return sum((record.metrics for record in self.records()), NodeMetrics())
+
+    def to_json(self) -> str:
+        """Exports the metrics as JSON, with per-node records and per-run, per-agent and total aggregates.
+
+        Returns:
+            str: JSON document.
+        """
+        return json.dumps(
+            {
+                "total": self.total().model_dump(),
+                "agents": {
+                    agent: metrics.model_dump()
+                    for agent, metrics in self.by_agent().items()
+                },
+                "runs": {
+                    run: metrics.model_dump() for run, metrics in self.by_run().items()
+                },
+                "nodes": [record.model_dump() for record in self.records()],
+            },
+            indent=2,
+        )
+
+    def to_prometheus(self, prefix: str = "crawler") -> str:
+        """Exports the metrics in the Prometheus text exposition format, labelled by agent, run and node.
+
+        Args:
+            prefix (str, optional): prefix of metric names. Defaults to "crawler".
+
+        Returns:
+            str: metrics in the text format.
+        """
+        records = self.records()
+        lines = []
+
+        for name, description, value in PROMETHEUS_METRICS:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            lines.extend(
+                f'{prefix}_{name}{{agent="{_escape(record.agent)}",run="{_escape(record.run)}",'
+                f'node="{_escape(record.node)}"}} {value(record.metrics)}'
+                for record in records
+            )
+
+        return "\n".join(lines) + "\n"
+
+    def _aggregate(self, key: Callable[[MetricsRecord], str]) -> dict[str, NodeMetrics]:
+        """Sums metrics of records sharing a key.
+
+        Args:
+            key (Callable[[MetricsRecord], str]): function returning the key of a record.
+
+        Returns:
+            dict[str, NodeMetrics]: metrics by key.
+        """
+        aggregated: dict[str, NodeMetrics] = {}
+
+        for record in self.records():
+            aggregated[key(record)] = (
+                aggregated.get(key(record), NodeMetrics()) + record.metrics
+            )
+
+        return aggregated
+
+
+def record_node(seconds: float, failed: bool = False) -> None:
+    """Records an execution of the current node.
+
+    Args:
+        seconds (float): wall time of the execution.
+        failed (bool, optional): whether the execution raised. Defaults to False.
+    """
+    _record(NodeMetrics(executions=1, errors=int(failed), wall_seconds=seconds))
+
+
+def record_llm_call(
+    seconds: float, usage: TokenUsage | None = None, failed: bool = False
+) -> None:
+    """Records an LLM call made by the current node.
+
+    Args:
+        seconds (float): latency of the call.
+        usage (TokenUsage | None, optional): token usage of the call. Defaults to None, meaning a call with unknown usage.
+        failed (bool, optional): whether the call raised. Defaults to False.
+    """
+    _record(
+        NodeMetrics(
+            llm_seconds=seconds,
+            llm_errors=int(failed),
+            usage=usage if usage is not None else TokenUsage(calls=1),
+        )
+    )
+
+
+def record_scraper_call(seconds: float, calls: int = 1, failed: int = 0) -> None:
+    """Records searches or loads made by the current node.
+
+    Args:
+        seconds (float): latency of the call.
+        calls (int, optional): number of searches or posts loaded at once. Defaults to 1.
+        failed (int, optional): number of them that failed. Defaults to 0.
+    """
+    _record(
+        NodeMetrics(scraper_calls=calls, scraper_errors=failed, scraper_seconds=seconds)
+    )
+
+
+def _record(metrics: NodeMetrics) -> None:
+    """Adds metrics to the node of the current scope, if there is one.
+
+    Args:
+        metrics (NodeMetrics): metrics to add.
+    """
+    scope = _scope.get()
+
+    if scope is not None:
+        collector, agent, run, node = scope
+        collector.add(agent, run, node, metrics)
+
+
+def _escape(value: str) -> str:
+    """Escapes a Prometheus label value.
+
+    Args:
+        value (str): label value.
+
+    Returns:
+        str: escaped value.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
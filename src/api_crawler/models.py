@@ -0,0 +1,78 @@
+import logging
+import threading
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.runnables import Runnable
+
+logger = logging.getLogger(__name__)
+
+_models: dict[str, "BaseChatModel"] = {}
+_structured: dict[tuple[int, type], tuple["BaseChatModel", "Runnable"]] = {}
+_lock = threading.Lock()
+
+
+def model_id(model: "str | BaseChatModel") -> str:
+    """Returns the ID of the model, used to share rate limiters and to key caches.
+
+    Args:
+        model (str | BaseChatModel): model ID or chat model.
+
+    Returns:
+        str: model ID.
+    """
+    if isinstance(model, str):
+        return model
+
+    name = getattr(model, "model_name", None) or getattr(model, "model", None)
+
+    return f"{model._llm_type}:{name}" if name else model._llm_type
+
+
+def get_chat_model(model: "str | BaseChatModel") -> "BaseChatModel":
+    """Returns the process-wide chat model of the ID, initializing it on first use.
+
+    Models are created with the provider SDK's retries disabled, so the shared `RateLimiter` is the only layer retrying and backing off on rate limit, server and connection errors. Ready chat models are returned as they are.
+
+    Args:
+        model (str | BaseChatModel): model ID or chat model.
+
+    Returns:
+        BaseChatModel: shared chat model.
+    """
+    if not isinstance(model, str):
+        return model
+
+    with _lock:
+        if model not in _models:
+            from langchain.chat_models import init_chat_model
+
+            logger.info(f"Initializing LLM model {model}.")
+            _models[model] = init_chat_model(model, max_retries=0)
+
+        return _models[model]
+
+
+def get_structured_model(model: "BaseChatModel", schema: type) -> "Runnable[Any, Any]":
+    """Returns the process-wide runnable of the chat model forced to return the schema, creating it on first use.
+
+    The runnable returns the raw message along with the parsed output (see `with_structured_output(include_raw=True)`).
+
+    Args:
+        model (BaseChatModel): chat model.
+        schema (type): type to return.
+
+    Returns:
+        Runnable[Any, Any]: shared structured-output runnable.
+    """
+    key = (id(model), schema)
+
+    with _lock:
+        if key not in _structured:
+            _structured[key] = (
+                model,
+                model.with_structured_output(schema, include_raw=True),
+            )
+
+        return _structured[key][1]
@@ -0,0 +1,192 @@
+import html
+import re
+import warnings
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup, MarkupResemblesLocatorWarning
+
+from api_crawler.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+HTML_TAG_PATTERN = re.compile(r"</?[a-zA-Z][^>]*>")
+CODE_BLOCK_PATTERN = re.compile(r"```[^\n]*\n(.*?)(?:```|$)", re.DOTALL)
+MARKDOWN_IMAGE_PATTERN = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+MARKDOWN_LINK_PATTERN = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+URL_PATTERN = re.compile(r"https?://[^\s)\]>]+")
+MARKDOWN_EMPHASIS_PATTERN = re.compile(r"(\*\*|__|~~|`)")
+MARKDOWN_HEADING_PATTERN = re.compile(r"^\s{0,3}#{1,6}\s+", re.MULTILINE)
+MARKDOWN_QUOTE_PATTERN = re.compile(r"^\s{0,3}>\s?", re.MULTILINE)
+HORIZONTAL_SPACE_PATTERN = re.compile(r"[ \t\u00a0\u200b]+")
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+BOILERPLATE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    for pattern in [
+        r"&#x200b;",
+        r"^\s*\[(deleted|removed)\]\s*$",
+        r"^\s*i am a bot, and this action was performed automatically.*$",
+        r"^\s*\^\(.*\)\s*$",
+    ]
+]
+TRUNCATION_MARK = " […]"
+
+
+class PostNormalizer:
+    """Cleans loaded posts and fits them into a token budget before they are critiqued.
+
+    Strips HTML and markdown markup, collapses code blocks, URLs, whitespace and boilerplate, and truncates the post
+    so that every paragraph — the title, the opening of the content and each of the top comments — keeps a fair share
+    of the budget.
+    """
+
+    def __init__(self, token_budget: int | None = 1500, code_lines: int = 3) -> None:
+        """Initializes the normalizer.
+
+        Args:
+            token_budget (int | None, optional): estimated number of tokens a post is truncated to. Defaults to 1500, None disables truncation.
+            code_lines (int, optional): number of leading lines of each code block that are kept. Defaults to 3.
+        """
+        self._token_budget = token_budget
+        self._code_lines = code_lines
+
+    def normalize(self, content: str) -> str:
+        """Cleans the post and truncates it to the token budget.
+
+        Args:
+            content (str): loaded post.
+
+        Returns:
+            str: normalized post.
+        """
+        content = self._strip_markup(content)
+        content = self._collapse(content)
+
+        if self._token_budget is None or estimate_tokens(content) <= self._token_budget:
+            return content
+
+        return self._truncate(content, self._token_budget)
+
+    def _strip_markup(self, content: str) -> str:
+        """Removes HTML tags and markdown formatting, keeping the text.
+
+        Args:
+            content (str): post content.
+
+        Returns:
+            str: plain text.
+        """
+        if HTML_TAG_PATTERN.search(content):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", MarkupResemblesLocatorWarning)
+                content = BeautifulSoup(content, "html.parser").get_text()
+
+        content = html.unescape(content)
+        content = CODE_BLOCK_PATTERN.sub(self._collapse_code, content)
+        content = MARKDOWN_IMAGE_PATTERN.sub(r"\1", content)
+        content = MARKDOWN_LINK_PATTERN.sub(
+            lambda match: f"{match.group(1)} ({self._shorten_url(match.group(2))})",
+            content,
+        )
+        content = URL_PATTERN.sub(
+            lambda match: self._shorten_url(match.group(0)), content
+        )
+        content = MARKDOWN_EMPHASIS_PATTERN.sub("", content)
+        content = MARKDOWN_HEADING_PATTERN.sub("", content)
+
+        return MARKDOWN_QUOTE_PATTERN.sub("", content)
+
+    def _collapse_code(self, match: re.Match[str]) -> str:
+        """Replaces a code block with its first lines.
+
+        Args:
+            match (re.Match[str]): matched code block.
+
+        Returns:
+            str: shortened code block.
+        """
+        lines = [line for line in match.group(1).splitlines() if line.strip()]
+        kept = "\n".join(lines[: self._code_lines])
+        omitted = len(lines) - self._code_lines
+
+        return f"{kept}\n[{omitted} more lines of code]\n" if omitted > 0 else kept
+
+    @staticmethod
+    def _shorten_url(url: str) -> str:
+        """Replaces a URL with its domain, unless it is short already.
+
+        Args:
+            url (str): URL.
+
+        Returns:
+            str: shortened URL.
+        """
+        if len(url) <= 40:
+            return url
+
+        return f"[link: {urlsplit(url).netloc.removeprefix('www.')}]"
+
+    @staticmethod
+    def _collapse(content: str) -> str:
+        """Drops boilerplate and collapses whitespace.
+
+        Args:
+            content (str): plain text.
+
+        Returns:
+            str: compact text.
+        """
+        for pattern in BOILERPLATE_PATTERNS:
+            content = pattern.sub("", content)
+
+        content = HORIZONTAL_SPACE_PATTERN.sub(" ", content)
+        content = "\n".join(line.strip() for line in content.splitlines())
+
+        return BLANK_LINES_PATTERN.sub("\n\n", content).strip()
+
+    @staticmethod
+    def _truncate(content: str, token_budget: int) -> str:
+        """Truncates paragraphs so that the post fits the budget.
+
+        The budget is split by water-filling: paragraphs shorter than an equal share are kept whole and what they don't
+        use is shared among the longer ones, which keep their openings.
+
+        Args:
+            content (str): compact text.
+            token_budget (int): estimated number of tokens to fit in.
+
+        Returns:
+            str: truncated text.
+        """
+        paragraphs = content.split("\n\n")
+        budget = token_budget * CHARS_PER_TOKEN
+        limits = [0] * len(paragraphs)
+        remaining = sorted(range(len(paragraphs)), key=lambda i: len(paragraphs[i]))
+
+        while remaining:
+            share = budget // len(remaining)
+            index = remaining.pop(0)
+            limits[index] = min(len(paragraphs[index]), share)
+            budget -= limits[index]
+
+        return "\n\n".join(
+            PostNormalizer._cut(paragraph, limit)
+            for paragraph, limit in zip(paragraphs, limits)
+            if limit > 0
+        )
+
+    @staticmethod
+    def _cut(paragraph: str, limit: int) -> str:
+        """Cuts the paragraph to the limit at a word boundary.
+
+        Args:
+            paragraph (str): paragraph.
+            limit (int): maximum number of characters.
+
+        Returns:
+            str: cut paragraph.
+        """
+        if len(paragraph) <= limit:
+            return paragraph
+
+        cut = paragraph[: max(limit - len(TRUNCATION_MARK), 0)]
+        cut = cut.rsplit(" ", 1)[0] if " " in cut else cut
+
+        return cut + TRUNCATION_MARK
@@ -0,0 +1,401 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+R = TypeVar("R")
+TRANSIENT_STATUS_CODES = frozenset({408, 409})
+TRANSIENT_ERROR_NAMES = frozenset(
+    {"APIConnectionError", "APITimeoutError", "InternalServerError", "TransportError"}
+)
+
+
+class RateLimiterStats(BaseModel):
+    """Queue-wait and throttling metrics of a rate limiter."""
+
+    requests: int = Field(description="number of admitted requests")
+    waiting: int = Field(description="number of requests currently waiting")
+    total_wait_seconds: float = Field(description="total time spent waiting")
+    max_wait_seconds: float = Field(description="longest single wait")
+    rate_limit_errors: int = Field(description="number of 429 responses received")
+    transient_errors: int = Field(
+        default=0,
+        description="number of retried server and connection errors",
+    )
+
+    @property
+    def mean_wait_seconds(self) -> float:
+        """Average time a request waited for admission.
+
+        Returns:
+            float: mean wait in seconds, 0 if there were no requests.
+        """
+        return self.total_wait_seconds / self.requests if self.requests else 0.0
+
+
+class RateLimiter:
+    """Thread- and asyncio-safe token-bucket limiter of requests and tokens per minute, with adaptive backoff on 429 responses and retries of transient errors.
+
+    Chat models created by `api_crawler.models` have the provider SDK's retries disabled, so this is the only layer retrying
+    their calls.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+        max_retries: int = 6,
+        backoff_seconds: float = 1.0,
+        output_tokens: int = 256,
+    ) -> None:
+        """Initializes full buckets.
+
+        Args:
+            requests_per_minute (int | None, optional): request budget. Defaults to None, meaning unlimited.
+            tokens_per_minute (int | None, optional): token budget. Defaults to None, meaning unlimited.
+            max_retries (int, optional): how many times a rate-limited call or a call failing with a transient error is retried. Defaults to 6.
+            backoff_seconds (float, optional): initial backoff when the provider doesn't send Retry-After, and after transient errors. Defaults to 1.0.
+            output_tokens (int, optional): number of completion tokens reserved for each request. Defaults to 256.
+        """
+        self._requests_per_minute = requests_per_minute
+        self._tokens_per_minute = tokens_per_minute
+        self._max_retries = max_retries
+        self._backoff_seconds = backoff_seconds
+        self._output_tokens = output_tokens
+
+        self._lock = threading.Lock()
+        self._request_level = float(requests_per_minute or 0)
+        self._token_level = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+        self._requests = 0
+        self._waiting = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._rate_limit_errors = 0
+        self._transient_errors = 0
+
+    def run(self, call: Callable[[], R], tokens: int) -> R:
+        """Calls the provider once the budget allows it, retrying on rate limit and transient errors.
+
+        Args:
+            call (Callable[[], R]): provider call.
+            tokens (int): estimated number of prompt tokens.
+
+        Returns:
+            R: result of the call.
+        """
+        attempt = 0
+
+        while True:
+            self._sleep(self._reserve(tokens))
+            try:
+                return call()
+            except Exception as e:
+                backoff = self._handle_error(e, attempt)
+                if backoff is None:
+                    raise
+            self._sleep(backoff)
+            attempt += 1
+
+    async def arun(self, call: Callable[[], Awaitable[R]], tokens: int) -> R:
+        """Calls the provider asynchronously once the budget allows it, retrying on rate limit and transient errors.
+
+        Args:
+            call (Callable[[], Awaitable[R]]): provider call.
+            tokens (int): estimated number of prompt tokens.
+
+        Returns:
+            R: result of the call.
+        """
+        attempt = 0
+
+        while True:
+            await self._asleep(self._reserve(tokens))
+            try:
+                return await call()
+            except Exception as e:
+                backoff = self._handle_error(e, attempt)
+                if backoff is None:
+                    raise
+            await self._asleep(backoff)
+            attempt += 1
+
+    def penalize(self, delay: float) -> None:
+        """Pauses admission of all requests, e.g. after the provider answered with 429.
+
+        Args:
+            delay (float): pause in seconds.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._request_level = min(self._request_level, 0.0)
+            self._token_level = min(self._token_level, 0.0)
+
+    @property
+    def limited(self) -> bool:
+        """Whether the limiter has a request or token budget.
+
+        Returns:
+            bool: True if requests are limited.
+        """
+        return (
+            self._requests_per_minute is not None or self._tokens_per_minute is not None
+        )
+
+    def stats(self) -> RateLimiterStats:
+        """Returns queue-wait metrics.
+
+        Returns:
+            RateLimiterStats: limiter statistics.
+        """
+        with self._lock:
+            return RateLimiterStats(
+                requests=self._requests,
+                waiting=self._waiting,
+                total_wait_seconds=self._total_wait,
+                max_wait_seconds=self._max_wait,
+                rate_limit_errors=self._rate_limit_errors,
+                transient_errors=self._transient_errors,
+            )
+
+    def _reserve(self, tokens: int) -> float:
+        """Takes the request and its tokens out of the buckets, possibly into debt.
+
+        Args:
+            tokens (int): estimated number of prompt tokens.
+
+        Returns:
+            float: how long the caller has to wait before the reservation is covered.
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._updated = now
+            wait = max(0.0, self._paused_until - now)
+
+            if self._requests_per_minute:
+                rate = self._requests_per_minute / 60
+                self._request_level = min(
+                    self._requests_per_minute, self._request_level + elapsed * rate
+                )
+                self._request_level -= 1
+                wait = max(wait, -self._request_level / rate)
+
+            if self._tokens_per_minute:
+                rate = self._tokens_per_minute / 60
+                needed = min(tokens + self._output_tokens, self._tokens_per_minute)
+                self._token_level = min(
+                    self._tokens_per_minute, self._token_level + elapsed * rate
+                )
+                self._token_level -= needed
+                wait = max(wait, -self._token_level / rate)
+
+            self._requests += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+
+            return wait
+
+    def _handle_error(self, error: Exception, attempt: int) -> float | None:
+        """Backs off if the error is a rate limit or transient error that can still be retried.
+
+        Rate limit errors pause all requests (see `penalize`); transient errors only delay the retry of the failed call.
+
+        Args:
+            error (Exception): error raised by the provider call.
+            attempt (int): number of the failed attempt, starting from 0.
+
+        Returns:
+            float | None: time in seconds the caller waits before retrying, on top of the pause, or None if the error should be raised.
+        """
+        if attempt == self._max_retries:
+            return None
+
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = retry_after or self._backoff_seconds * 2**attempt
+
+            with self._lock:
+                self._rate_limit_errors += 1
+
+            logger.warning(
+                f"Rate limited by the provider, backing off for {delay:.1f}s."
+            )
+            self.penalize(delay)
+
+            return 0.0
+
+        if not _is_transient(error):
+            return None
+
+        delay = self._backoff_seconds * 2**attempt
+
+        with self._lock:
+            self._transient_errors += 1
+
+        logger.warning(f"Provider call failed: {error!r}, retrying in {delay:.1f}s.")
+
+        return delay
+
+    def _sleep(self, wait: float) -> None:
+        """Waits for the reservation, counting the caller as queued.
+
+        Args:
+            wait (float): time to wait in seconds.
+        """
+        if wait <= 0:
+            return
+
+        self._set_waiting(1)
+        try:
+            time.sleep(wait)
+        finally:
+            self._set_waiting(-1)
+
+    async def _asleep(self, wait: float) -> None:
+        """Waits for the reservation without blocking the event loop, counting the caller as queued.
+
+        Args:
+            wait (float): time to wait in seconds.
+        """
+        if wait <= 0:
+            return
+
+        self._set_waiting(1)
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            self._set_waiting(-1)
+
+    def _set_waiting(self, change: int) -> None:
+        """Updates the number of queued callers.
+
+        Args:
+            change (int): difference in the number of queued callers.
+        """
+        with self._lock:
+            self._waiting += change
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Recognizes rate limit errors of provider SDKs.
+
+    Args:
+        error (Exception): error raised by the provider call.
+
+    Returns:
+        float | None: value of the Retry-After header (0 if absent) or None if it's not a rate limit error.
+    """
+    response = getattr(error, "response", None)
+    status_code = getattr(error, "status_code", None) or getattr(
+        response, "status_code", None
+    )
+
+    if status_code != 429 and type(error).__name__ != "RateLimitError":
+        return None
+
+    headers = getattr(response, "headers", None) or {}
+
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        return float(headers.get("retry-after", 0))
+    except ValueError:
+        return 0.0
+
+
+def _is_transient(error: Exception) -> bool:
+    """Recognizes server and connection errors of provider SDKs that are worth retrying.
+
+    Args:
+        error (Exception): error raised by the provider call.
+
+    Returns:
+        bool: True if the call may succeed when retried.
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+
+    if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__):
+        return True
+
+    response = getattr(error, "response", None)
+    status_code = getattr(error, "status_code", None) or getattr(
+        response, "status_code", None
+    )
+
+    return isinstance(status_code, int) and (
+        status_code in TRANSIENT_STATUS_CODES or status_code >= 500
+    )
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> RateLimiter:
+    """Returns the process-wide limiter of the model, creating an unlimited one if none was set.
+
+    Args:
+        model (str): ID of the foundation model.
+
+    Returns:
+        RateLimiter: shared limiter.
+    """
+    with _limiters_lock:
+        return _limiters.setdefault(model, RateLimiter())
+
+
+def set_rate_limiter(model: str, limiter: RateLimiter) -> None:
+    """Sets the process-wide limiter of the model. Agents created afterwards go through it.
+
+    Args:
+        model (str): ID of the foundation model.
+        limiter (RateLimiter): limiter to share.
+    """
+    with _limiters_lock:
+        _limiters[model] = limiter
+
+
+def configure_rate_limiter(
+    model: str,
+    requests_per_minute: int | None = None,
+    tokens_per_minute: int | None = None,
+) -> RateLimiter:
+    """Returns the process-wide limiter of the model, installing one with the budgets if the model has no limited one yet.
+
+    A limiter with budgets is never replaced, so crawlers sharing a process share its buckets and statistics.
+
+    Args:
+        model (str): ID of the foundation model.
+        requests_per_minute (int | None, optional): request budget. Defaults to None, meaning unlimited.
+        tokens_per_minute (int | None, optional): token budget. Defaults to None, meaning unlimited.
+
+    Returns:
+        RateLimiter: shared limiter.
+    """
+    limited = requests_per_minute is not None or tokens_per_minute is not None
+
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is not None and limiter.limited:
+            if limited and (
+                limiter._requests_per_minute,
+                limiter._tokens_per_minute,
+            ) != (requests_per_minute, tokens_per_minute):
+                logger.warning(
+                    f"Rate limiter of {model} is already set, ignoring new budgets."
+                )
+            return limiter
+
+        if limiter is None or limited:
+            limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+            _limiters[model] = limiter
+
+        return limiter
@@ -0,0 +1,252 @@
+import logging
+import re
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = frozenset(
+    {
+        "a",
+        "about",
+        "above",
+        "after",
+        "again",
+        "all",
+        "also",
+        "am",
+        "an",
+        "and",
+        "any",
+        "are",
+        "as",
+        "at",
+        "be",
+        "because",
+        "been",
+        "before",
+        "being",
+        "below",
+        "between",
+        "both",
+        "but",
+        "by",
+        "can",
+        "could",
+        "did",
+        "do",
+        "does",
+        "doing",
+        "don",
+        "down",
+        "during",
+        "each",
+        "few",
+        "for",
+        "from",
+        "further",
+        "had",
+        "has",
+        "have",
+        "having",
+        "he",
+        "her",
+        "here",
+        "hers",
+        "him",
+        "his",
+        "how",
+        "i",
+        "if",
+        "in",
+        "into",
+        "is",
+        "it",
+        "its",
+        "itself",
+        "just",
+        "me",
+        "more",
+        "most",
+        "my",
+        "no",
+        "nor",
+        "not",
+        "now",
+        "of",
+        "off",
+        "on",
+        "once",
+        "only",
+        "or",
+        "other",
+        "our",
+        "ours",
+        "out",
+        "over",
+        "own",
+        "same",
+        "she",
+        "should",
+        "so",
+        "some",
+        "such",
+        "than",
+        "that",
+        "the",
+        "their",
+        "them",
+        "then",
+        "there",
+        "these",
+        "they",
+        "this",
+        "those",
+        "through",
+        "to",
+        "too",
+        "under",
+        "until",
+        "up",
+        "very",
+        "was",
+        "we",
+        "were",
+        "what",
+        "when",
+        "where",
+        "which",
+        "while",
+        "who",
+        "whom",
+        "why",
+        "will",
+        "with",
+        "would",
+        "you",
+        "your",
+        "yours",
+    }
+)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits the text into lowercase terms, dropping stopwords and single characters.
+
+    Args:
+        text (str): text to split.
+
+    Returns:
+        list[str]: terms.
+    """
+    return [
+        term
+        for term in TOKEN_PATTERN.findall(text.lower())
+        if len(term) > 1 and term not in STOPWORDS
+    ]
+
+
+class RelevanceFilter:
+    """Cheap local relevance scoring of search results against the product description and tags.
+
+    Scores are TF-IDF cosine similarities in [0, 1], computed with NumPy for the whole batch of results at once.
+    """
+
+    def __init__(
+        self,
+        description: str,
+        tags: list[str],
+        threshold: float | None = 0.0,
+        min_results: int = 3,
+        tag_weight: float = 3.0,
+    ) -> None:
+        """Builds the reference term weights.
+
+        Args:
+            description (str): description of the product.
+            tags (list[str]): list of important tags, weighted higher than the description.
+            threshold (float | None, optional): results scoring at or below it are pruned. Defaults to 0.0, meaning results sharing no terms with the reference. None disables pruning, results are only ranked.
+            min_results (int, optional): number of best results kept even if they score below the threshold. Defaults to 3.
+            tag_weight (float, optional): weight of tag terms relative to description terms. Defaults to 3.0.
+        """
+        self._threshold = threshold
+        self._min_results = min_results
+
+        self._reference: dict[str, float] = {}
+        for term in tokenize(description):
+            self._reference[term] = self._reference.get(term, 0.0) + 1.0
+        self._reference = {
+            term: 1.0 + np.log(count) for term, count in self._reference.items()
+        }
+        for term in tokenize(" ".join(tags)):
+            self._reference[term] = self._reference.get(term, 0.0) + tag_weight
+
+    def score(self, texts: list[str]) -> np.ndarray:
+        """Scores the texts against the reference.
+
+        Args:
+            texts (list[str]): texts to score.
+
+        Returns:
+            np.ndarray: cosine similarities, one per text.
+        """
+        if not texts:
+            return np.zeros(0)
+
+        documents = [tokenize(text) for text in texts]
+        vocabulary = {
+            term: index
+            for index, term in enumerate(
+                dict.fromkeys(
+                    [*self._reference, *(term for doc in documents for term in doc)]
+                )
+            )
+        }
+
+        counts = np.zeros((len(documents), len(vocabulary)))
+        for row, document in enumerate(documents):
+            np.add.at(counts[row], [vocabulary[term] for term in document], 1.0)
+
+        document_frequency = np.count_nonzero(counts, axis=0)
+        idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+
+        weights = np.zeros_like(counts)
+        np.log(counts, out=weights, where=counts > 0)
+        weights = np.where(counts > 0, weights + 1.0, 0.0) * idf
+
+        reference = np.zeros(len(vocabulary))
+        for term, weight in self._reference.items():
+            reference[vocabulary[term]] = weight
+        reference *= idf
+
+        norms = np.linalg.norm(weights, axis=1) * np.linalg.norm(reference)
+        return np.divide(
+            weights @ reference, norms, out=np.zeros(len(documents)), where=norms > 0
+        )
+
+    def filter(self, results: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Ranks search results by relevance of their titles and prunes the ones below the threshold.
+
+        Args:
+            results (list[dict[str, Any]]): search results with a `title`.
+
+        Returns:
+            list[dict[str, Any]]: relevant results, best first.
+        """
+        scores = self.score([str(result.get("title", "")) for result in results])
+        order = np.argsort(-scores, kind="stable")
+
+        kept = [
+            results[index]
+            for rank, index in enumerate(order)
+            if self._threshold is None
+            or scores[index] > self._threshold
+            or rank < self._min_results
+        ]
+
+        if len(kept) < len(results):
+            logger.info(f"Pruned {len(results) - len(kept)} irrelevant search results.")
+
+        return kept
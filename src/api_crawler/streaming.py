@@ -0,0 +1,113 @@
+import asyncio
+import queue
+import threading
+from enum import Enum
+from typing import AsyncIterator, Callable, Iterator
+
+from pydantic import BaseModel, Field
+
+_DONE = object()
+
+
+class CrawlEventType(str, Enum):
+    NODE_STARTED = "NODE_STARTED"
+    NODE_FINISHED = "NODE_FINISHED"
+    POSTS_LOADED = "POSTS_LOADED"
+    CRITIQUES_DONE = "CRITIQUES_DONE"
+    RUN_FINISHED = "RUN_FINISHED"
+    RUN_FAILED = "RUN_FAILED"
+
+
+class CrawlEvent(BaseModel):
+    """Progress event emitted while crawling."""
+
+    type: CrawlEventType = Field(description="kind of the event")
+    scraper: str = Field(description="scraper of the agent emitting the event")
+    run_id: int = Field(description="ID of the agent run")
+    node: str | None = Field(default=None, description="graph node concerned")
+    count: int | None = Field(
+        default=None, description="number of loaded posts or critiques"
+    )
+    error: str | None = Field(default=None, description="error that ended the run")
+
+
+async def merge_streams[T](streams: list[AsyncIterator[T]]) -> AsyncIterator[T]:
+    """Yields items of all streams as soon as any of them produces one.
+
+    Args:
+        streams (list[AsyncIterator[T]]): streams to merge.
+
+    Yields:
+        T: items in order of arrival.
+    """
+    items: asyncio.Queue = asyncio.Queue()
+
+    async def drain(stream: AsyncIterator[T]) -> None:
+        """Moves items of the stream to the shared queue.
+
+        Args:
+            stream (AsyncIterator[T]): stream to drain.
+        """
+        try:
+            async for item in stream:
+                await items.put(item)
+        finally:
+            await items.put(_DONE)
+
+    tasks = [asyncio.create_task(drain(stream)) for stream in streams]
+
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await items.get()
+            if item is _DONE:
+                remaining -= 1
+            else:
+                yield item
+
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def iterate_in_thread[T](stream_factory: Callable[[], AsyncIterator[T]]) -> Iterator[T]:
+    """Drives an asynchronous stream on an event loop in a background thread and yields its items synchronously.
+
+    Closing the iterator cancels the stream.
+
+    Args:
+        stream_factory (Callable[[], AsyncIterator[T]]): creates the stream to drive.
+
+    Yields:
+        T: items of the stream.
+    """
+    items: queue.Queue = queue.Queue()
+    loop = asyncio.new_event_loop()
+
+    async def pump() -> None:
+        """Moves items of the stream to the thread-safe queue."""
+        try:
+            async for item in stream_factory():
+                items.put(item)
+        finally:
+            items.put(_DONE)
+
+    task = loop.create_task(pump())
+    thread = threading.Thread(
+        target=loop.run_until_complete, args=(asyncio.wait({task}),), daemon=True
+    )
+    thread.start()
+
+    try:
+        while (item := items.get()) is not _DONE:
+            yield item
+
+        thread.join()
+        task.result()
+    finally:
+        loop.call_soon_threadsafe(task.cancel)
+        thread.join()
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
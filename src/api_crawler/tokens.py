@@ -0,0 +1,31 @@
+from langchain_core.messages import AnyMessage
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of tokens in the text without loading a tokenizer.
+
+    Args:
+        text (str): text to measure.
+
+    Returns:
+        int: estimated number of tokens.
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def estimate_message_tokens(messages: list[AnyMessage]) -> int:
+    """Estimates the number of prompt tokens of a list of messages.
+
+    Args:
+        messages (list[AnyMessage]): messages to measure.
+
+    Returns:
+        int: estimated number of tokens.
+    """
+    return sum(
+        estimate_tokens(str(message.content)) + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
@@ -0,0 +1,113 @@
+import logging
+import threading
+
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+
+class TokenUsage(BaseModel):
+    """Token usage of LLM calls, split into cached and uncached input."""
+
+    calls: int = Field(default=0, description="number of LLM calls")
+    input_tokens: int = Field(default=0, description="total input tokens")
+    cached_input_tokens: int = Field(
+        default=0, description="input tokens served from the provider's prompt cache"
+    )
+    output_tokens: int = Field(default=0, description="total output tokens")
+
+    @property
+    def uncached_input_tokens(self) -> int:
+        """Input tokens billed at the full price.
+
+        Returns:
+            int: uncached input tokens.
+        """
+        return self.input_tokens - self.cached_input_tokens
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Fraction of input tokens served from the prompt cache.
+
+        Returns:
+            float: cached fraction, 0 if there was no input.
+        """
+        return (
+            self.cached_input_tokens / self.input_tokens if self.input_tokens else 0.0
+        )
+
+    def __add__(self, other: "TokenUsage") -> "TokenUsage":
+        """Sums two usages.
+
+        Args:
+            other (TokenUsage): usage to add.
+
+        Returns:
+            TokenUsage: total usage.
+        """
+        return TokenUsage(
+            calls=self.calls + other.calls,
+            input_tokens=self.input_tokens + other.input_tokens,
+            cached_input_tokens=self.cached_input_tokens + other.cached_input_tokens,
+            output_tokens=self.output_tokens + other.output_tokens,
+        )
+
+
+def message_usage(message: AIMessage) -> TokenUsage:
+    """Reads token usage reported by the provider for a single call.
+
+    Args:
+        message (AIMessage): raw model response.
+
+    Returns:
+        TokenUsage: usage of the call, with zero tokens if the provider didn't report it.
+    """
+    usage = message.usage_metadata or {}
+    details = usage.get("input_token_details") or {}
+
+    return TokenUsage(
+        calls=1,
+        input_tokens=usage.get("input_tokens", 0),
+        cached_input_tokens=details.get("cache_read", 0),
+        output_tokens=usage.get("output_tokens", 0),
+    )
+
+
+class UsageTracker:
+    """Thread-safe accumulator of token usage."""
+
+    def __init__(self, name: str) -> None:
+        """Initializes empty usage.
+
+        Args:
+            name (str): name used in log messages.
+        """
+        self._name = name
+        self._usage = TokenUsage()
+        self._lock = threading.Lock()
+
+    def record(self, message: AIMessage) -> None:
+        """Records usage of a single call.
+
+        Args:
+            message (AIMessage): raw model response.
+        """
+        usage = message_usage(message)
+
+        logger.debug(
+            f"{self._name}: LLM call used {usage.uncached_input_tokens} uncached and "
+            f"{usage.cached_input_tokens} cached input tokens, {usage.output_tokens} output tokens."
+        )
+
+        with self._lock:
+            self._usage += usage
+
+    def total(self) -> TokenUsage:
+        """Returns the accumulated usage.
+
+        Returns:
+            TokenUsage: usage of all recorded calls.
+        """
+        with self._lock:
+            return self._usage.model_copy()
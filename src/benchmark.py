@@ -0,0 +1,163 @@
+import argparse
+import itertools
+import logging
+import time
+
+from dotenv import load_dotenv
+from langchain.chat_models import init_chat_model
+from langchain_core.language_models import BaseChatModel
+
+import config
+from api_crawler import BaseScraper, Crawler
+from harness import Fixture, Recorder, ReplayChatModel, ReplayScraper
+from scrapers import CommentFetchMode, SubredditScraper
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+
+def build_crawler(
+    model: str | BaseChatModel, scrapers: list[BaseScraper], iterations: int
+) -> Crawler:
+    """Creates a crawler configured as in `src/config.py`, without persistent caches, so runs are comparable.
+
+    Args:
+        model (str | BaseChatModel): ID of the foundation model or a ready chat model.
+        scrapers (list[BaseScraper]): list of scrapers to use.
+        iterations (int): number of runs for each agent.
+
+    Returns:
+        Crawler: crawler.
+    """
+    return Crawler(
+        model,
+        iterations,
+        config.AGENT_MIN_ITERATIONS,
+        config.AGENT_MAX_ITERATIONS,
+        config.DESCRIPTION_PROMPT,
+        config.SEARCH_SEARCH_PROMPT,
+        config.SEARCH_SELECT_PROMPT,
+        config.SEARCH_DECIDE_LOOP_PROMPT,
+        config.CRITIC_INTRODUCTION_PROMPT,
+        config.SELECTOR_INTRODUCTION_PROMPT,
+        config.TAGS,
+        scrapers,
+        fan_in=config.SEARCH_FAN_IN,
+        prefilter=config.PREFILTER,
+        prefilter_threshold=config.PREFILTER_THRESHOLD,
+        history_token_budget=config.HISTORY_TOKEN_BUDGET,
+        critique_batch_token_budget=config.CRITIQUE_BATCH_TOKEN_BUDGET,
+        selection_chunk_size=config.SELECTION_CHUNK_SIZE,
+        normalize_posts=config.NORMALIZE_POSTS,
+        post_token_budget=config.POST_TOKEN_BUDGET,
+        min_iteration_yield=config.MIN_ITERATION_YIELD,
+        llm_loop_decision=config.LLM_LOOP_DECISION,
+        planner_introduction_prompt=(
+            config.PLANNER_INTRODUCTION_PROMPT if config.PLAN_QUERIES else None
+        ),
+    )
+
+
+def record(path: str) -> None:
+    """Runs a live crawl and records its LLM calls and Reddit traffic.
+
+    Args:
+        path (str): path of the fixture file.
+    """
+    load_dotenv()
+
+    recorder = Recorder()
+    model = init_chat_model(config.MODEL, callbacks=[recorder.callback()])
+    scrapers: list[BaseScraper] = [
+        recorder.wrap(
+            SubredditScraper(
+                subreddit=subreddit,
+                timescope=config.TIMESCOPE,
+                comment_mode=CommentFetchMode(config.COMMENT_MODE),
+            )
+        )
+        for subreddit in config.SUBREDDITS
+    ]
+
+    build_crawler(model, scrapers, config.ITERATIONS).run()
+    recorder.save(path)
+
+
+def bench(
+    path: str,
+    scraper_counts: list[int],
+    iterations: list[int],
+    llm_latency: float,
+    scraper_latency: float,
+) -> None:
+    """Replays a recorded crawl for every combination of scraper count and iterations, and prints the metrics.
+
+    Args:
+        path (str): path of the fixture file.
+        scraper_counts (list[int]): numbers of scrapers, cycling through the recorded ones.
+        iterations (list[int]): numbers of runs for each agent.
+        llm_latency (float): seconds each LLM call takes.
+        scraper_latency (float): seconds each search and load takes.
+    """
+    fixture = Fixture.load(path)
+
+    print(
+        "scrapers\titerations\twall_s\tllm_calls\tinput\tcached\toutput\tsearches\tloads\tposts"
+    )
+
+    for count, runs in itertools.product(scraper_counts, iterations):
+        model = ReplayChatModel(fixture=fixture, latency=llm_latency)
+        scrapers = [
+            ReplayScraper(recorded, scraper_latency, name=f"{recorded.name}#{i}")
+            for i, recorded in zip(range(count), itertools.cycle(fixture.scrapers))
+        ]
+        crawler = build_crawler(model, scrapers, runs)
+
+        start = time.perf_counter()
+        results = crawler.run()
+        elapsed = time.perf_counter() - start
+
+        usage = crawler.usage()
+        print(
+            f"{count}\t{runs}\t{elapsed:.2f}\t{model.calls}\t{usage.input_tokens}\t"
+            f"{usage.cached_input_tokens}\t{usage.output_tokens}\t"
+            f"{sum(scraper.searches for scraper in scrapers)}\t"
+            f"{sum(scraper.loads for scraper in scrapers)}\t{len(results)}"
+        )
+
+
+def main():
+    """Records crawls and benchmarks the crawler offline against the recordings."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="record a live crawl")
+    record_parser.add_argument("fixture", help="path of the fixture file to write")
+
+    bench_parser = commands.add_parser("bench", help="replay a recorded crawl")
+    bench_parser.add_argument("fixture", help="path of the fixture file to read")
+    bench_parser.add_argument("--scrapers", type=int, nargs="+", default=[1, 2, 4])
+    bench_parser.add_argument("--iterations", type=int, nargs="+", default=[1, 2, 3])
+    bench_parser.add_argument("--llm-latency", type=float, default=0.5)
+    bench_parser.add_argument("--scraper-latency", type=float, default=0.2)
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.fixture)
+    else:
+        bench(
+            args.fixture,
+            args.scrapers,
+            args.iterations,
+            args.llm_latency,
+            args.scraper_latency,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,42 @@
 import datetime
 
 MODEL = "openai:gpt-4o"
+MODEL_REQUESTS_PER_MINUTE = 500
+MODEL_TOKENS_PER_MINUTE = 30_000
+MODELS = {
+    "SearchAgent.SELECT_POST": "openai:gpt-4o-mini",
+    "SearchAgent.DECIDE_LOOP": "openai:gpt-4o-mini",
+}
+CRITIC_SCREENING_MODEL = "openai:gpt-4o-mini"
+CRITIC_ESCALATION_SCORE = 4
 
 TIMESCOPE = datetime.timedelta(days=1)
+COMMENT_MODE = "light"
+
+CACHE_PATH = "cache.sqlite3"
+METRICS_PATH = "metrics.json"
+CHECKPOINT_PATH = "checkpoints.sqlite3"
+CRAWL_ID = None
+POST_CACHE_TTL = datetime.timedelta(days=2)
+POST_CACHE_MAX_SIZE_BYTES = 64 * 1024 * 1024
+CRITIQUE_CACHE_TTL = datetime.timedelta(days=7)
+SEARCH_CACHE_TTL = TIMESCOPE / 24
+SEARCH_CACHE_MAX_SIZE_BYTES = 16 * 1024 * 1024
+INCREMENTAL = True
+PREFILTER = True
+PREFILTER_THRESHOLD = 0.0
+HISTORY_TOKEN_BUDGET = 8000
+CRITIQUE_BATCH_TOKEN_BUDGET = 6000
+SELECTION_CHUNK_SIZE = 20
+NORMALIZE_POSTS = True
+POST_TOKEN_BUDGET = 1500
 
 ITERATIONS = 3
 AGENT_MIN_ITERATIONS = 3
 AGENT_MAX_ITERATIONS = 5
+MIN_ITERATION_YIELD = 1.0
+LLM_LOOP_DECISION = False
+PLAN_QUERIES = True
 
 TAGS = [
     "executorch",
@@ -26,6 +56,8 @@ SUBREDDITS = [
     "LocalLLM",
 ]
 
+SEARCH_FAN_IN = False
+
 SEARCH_SEARCH_PROMPT = """Search, using the available tool, for posts where we could advertise our products - that is, where users may need our tool, not just on similar topics."""
 
 SEARCH_SELECT_PROMPT = """From posts found above - if there are any - pick posts to load that are likely to be good places to advertise our product - that is, where users may need our tool, not just on similar topics. Remember, we are ONLY interested in mobile/edge."""
@@ -36,6 +68,8 @@ CRITIC_INTRODUCTION_PROMPT = """You are a critic designed to judge the suitabili
 
 SELECTOR_INTRODUCTION_PROMPT = """You are a selector designed to pick from a list of posts and their critiques. You're supposed to pick these ones, which are suitable to advertise our product - there's no guarantee that any post is. Post talking about similar topics is not enough, the post should be a place where our tool may help someone. Base your judgment on the provided critiques. """
 
+PLANNER_INTRODUCTION_PROMPT = """You are a planner designing search queries for the whole search, which are split between many searchers. Make the queries diverse - each should target a different need, problem, use case or phrasing of users who may need our tool, not just posts on similar topics - and never repeat a query with the words reordered. Keep them short, like the ones people type into a Reddit search. Remember, we are ONLY interested in mobile/edge."""
+
 DESCRIPTION_PROMPT = """THE LIBRARY IS STRICTLY FOR MOBILE DEVICES, not just any local AI
 
 React Native ExecuTorch is a declarative way to run AI models in React Native on device, powered by ExecuTorch 🚀.
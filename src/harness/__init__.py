@@ -0,0 +1,13 @@
+from harness.fixtures import Fixture, RecordedCall, RecordedScraper
+from harness.recorder import Recorder, RecordingScraper
+from harness.replay import ReplayChatModel, ReplayScraper
+
+__all__ = [
+    "Fixture",
+    "RecordedCall",
+    "RecordedScraper",
+    "Recorder",
+    "RecordingScraper",
+    "ReplayChatModel",
+    "ReplayScraper",
+]
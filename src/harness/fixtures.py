@@ -0,0 +1,113 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage
+from pydantic import BaseModel, Field
+
+
+class RecordedCall(BaseModel):
+    """Single recorded LLM call."""
+
+    key: str = Field(description="hash of the prompt and the bound tools")
+    tools: list[str] = Field(description="names of the tools bound to the call")
+    response: dict[str, Any] = Field(description="serialized AIMessage response")
+
+
+class RecordedScraper(BaseModel):
+    """Recorded traffic of a single scraper."""
+
+    name: str = Field(description="string representation of the scraper")
+    searches: dict[str, str] = Field(
+        default_factory=dict, description="search results by query"
+    )
+    posts: dict[str, str] = Field(
+        default_factory=dict, description="loaded posts by post ID"
+    )
+
+
+class Fixture(BaseModel):
+    """Recorded LLM calls and scraper traffic of a crawl."""
+
+    calls: list[RecordedCall] = Field(default_factory=list)
+    scrapers: list[RecordedScraper] = Field(default_factory=list)
+
+    def save(self, path: str | Path) -> None:
+        """Writes the fixture to a JSON file.
+
+        Args:
+            path (str | Path): path of the file.
+        """
+        Path(path).write_text(self.model_dump_json(indent=2))
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Fixture":
+        """Reads a fixture from a JSON file.
+
+        Args:
+            path (str | Path): path of the file.
+
+        Returns:
+            Fixture: recorded traffic.
+        """
+        return cls.model_validate_json(Path(path).read_text())
+
+
+def tool_names(tools: list[Any] | None) -> list[str]:
+    """Extracts the names of tools bound to a call, in any of the provider formats.
+
+    Args:
+        tools (list[Any] | None): bound tools.
+
+    Returns:
+        list[str]: sorted tool names.
+    """
+    names = []
+
+    for tool in tools or []:
+        if isinstance(tool, dict):
+            names.append(tool.get("function", tool).get("name", ""))
+        else:
+            names.append(getattr(tool, "name", type(tool).__name__))
+
+    return sorted(names)
+
+
+def call_key(messages: list[BaseMessage], tools: list[str]) -> str:
+    """Hashes a call into a key that doesn't depend on random message and tool call IDs.
+
+    Args:
+        messages (list[BaseMessage]): prompt of the call.
+        tools (list[str]): names of the bound tools.
+
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    canonical = [
+        [
+            message.type,
+            message.content,
+            [
+                [tool_call["name"], tool_call["args"]]
+                for tool_call in getattr(message, "tool_calls", [])
+            ],
+        ]
+        for message in messages
+    ]
+
+    return hashlib.sha256(
+        json.dumps([canonical, tools], sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def response_message(call: RecordedCall) -> AIMessage:
+    """Deserializes the response of a recorded call.
+
+    Args:
+        call (RecordedCall): recorded call.
+
+    Returns:
+        AIMessage: response.
+    """
+    return AIMessage.model_validate(call.response)
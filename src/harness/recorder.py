@@ -0,0 +1,235 @@
+import logging
+import threading
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.tools import BaseTool, StructuredTool
+
+from api_crawler import BaseScraper
+from harness.fixtures import (
+    Fixture,
+    RecordedCall,
+    RecordedScraper,
+    call_key,
+    tool_names,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Recorder:
+    """Records LLM calls and scraper traffic of live crawls into a fixture."""
+
+    def __init__(self) -> None:
+        """Initializes an empty fixture."""
+        self._fixture = Fixture()
+        self._lock = threading.Lock()
+
+    def callback(self) -> BaseCallbackHandler:
+        """Creates a callback handler recording the calls of a chat model, e.g. `init_chat_model(model, callbacks=[recorder.callback()])`.
+
+        Returns:
+            BaseCallbackHandler: recording handler.
+        """
+        return _RecordingCallback(self)
+
+    def wrap(self, scraper: BaseScraper) -> BaseScraper:
+        """Wraps the scraper so that its searches and loaded posts are recorded.
+
+        Args:
+            scraper (BaseScraper): live scraper.
+
+        Returns:
+            BaseScraper: recording scraper.
+        """
+        recorded = RecordedScraper(name=str(scraper))
+
+        with self._lock:
+            self._fixture.scrapers.append(recorded)
+
+        return RecordingScraper(scraper, recorded, self._lock)
+
+    def add_call(self, call: RecordedCall) -> None:
+        """Adds a recorded LLM call.
+
+        Args:
+            call (RecordedCall): recorded call.
+        """
+        with self._lock:
+            self._fixture.calls.append(call)
+
+    def save(self, path: str | Path) -> None:
+        """Writes everything recorded so far to a JSON file.
+
+        Args:
+            path (str | Path): path of the file.
+        """
+        with self._lock:
+            self._fixture.save(path)
+
+        logger.info(
+            f"Recorded {len(self._fixture.calls)} LLM calls and {len(self._fixture.scrapers)} scrapers to {path}."
+        )
+
+
+class _RecordingCallback(BaseCallbackHandler):
+    """Callback handler pairing chat model prompts with their responses."""
+
+    def __init__(self, recorder: Recorder) -> None:
+        """Initializes the handler.
+
+        Args:
+            recorder (Recorder): recorder to write to.
+        """
+        self._recorder = recorder
+        self._pending: dict[UUID, tuple[str, list[str]]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        """Remembers the prompt of a call."""
+        tools = tool_names(kwargs.get("invocation_params", {}).get("tools"))
+
+        with self._lock:
+            self._pending[run_id] = (call_key(messages[0], tools), tools)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        """Records the response of a call."""
+        with self._lock:
+            pending = self._pending.pop(run_id, None)
+
+        if pending is None:
+            return
+
+        key, tools = pending
+        message = response.generations[0][0].message
+        self._recorder.add_call(
+            RecordedCall(key=key, tools=tools, response=message.model_dump())
+        )
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        """Forgets the prompt of a failed call."""
+        with self._lock:
+            self._pending.pop(run_id, None)
+
+
+class RecordingScraper(BaseScraper):
+    """Scraper recording the searches and posts of a live scraper."""
+
+    def __init__(
+        self, scraper: BaseScraper, recorded: RecordedScraper, lock: threading.Lock
+    ) -> None:
+        """Initializes the scraper.
+
+        Args:
+            scraper (BaseScraper): live scraper.
+            recorded (RecordedScraper): record to write to.
+            lock (threading.Lock): lock guarding the record.
+        """
+        super().__init__(scraper._timescope)
+        self._scraper = scraper
+        self._recorded = recorded
+        self._lock = lock
+
+    def get_searcher(self) -> BaseTool:
+        """Wraps the search tool of the live scraper.
+
+        Returns:
+            BaseTool: recording search tool.
+        """
+        tool = self._scraper.get_searcher()
+
+        def search(query: str) -> str:
+            """Searches for posts on the topic.
+
+            Args:
+                query (str): query to search for.
+
+            Returns:
+                str: found posts.
+            """
+            result = tool.invoke({"query": query})
+            with self._lock:
+                self._recorded.searches[query] = result
+            return result
+
+        return StructuredTool.from_function(
+            func=search,
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+        )
+
+    def get_post_id(self, url: str) -> str:
+        """Returns the post ID of the live scraper.
+
+        Args:
+            url (str): url of the post.
+
+        Returns:
+            str: post ID.
+        """
+        return self._scraper.get_post_id(url)
+
+    def fingerprint(self, content: str) -> int | None:
+        """Returns the fingerprint of the live scraper.
+
+        Args:
+            content (str): loaded post.
+
+        Returns:
+            int | None: fingerprint.
+        """
+        return self._scraper.fingerprint(content)
+
+    def _load_many(self, urls: list[str]) -> list[str | Exception]:
+        """Loads posts with the live scraper and records them.
+
+        Args:
+            urls (list[str]): urls of the posts to load.
+
+        Returns:
+            list[str | Exception]: loaded posts or errors.
+        """
+        contents = self._scraper._load_many(urls)
+
+        with self._lock:
+            for url, content in zip(urls, contents):
+                if not isinstance(content, Exception):
+                    self._recorded.posts[self.get_post_id(url)] = content
+
+        return contents
+
+    def _load(self, url: str) -> str:
+        """Loads a post with the live scraper and records it.
+
+        Args:
+            url (str): url of the post to load.
+
+        Returns:
+            str: loaded post.
+        """
+        content = self._load_many([url])[0]
+        if isinstance(content, Exception):
+            raise content
+        return content
+
+    def __str__(self) -> str:
+        """Returns string representation of the live scraper.
+
+        Returns:
+            str: string representation of the scraper
+        """
+        return str(self._scraper)
@@ -0,0 +1,230 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+from typing import Any, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool, StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+from api_crawler import BaseScraper
+from harness.fixtures import (
+    Fixture,
+    RecordedCall,
+    RecordedScraper,
+    call_key,
+    response_message,
+    tool_names,
+)
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model answering with responses recorded in a fixture, with injected latency.
+
+    Calls are matched by their prompt and bound tools. Unless strict, a call that wasn't recorded gets the next
+    recorded response with the same tools, in a round-robin fashion, so replays survive small prompt changes.
+    """
+
+    fixture: Fixture
+    latency: float = 0.0
+    strict: bool = False
+
+    _by_key: dict[str, RecordedCall] = PrivateAttr(default_factory=dict)
+    _by_tools: dict[str, Any] = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+
+    def model_post_init(self, context: Any) -> None:
+        """Indexes the recorded calls."""
+        grouped: dict[str, list[RecordedCall]] = {}
+
+        for call in self.fixture.calls:
+            self._by_key.setdefault(call.key, call)
+            grouped.setdefault(json.dumps(call.tools), []).append(call)
+
+        self._by_tools = {
+            tools: itertools.cycle(calls) for tools, calls in grouped.items()
+        }
+
+    @property
+    def _llm_type(self) -> str:
+        """Type of the model."""
+        return "replay"
+
+    @property
+    def calls(self) -> int:
+        """Number of calls answered so far.
+
+        Returns:
+            int: number of calls.
+        """
+        return self._calls
+
+    def bind_tools(
+        self, tools: Sequence[dict[str, Any] | type | BaseTool], **kwargs: Any
+    ) -> Runnable:
+        """Binds tools the way provider models do, so that tool calling and structured output work.
+
+        Args:
+            tools (Sequence[dict[str, Any] | type | BaseTool]): tools to bind.
+
+        Returns:
+            Runnable: model with bound tools.
+        """
+        return self.bind(
+            tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Answers with the recorded response after the injected latency."""
+        time.sleep(self.latency)
+
+        return self._replay(messages, kwargs.get("tools"))
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Answers asynchronously with the recorded response after the injected latency."""
+        await asyncio.sleep(self.latency)
+
+        return self._replay(messages, kwargs.get("tools"))
+
+    def _replay(
+        self, messages: list[BaseMessage], tools: list[Any] | None
+    ) -> ChatResult:
+        """Finds the recorded response of a call.
+
+        Args:
+            messages (list[BaseMessage]): prompt of the call.
+            tools (list[Any] | None): bound tools.
+
+        Raises:
+            LookupError: if there's no matching recorded call.
+
+        Returns:
+            ChatResult: response.
+        """
+        names = tool_names(tools)
+
+        with self._lock:
+            self._calls += 1
+            call = self._by_key.get(call_key(messages, names))
+
+            if call is None and not self.strict and json.dumps(names) in self._by_tools:
+                call = next(self._by_tools[json.dumps(names)])
+
+        if call is None:
+            raise LookupError(
+                f"No recorded call with tools {names} matches the prompt."
+            )
+
+        return ChatResult(generations=[ChatGeneration(message=response_message(call))])
+
+
+class ReplayScraper(BaseScraper):
+    """Scraper serving searches and posts recorded in a fixture, with injected latency."""
+
+    def __init__(
+        self, recorded: RecordedScraper, latency: float = 0.0, name: str | None = None
+    ) -> None:
+        """Initializes the scraper.
+
+        Args:
+            recorded (RecordedScraper): recorded traffic of a scraper.
+            latency (float, optional): seconds each search and load takes. Defaults to 0.0.
+            name (str | None, optional): string representation of the scraper. Defaults to None, meaning the recorded one.
+        """
+        super().__init__()
+        self._recorded = recorded
+        self._latency = latency
+        self._name = name if name is not None else recorded.name
+        self._searches = itertools.cycle(recorded.searches.values() or ["No results."])
+        self._lock = threading.Lock()
+        self.searches = 0
+        self.loads = 0
+
+    def get_searcher(self) -> BaseTool:
+        """Creates a tool serving recorded searches.
+
+        Unknown queries get the next recorded result in a round-robin fashion.
+
+        Returns:
+            BaseTool: search tool.
+        """
+
+        def search(query: str) -> str:
+            """Searches for posts on the topic.
+
+            Args:
+                query (str): query to search for.
+
+            Returns:
+                str: found posts.
+            """
+            time.sleep(self._latency)
+            with self._lock:
+                self.searches += 1
+                result = self._recorded.searches.get(query)
+                return result if result is not None else next(self._searches)
+
+        async def asearch(query: str) -> str:
+            """Searches for posts on the topic without blocking the event loop.
+
+            Args:
+                query (str): query to search for.
+
+            Returns:
+                str: found posts.
+            """
+            return await asyncio.to_thread(search, query)
+
+        return StructuredTool.from_function(
+            func=search, coroutine=asearch, parse_docstring=True
+        )
+
+    def _load(self, url: str) -> str:
+        """Serves a recorded post.
+
+        Args:
+            url (str): url of the post to load.
+
+        Raises:
+            LookupError: if the post wasn't recorded.
+
+        Returns:
+            str: loaded post.
+        """
+        time.sleep(self._latency)
+
+        with self._lock:
+            self.loads += 1
+
+        content = self._recorded.posts.get(self.get_post_id(url))
+        if content is None:
+            raise LookupError(f"Post {url} wasn't recorded.")
+
+        return content
+
+    def __str__(self) -> str:
+        """Returns string representation of the scraper.
+
+        Returns:
+            str: string representation of the scraper
+        """
+        return self._name
@@ -1,10 +1,12 @@
 import logging
+from pathlib import Path
 
 from dotenv import load_dotenv
 
 import config
 from api_crawler import BaseScraper, Crawler
-from scrapers import SubredditScraper
+from api_crawler.cache import SeenPostIndex, SQLiteCache
+from scrapers import CommentFetchMode, RedditClient, SubredditScraper
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,8 +20,32 @@ def main():
     """Example use of the Crawler"""
     load_dotenv()
 
+    post_cache = SQLiteCache(
+        config.CACHE_PATH,
+        namespace="posts",
+        ttl=config.POST_CACHE_TTL,
+        max_size_bytes=config.POST_CACHE_MAX_SIZE_BYTES,
+    )
+
+    critique_cache = SQLiteCache(
+        config.CACHE_PATH, namespace="critiques", ttl=config.CRITIQUE_CACHE_TTL
+    )
+
+    search_cache = SQLiteCache(
+        config.CACHE_PATH,
+        namespace="searches",
+        ttl=config.SEARCH_CACHE_TTL,
+        max_size_bytes=config.SEARCH_CACHE_MAX_SIZE_BYTES,
+    )
+
     scrapers: list[BaseScraper] = [
-        SubredditScraper(subreddit=subreddit, timescope=config.TIMESCOPE)
+        SubredditScraper(
+            subreddit=subreddit,
+            timescope=config.TIMESCOPE,
+            cache=post_cache,
+            comment_mode=CommentFetchMode(config.COMMENT_MODE),
+            search_cache=search_cache,
+        )
         for subreddit in config.SUBREDDITS
     ]
 
@@ -36,10 +62,42 @@ def main():
         config.SELECTOR_INTRODUCTION_PROMPT,
         config.TAGS,
         scrapers,
+        critique_cache=critique_cache,
+        requests_per_minute=config.MODEL_REQUESTS_PER_MINUTE,
+        tokens_per_minute=config.MODEL_TOKENS_PER_MINUTE,
+        fan_in=config.SEARCH_FAN_IN,
+        seen_index=SeenPostIndex(config.CACHE_PATH) if config.INCREMENTAL else None,
+        prefilter=config.PREFILTER,
+        prefilter_threshold=config.PREFILTER_THRESHOLD,
+        history_token_budget=config.HISTORY_TOKEN_BUDGET,
+        critique_batch_token_budget=config.CRITIQUE_BATCH_TOKEN_BUDGET,
+        selection_chunk_size=config.SELECTION_CHUNK_SIZE,
+        normalize_posts=config.NORMALIZE_POSTS,
+        post_token_budget=config.POST_TOKEN_BUDGET,
+        checkpoint_path=config.CHECKPOINT_PATH,
+        crawl_id=config.CRAWL_ID,
+        min_iteration_yield=config.MIN_ITERATION_YIELD,
+        llm_loop_decision=config.LLM_LOOP_DECISION,
+        planner_introduction_prompt=(
+            config.PLANNER_INTRODUCTION_PROMPT if config.PLAN_QUERIES else None
+        ),
+        models=config.MODELS,
+        critic_screening_model=config.CRITIC_SCREENING_MODEL,
+        critic_escalation_score=config.CRITIC_ESCALATION_SCORE,
     )
 
+    logger.info(
+        f"Crawl ID: {crawler.crawl_id}. Set CRAWL_ID to it to resume the crawl."
+    )
     results = crawler.run()
 
+    Path(config.METRICS_PATH).write_text(crawler.metrics().to_json())
+    logger.info(f"Post cache: {post_cache.stats()}")
+    logger.info(f"Critique cache: {critique_cache.stats()}")
+    logger.info(f"Search cache: {search_cache.stats()}")
+    for endpoint, latency in RedditClient.shared().latency_report().items():
+        logger.info(f"Reddit {endpoint}: {latency}")
+
     for result in results:
         print(
             f"TITLE: {result.post.title}\nLINK: {result.post.link}\nJUSTIFICATION: {result.justification}\n\n"
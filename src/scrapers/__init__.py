@@ -1,3 +1,11 @@
-from scrapers.subreddit_scraper import SubredditScraper
+from scrapers.multireddit_scraper import MultiredditScraper
+from scrapers.reddit_client import RedditClient, RequestPriority
+from scrapers.subreddit_scraper import CommentFetchMode, SubredditScraper
 
-__all__ = ["SubredditScraper"]
+__all__ = [
+    "CommentFetchMode",
+    "MultiredditScraper",
+    "RedditClient",
+    "RequestPriority",
+    "SubredditScraper",
+]
@@ -0,0 +1,73 @@
+import datetime
+import json
+
+from api_crawler.agents.output_structures import SearchResult
+from api_crawler.cache import SQLiteCache
+from scrapers.reddit_client import RedditClient
+from scrapers.subreddit_scraper import (
+    SUBREDDIT_PATTERN,
+    CommentFetchMode,
+    SubredditScraper,
+)
+
+MAX_SEARCH_LIMIT = 100
+
+
+class MultiredditScraper(SubredditScraper):
+    """Scraper searching several subreddits at once through a combined sub1+sub2+... multireddit."""
+
+    def __init__(
+        self,
+        subreddits: list[str],
+        post_limit: int = 20,
+        max_comments: int = 5,
+        timescope: datetime.timedelta = datetime.timedelta(days=1),
+        cache: SQLiteCache | None = None,
+        client: RedditClient | None = None,
+        comment_mode: CommentFetchMode = CommentFetchMode.FULL,
+        comment_sort: str = "top",
+        search_cache: SQLiteCache | None = None,
+    ) -> None:
+        """Initializes the Scraper with timescope, subreddit names and post limit.
+
+        Args:
+            subreddits (list[str]): names of the subreddits.
+            post_limit (int, optional): maximum number of posts we want to see across all subreddits, capped at 100 to keep a search to a single request. Defaults to 20.
+            max_comments (int, optional): how many top comments we want to load. Defaults to 5.
+            timescope (datetime.timedelta, optional): how old are the posts we wish to see. Defaults to datetime.timedelta(days=1).
+            cache (SQLiteCache | None, optional): cache of loaded posts, keyed by post ID. Defaults to None.
+            client (RedditClient | None, optional): Reddit client to use. Defaults to None, meaning the client shared by all scrapers.
+            comment_mode (CommentFetchMode, optional): FULL builds praw's whole comment forest, LIGHT requests only `max_comments` top-level comments and reads the raw JSON. Defaults to CommentFetchMode.FULL.
+            comment_sort (str, optional): order of comments requested in LIGHT mode, e.g. "top", "best" or "new". Defaults to "top".
+            search_cache (SQLiteCache | None, optional): cache of search results, keyed by subreddits, post limit and normalized query, shared by all agents and runs using it. Defaults to None, meaning an in-process cache of this scraper whose entries expire after a 24th of the timescope.
+        """
+        super().__init__(
+            subreddit="+".join(subreddits),
+            post_limit=min(post_limit, MAX_SEARCH_LIMIT),
+            max_comments=max_comments,
+            timescope=timescope,
+            cache=cache,
+            client=client,
+            comment_mode=comment_mode,
+            comment_sort=comment_sort,
+            search_cache=search_cache,
+        )
+        self._subreddits = subreddits
+
+    def _format_results(self, results: list[SearchResult]) -> str:
+        """Formats search results for the LLM, split by subreddit.
+
+        Args:
+            results (list[SearchResult]): found posts.
+
+        Returns:
+            str: found posts grouped by subreddit.
+        """
+        grouped: dict[str, list[dict]] = {}
+
+        for result in results:
+            match = SUBREDDIT_PATTERN.search(result.link)
+            subreddit = match.group(1) if match else "unknown"
+            grouped.setdefault(subreddit, []).append(result.model_dump())
+
+        return json.dumps(grouped) if grouped else "No results."
@@ -0,0 +1,241 @@
+import heapq
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import TYPE_CHECKING, ClassVar, Iterator
+from urllib.parse import urlparse
+
+from pydantic import BaseModel, Field
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+
+if TYPE_CHECKING:
+    from praw import Reddit
+
+logger = logging.getLogger(__name__)
+
+
+class RequestPriority(IntEnum):
+    """Priority of Reddit requests, lower values are served first."""
+
+    SEARCH = 0
+    LOAD = 1
+
+
+class EndpointLatency(BaseModel):
+    """Latency statistics of a single Reddit API endpoint."""
+
+    calls: int = Field(default=0, description="number of requests")
+    total_seconds: float = Field(default=0.0, description="total response time")
+    max_seconds: float = Field(default=0.0, description="longest response time")
+
+    @property
+    def mean_seconds(self) -> float:
+        """Average response time.
+
+        Returns:
+            float: mean latency in seconds, 0 if there were no requests.
+        """
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+class RedditClient:
+    """Reddit client shared by all scrapers.
+
+    Holds a single HTTP session with a keep-alive connection pool and schedules requests centrally: at most
+    `max_concurrency` requests are in flight, searches go before comment loading and requests are held back when
+    Reddit's X-Ratelimit-Remaining budget is nearly used up until X-Ratelimit-Reset passes. praw's `Reddit` isn't
+    thread-safe, so every thread gets its own instance talking through the shared session.
+    """
+
+    _shared: ClassVar["RedditClient | None"] = None
+    _shared_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(
+        self,
+        client_id: str | None = None,
+        client_secret: str | None = None,
+        user_agent: str = "marketing agent",
+        max_concurrency: int = 8,
+        ratelimit_reserve: int = 5,
+    ) -> None:
+        """Initializes the session, the connection pool and the scheduler.
+
+        Args:
+            client_id (str | None, optional): Reddit app ID. Defaults to None, meaning REDDIT_CLIENT_ID env variable.
+            client_secret (str | None, optional): Reddit app secret. Defaults to None, meaning REDDIT_CLIENT_SECRET env variable.
+            user_agent (str, optional): user agent of the requests. Defaults to "marketing agent".
+            max_concurrency (int, optional): maximum number of requests in flight. Defaults to 8.
+            ratelimit_reserve (int, optional): number of requests left in the rate limit window below which requests wait for the reset. Defaults to 5.
+        """
+        self._max_concurrency = max_concurrency
+        self._ratelimit_reserve = ratelimit_reserve
+
+        self._condition = threading.Condition()
+        self._queue: list[tuple[int, int]] = []
+        self._tickets = itertools.count()
+        self._in_flight = 0
+        self._remaining: float | None = None
+        self._reset_at = 0.0
+        self._latencies: dict[str, EndpointLatency] = {}
+
+        self._session = Session()
+        adapter = HTTPAdapter(pool_maxsize=max_concurrency)
+        self._session.mount("https://", adapter)
+        self._session.hooks["response"].append(self._on_response)
+
+        self._client_id = client_id or os.getenv("REDDIT_CLIENT_ID")
+        self._client_secret = client_secret or os.getenv("REDDIT_CLIENT_SECRET")
+        self._user_agent = user_agent
+        self._local = threading.local()
+
+        logger.info("Initializing Reddit client.")
+
+    @property
+    def reddit(self) -> "Reddit":
+        """Returns the praw instance of the calling thread, creating it on first use.
+
+        Returns:
+            Reddit: praw instance using the shared session.
+        """
+        reddit = getattr(self._local, "reddit", None)
+
+        if reddit is None:
+            from praw import Reddit
+
+            reddit = Reddit(
+                client_id=self._client_id,
+                client_secret=self._client_secret,
+                user_agent=self._user_agent,
+                requestor_kwargs={"session": self._session},
+            )
+            self._local.reddit = reddit
+
+        return reddit
+
+    @classmethod
+    def shared(cls) -> "RedditClient":
+        """Returns the process-wide client, creating it on first use.
+
+        Returns:
+            RedditClient: shared client.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @contextmanager
+    def slot(self, priority: RequestPriority) -> Iterator[None]:
+        """Waits for the turn to talk to Reddit and holds it for the duration of the block.
+
+        Args:
+            priority (RequestPriority): priority of the requests made in the block.
+        """
+        ticket = (priority, next(self._tickets))
+
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            while not self._can_start(ticket):
+                self._condition.wait(timeout=self._ratelimit_wait())
+            heapq.heappop(self._queue)
+            self._in_flight += 1
+            self._condition.notify_all()
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def latency_report(self) -> dict[str, EndpointLatency]:
+        """Returns latency statistics per endpoint.
+
+        Returns:
+            dict[str, EndpointLatency]: statistics by normalized endpoint path.
+        """
+        with self._condition:
+            return {
+                endpoint: latency.model_copy()
+                for endpoint, latency in self._latencies.items()
+            }
+
+    def _can_start(self, ticket: tuple[int, int]) -> bool:
+        """Checks whether the request is first in line and both concurrency and rate limit allow it. Must be called with the lock held.
+
+        Args:
+            ticket (tuple[int, int]): priority and sequence number of the request.
+
+        Returns:
+            bool: whether the request can start.
+        """
+        return (
+            self._queue[0] == ticket
+            and self._in_flight < self._max_concurrency
+            and self._ratelimit_wait() is None
+        )
+
+    def _ratelimit_wait(self) -> float | None:
+        """Computes how long requests have to be held back because of Reddit's rate limit. Must be called with the lock held.
+
+        Returns:
+            float | None: seconds until the rate limit window resets or None if requests can go.
+        """
+        if self._remaining is None or self._remaining > self._ratelimit_reserve:
+            return None
+
+        wait = self._reset_at - time.monotonic()
+        return wait if wait > 0 else None
+
+    def _on_response(self, response: Response, *args, **kwargs) -> None:
+        """Records rate limit headers and latency of every response of the session.
+
+        Args:
+            response (Response): HTTP response.
+        """
+        endpoint = _normalize_endpoint(urlparse(response.url).path)
+        elapsed = response.elapsed.total_seconds()
+
+        with self._condition:
+            latency = self._latencies.setdefault(endpoint, EndpointLatency())
+            latency.calls += 1
+            latency.total_seconds += elapsed
+            latency.max_seconds = max(latency.max_seconds, elapsed)
+
+            try:
+                remaining = float(response.headers["X-Ratelimit-Remaining"])
+                reset = float(response.headers["X-Ratelimit-Reset"])
+            except (KeyError, ValueError):
+                return
+
+            self._remaining = remaining
+            self._reset_at = time.monotonic() + reset
+            self._condition.notify_all()
+
+
+_ID_SEGMENTS = [
+    (re.compile(r"/(r|user|u)/[^/]+"), r"/\1/{name}"),
+    (re.compile(r"/comments/[^/]+(/[^/]+)?"), "/comments/{id}"),
+    (re.compile(r"\.json$"), ""),
+]
+
+
+def _normalize_endpoint(path: str) -> str:
+    """Replaces subreddit names and post IDs in the path, so requests to the same endpoint are grouped.
+
+    Args:
+        path (str): URL path of the request.
+
+    Returns:
+        str: endpoint name.
+    """
+    for pattern, replacement in _ID_SEGMENTS:
+        path = pattern.sub(replacement, path)
+
+    return path.rstrip("/") or "/"
@@ -1,18 +1,44 @@
+import asyncio
 import datetime
+import json
 import logging
-import os
-from functools import cache
+import re
+from enum import Enum
+from functools import cached_property
+from typing import TYPE_CHECKING, Iterable, Self
 
-from langchain.tools import BaseTool, tool
-from praw import Reddit
+from more_itertools import unique_everseen
 
+from api_crawler.agents.output_structures import SearchResult
 from api_crawler.base_scraper import BaseScraper
+from api_crawler.cache import SQLiteCache
+from api_crawler.identity import normalize_query, simhash
+from scrapers.reddit_client import RedditClient, RequestPriority
+
+if TYPE_CHECKING:
+    from langchain_core.tools import BaseTool
+    from praw import Reddit
+    from praw.models import Submission
 
 logger = logging.getLogger(__name__)
+SUBREDDIT_PATTERN = re.compile(r"/r/([^/]+)/")
+
+
+class CommentFetchMode(str, Enum):
+    """How comments of loaded posts are fetched."""
+
+    FULL = "full"
+    LIGHT = "light"
 
 
 class SubredditScraper(BaseScraper):
-    """Scraper class for a specified subreddit."""
+    """Scraper class for a specified subreddit.
+
+    The Reddit client and the default search cache are created on first use, so constructing hundreds of scrapers
+    is cheap.
+    """
+
+    SEARCH_CACHE_MAX_SIZE_BYTES = 4 * 1024 * 1024
 
     def __init__(
         self,
@@ -20,6 +46,11 @@ class SubredditScraper(BaseScraper):
         post_limit: int = 20,
         max_comments: int = 5,
         timescope: datetime.timedelta = datetime.timedelta(days=1),
+        cache: SQLiteCache | None = None,
+        client: RedditClient | None = None,
+        comment_mode: CommentFetchMode = CommentFetchMode.FULL,
+        comment_sort: str = "top",
+        search_cache: SQLiteCache | None = None,
     ) -> None:
         """Initializes the Scraper with timescope, subreddit name and post limit.
 
@@ -28,30 +59,66 @@ class SubredditScraper(BaseScraper):
             post_limit (int, optional): maximum number of posts we want to see. Defaults to 20.
             max_comments (int, optional): how many top comments we want to load. Defaults to 5.
             timescope (datetime.timedelta, optional): how old are the posts we wish to see. Defaults to datetime.timedelta(days=1).
+            cache (SQLiteCache | None, optional): cache of loaded posts, keyed by post ID. Defaults to None.
+            client (RedditClient | None, optional): Reddit client to use. Defaults to None, meaning the client shared by all scrapers.
+            comment_mode (CommentFetchMode, optional): FULL builds praw's whole comment forest, LIGHT requests only `max_comments` top-level comments and reads the raw JSON. Defaults to CommentFetchMode.FULL.
+            comment_sort (str, optional): order of comments requested in LIGHT mode, e.g. "top", "best" or "new". Defaults to "top".
+            search_cache (SQLiteCache | None, optional): cache of search results, keyed by subreddit, post limit and normalized query, shared by all agents and runs using it. Defaults to None, meaning an in-process cache of this scraper whose entries expire after a 24th of the timescope.
         """
-        super().__init__(timescope)
+        super().__init__(timescope, cache)
         self._subreddit = subreddit
         self._max_comments = max_comments
         self._post_limit = post_limit
+        self._custom_client = client
+        self._comment_mode = comment_mode
+        self._comment_sort = comment_sort
+        self._custom_search_cache = search_cache
+
+    @cached_property
+    def _client(self) -> RedditClient:
+        """Reddit client of the scraper, the shared one unless another was given.
+
+        Returns:
+            RedditClient: Reddit client.
+        """
+        return (
+            self._custom_client
+            if self._custom_client is not None
+            else RedditClient.shared()
+        )
+
+    @property
+    def _reddit(self) -> "Reddit":
+        """praw instance of the Reddit client for the calling thread, as praw isn't thread-safe.
+
+        Returns:
+            Reddit: praw instance.
+        """
+        return self._client.reddit
 
-        logger.info("Initializing Reddit client.")
-        self._reddit = Reddit(
-            client_id=os.getenv("REDDIT_CLIENT_ID"),
-            client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
-            user_agent="marketing agent",
+    @cached_property
+    def _search_cache(self) -> SQLiteCache:
+        """Cache of search results, an in-process one of this scraper unless another was given.
+
+        Returns:
+            SQLiteCache: search cache.
+        """
+        if self._custom_search_cache is not None:
+            return self._custom_search_cache
+
+        return SQLiteCache(
+            namespace="searches",
+            ttl=self._timescope / 24,
+            max_size_bytes=self.SEARCH_CACHE_MAX_SIZE_BYTES,
         )
 
-    def get_searcher(self) -> BaseTool:
+    def get_searcher(self) -> "BaseTool":
         """Generates a tool for searching through the specified subreddit.
 
         Returns:
             BaseTool: resulting tool which allows to search through the subreddit.
         """
 
-        timestamp = super()._get_timestamp()
-
-        @tool(parse_docstring=True)
-        @cache
         def search(query: str) -> str:
             """Searches Reddit's r/{subreddit} for posts on the topic.
 
@@ -62,26 +129,135 @@ class SubredditScraper(BaseScraper):
                 str: found posts.
             """
             try:
-                sub = self._reddit.subreddit(self._subreddit)
-                results = sub.search(
+                results = self._cached_search(query)
+            except Exception as e:
+                return f"Error: {e}"
+
+            timestamp = self._get_timestamp()
+
+            return self._format_results(
+                [
+                    result
+                    for result in results
+                    if result.created is not None and result.created > timestamp
+                ]
+            )
+
+        async def asearch(query: str) -> str:
+            """Searches Reddit's r/{subreddit} for posts on the topic without blocking the event loop.
+
+            Args:
+                query (str): query to search on the subreddit.
+
+            Returns:
+                str: found posts.
+            """
+            return await asyncio.to_thread(search, query)
+
+        from langchain_core.tools import StructuredTool
+
+        return StructuredTool.from_function(
+            func=search, coroutine=asearch, parse_docstring=True
+        )
+
+    def _cached_search(self, query: str) -> list[SearchResult]:
+        """Searches the subreddit, serving the results from the search cache if possible.
+
+        Results are cached before they're filtered by the timescope, so an entry stays correct as its posts age. Only
+        successful searches are cached, so transient errors are retried.
+
+        Args:
+            query (str): query to search on the subreddit.
+
+        Returns:
+            list[SearchResult]: unique found posts, newest first.
+        """
+        key = f"{self._subreddit.lower()}|{self._post_limit}|{normalize_query(query)}"
+        cached = self._search_cache.get(key)
+
+        if cached is not None:
+            return [
+                SearchResult.model_validate(result) for result in json.loads(cached)
+            ]
+
+        with self._client.slot(RequestPriority.SEARCH):
+            submissions = self._unique(
+                self._reddit.subreddit(self._subreddit).search(
                     query, time_filter="month", sort="new", limit=self._post_limit
                 )
+            )
+        results = [self._to_result(submission) for submission in submissions]
 
-                result = []
-                for submission in results:
-                    if submission.created > timestamp:
-                        title = submission.title
-                        permalink = f"https://www.reddit.com{submission.permalink}"
-                        result.append({"link": permalink, "title": title})
+        self._search_cache.set(
+            key, json.dumps([result.model_dump() for result in results])
+        )
 
-                return str(result) if result else "No results."
+        return results
 
-            except Exception as e:
-                return f"Error: {e}"
+    @classmethod
+    def combine(cls, scrapers: list[Self]) -> list[BaseScraper]:
+        """Merges the scrapers into a single multireddit scraper, so one query costs one API call.
+
+        Settings other than the subreddits and the post limit are taken from the first scraper.
 
-        return search
+        Args:
+            scrapers (list[Self]): scrapers to merge.
+
+        Returns:
+            list[BaseScraper]: merged scrapers.
+        """
+        from scrapers.multireddit_scraper import MultiredditScraper
 
-    def load(self, url: str) -> str:
+        if len(scrapers) < 2:
+            return scrapers
+
+        first = scrapers[0]
+
+        return [
+            MultiredditScraper(
+                subreddits=[
+                    subreddit
+                    for scraper in scrapers
+                    for subreddit in scraper._subreddit.split("+")
+                ],
+                post_limit=sum(scraper._post_limit for scraper in scrapers),
+                max_comments=first._max_comments,
+                timescope=first._timescope,
+                cache=first._cache,
+                client=first._custom_client,
+                comment_mode=first._comment_mode,
+                comment_sort=first._comment_sort,
+                search_cache=first._custom_search_cache,
+            )
+        ]
+
+    def fingerprint(self, content: str) -> int | None:
+        """Fingerprints the title and text of a loaded post, leaving out metadata and comments, which differ between crossposts.
+
+        Args:
+            content (str): loaded post.
+
+        Returns:
+            int | None: fingerprint or None if the post is too short to fingerprint.
+        """
+        head, _, _ = content.partition(f"\n\nTop {self._max_comments} Comments:")
+        blocks = [
+            block
+            for block in head.split("\n\n")
+            if not block.startswith(("Author: ", "Score: ", "Link: "))
+        ]
+
+        return simhash("\n\n".join(blocks))
+
+    def _cache_variant(self) -> str:
+        """Describes the comment settings, which change the content of loaded posts.
+
+        Returns:
+            str: settings.
+        """
+        return f"{self._comment_mode.value}:{self._max_comments}:{self._comment_sort}"
+
+    def _load(self, url: str) -> str:
         """Loads a reddit post and some top comments.
 
         Args:
@@ -90,32 +266,171 @@ class SubredditScraper(BaseScraper):
         Returns:
             str: post content.
         """
-        try:
-            submission = self._reddit.submission(url=url)
+        if self._comment_mode == CommentFetchMode.LIGHT:
+            return self._load_light(url)
+
+        return self._format_post(self._reddit.submission(url=url))
+
+    def _load_light(self, url: str) -> str:
+        """Loads a reddit post with only as many top-level comments as are used, without building praw objects.
+
+        Args:
+            url (str): link to the post.
+
+        Raises:
+            ValueError: if the link doesn't point to a reddit post.
+
+        Returns:
+            str: post content.
+        """
+        post_id = self.get_post_id(url)
+        if not post_id.startswith("t3_"):
+            raise ValueError(f"Not a reddit post: {url}")
+
+        with self._client.slot(RequestPriority.LOAD):
+            submission_listing, comment_listing = self._reddit.request(
+                method="GET",
+                path=f"comments/{post_id.removeprefix('t3_')}/",
+                params={
+                    "limit": self._max_comments,
+                    "depth": 1,
+                    "sort": self._comment_sort,
+                    "raw_json": 1,
+                },
+            )
+
+        submission = submission_listing["data"]["children"][0]["data"]
+        comments = [
+            child["data"]
+            for child in comment_listing["data"]["children"]
+            if child["kind"] == "t1"
+        ]
+
+        return self._render(
+            title=submission["title"],
+            author=submission.get("author"),
+            score=submission.get("score"),
+            permalink=submission["permalink"],
+            selftext=submission.get("selftext", ""),
+            comments=[
+                (comment["body"], comment.get("author"), comment.get("score"))
+                for comment in comments[: self._max_comments]
+            ],
+        )
+
+    def _format_post(self, submission: "Submission") -> str:
+        """Fetches top comments of a submission and formats it for the LLM.
+
+        Args:
+            submission (Submission): post to format.
+
+        Returns:
+            str: post content.
+        """
+        with self._client.slot(RequestPriority.LOAD):
             submission.comments.replace_more(limit=0)
 
-            output = [
-                f"Title: {submission.title}",
-                f"Author: {submission.author}",
-                f"Score: {submission.score}",
-                f"Link: https://www.reddit.com{submission.permalink}",
-            ]
+        return self._render(
+            title=submission.title,
+            author=submission.author,
+            score=submission.score,
+            permalink=submission.permalink,
+            selftext=submission.selftext,
+            comments=[
+                (comment.body, comment.author, comment.score)
+                for comment in submission.comments[: self._max_comments]
+            ],
+        )
 
-            if submission.selftext:
-                output.append(f"\nPost Content:\n{submission.selftext}")
+    def _render(
+        self,
+        title: str,
+        author: object,
+        score: object,
+        permalink: str,
+        selftext: str,
+        comments: list[tuple[str, object, object]],
+    ) -> str:
+        """Formats a post and its top comments for the LLM.
 
-            output.append(f"\nTop {self._max_comments} Comments:")
+        Args:
+            title (str): post title.
+            author (object): post author.
+            score (object): post score.
+            permalink (str): path of the post.
+            selftext (str): post content.
+            comments (list[tuple[str, object, object]]): body, author and score of each top comment.
 
-            for i, comment in enumerate(submission.comments[: self._max_comments], 1):
-                body = comment.body.strip().replace("\n", " ")
-                output.append(
-                    f"{i}. {body} (by {comment.author}, score: {comment.score})"
-                )
+        Returns:
+            str: post content.
+        """
+        output = [
+            f"Title: {title}",
+            f"Author: {author}",
+            f"Score: {score}",
+            f"Link: https://www.reddit.com{permalink}",
+        ]
+
+        if selftext:
+            output.append(f"\nPost Content:\n{selftext}")
+
+        output.append(f"\nTop {self._max_comments} Comments:")
 
-            return "\n\n".join(output)
+        for i, (body, comment_author, comment_score) in enumerate(comments, 1):
+            body = body.strip().replace("\n", " ")
+            output.append(f"{i}. {body} (by {comment_author}, score: {comment_score})")
 
-        except Exception as e:
-            return f"Error loading post: {e}"
+        return "\n\n".join(output)
+
+    @staticmethod
+    def _unique(submissions: Iterable["Submission"]) -> list["Submission"]:
+        """Drops duplicate search results, treating crossposts as their original post.
+
+        Args:
+            submissions (Iterable[Submission]): found posts.
+
+        Returns:
+            list[Submission]: unique posts.
+        """
+        return list(
+            unique_everseen(
+                submissions,
+                key=lambda submission: (
+                    getattr(submission, "crosspost_parent", None) or submission.name
+                ),
+            )
+        )
+
+    def _format_results(self, results: list[SearchResult]) -> str:
+        """Formats search results for the LLM.
+
+        Args:
+            results (list[SearchResult]): found posts.
+
+        Returns:
+            str: found posts.
+        """
+        return (
+            json.dumps([result.model_dump() for result in results])
+            if results
+            else "No results."
+        )
+
+    @staticmethod
+    def _to_result(submission: "Submission") -> SearchResult:
+        """Converts a found submission into a search result.
+
+        Args:
+            submission (Submission): found post.
+
+        Returns:
+            SearchResult: search result.
+        """
+        return SearchResult(
+            link=f"https://www.reddit.com{submission.permalink}",
+            title=submission.title,
+            created=submission.created,
+        )
 
     def __str__(self) -> str:
         """Returns string representation of the scraper.